@@ -1,25 +1,67 @@
 import os
 import sys
 import logging
-from openpyxl import load_workbook, Workbook
-from openpyxl.utils import get_column_letter
 from colorama import init, Fore, Style
-# Importa módulos para el navegador de archivos (interfaz gráfica)
-import tkinter as tk
-from tkinter import filedialog
-# Importa módulos para reportes detallados (medición de recursos)
+# openpyxl, tkinter (navegador de archivos gráfico), psutil (medición de recursos) y el pool de procesos
+# se importan de forma diferida dentro de las funciones que los usan, para que el arranque sea rápido
+# y el uso sin interfaz gráfica nunca cargue tkinter.
 import time
-import psutil
+# Importa módulos para la línea de comandos y el procesamiento en paralelo (varios procesos)
+import argparse
+import codecs
+import csv
+import glob
+import json
+import pickle
+import tempfile
+# Importa módulos para leer directamente el XML de los archivos XLSX (encabezados sin openpyxl)
+import io
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+# Importa módulos para los almacenes de claves del wipe (memoria compacta y disco)
+import array
+import hashlib
+import sqlite3
+# Importa módulos para construir y normalizar claves de deduplicación compuestas
+import datetime
+import unicodedata
+from operator import itemgetter
+from contextlib import contextmanager
+from itertools import compress, islice
+# Importa módulos para escribir el XML de la hoja de salida (escritor XLSX en streaming)
+import decimal
+import math
 
 # Inicializa colorama para colorear la salida en consola automáticamente
 init(autoreset=True)
 
 # Configuración del sistema de logging para mostrar mensajes de depuración, información y errores
+# (se aplica en main(), no al importar el módulo)
 LOG_LEVEL = logging.DEBUG  # Puedes cambiar a logging.INFO o logging.ERROR según lo que necesites ver
-logging.basicConfig(
-    level=LOG_LEVEL,
-    format='[%(levelname)s] %(message)s'
-)
+
+# Códigos de salida del modo no interactivo (línea de comandos y archivos de trabajos)
+EXIT_OK = 0        # Todas las operaciones terminaron correctamente
+EXIT_FAILURE = 1   # La operación (o todos los trabajos) falló
+EXIT_USAGE = 2     # Argumentos o archivo de trabajos inválidos
+EXIT_PARTIAL = 3   # Algunos trabajos del archivo fallaron y otros no
+
+# Motores de lectura de filas: openpyxl (por defecto) o el lector rápido de XML (ver iter_rows_fast)
+READ_ENGINES = ('openpyxl', 'fast')
+# Motores del wipe: fila a fila con un almacén de claves (por defecto) o columnar para Parquet/Arrow (ver wipe_arrow_file)
+WIPE_ENGINES = ('rows', 'arrow')
+FAST_READER_CHUNK_BYTES = 256 * 1024  # Bytes de XML que el lector rápido analiza por bloque
+
+# Número de filas que cada worker agrupa por bloque al volcar su archivo intermedio (spool)
+SPOOL_CHUNK_ROWS = 5000
+
+# Umbrales (filas estimadas) con los que el wipe elige automáticamente el almacén de claves
+KEY_STORE_SET_MAX_ROWS = 2_000_000     # Hasta aquí: set de Python (exacto, el más rápido)
+KEY_STORE_HASH_MAX_ROWS = 50_000_000   # Hasta aquí: tabla de hashes de 64 bits; por encima: disco
+KEY_STORE_BACKENDS = ('auto', 'set', 'hash64', 'hash128', 'disk')
+KEY_BATCH_ROWS = 65536  # Filas por lote al filtrar las claves del wipe (ver SetKeyStore.filter)
+ESTIMATE_SAMPLE_BYTES = 256 * 1024     # Bytes del XML de la hoja que se muestrean para estimar sus filas si no declara su dimensión
 
 def print_separator():
     """
@@ -45,8 +87,9 @@ def interactive_folder_selection(start_path=None):
     current_path = os.path.abspath(start_path)
     while True:
         print(Fore.CYAN + f"\n📁 Carpeta actual: {current_path}")
-        # Lista solo las subcarpetas de la carpeta actual
-        entries = [e for e in os.listdir(current_path) if os.path.isdir(os.path.join(current_path, e))]
+        # Lista solo las subcarpetas de la carpeta actual (os.scandir evita un stat por entrada)
+        with os.scandir(current_path) as iterator:
+            entries = sorted(entry.name for entry in iterator if entry.is_dir())
         print(Fore.YELLOW + "Subcarpetas disponibles para navegar:")
         for idx, entry in enumerate(entries):
             print(f"  {idx+1}. {entry}")
@@ -80,9 +123,17 @@ def interactive_folder_selection(start_path=None):
         else:
             print(Fore.RED + "❌ Opción inválida. Por favor, elija una opción válida.")
 
+# Tipos de archivo que ofrece el navegador gráfico al seleccionar las entradas
+FILE_DIALOG_TYPES = [
+    ("Archivos admitidos", "*.xlsx *.csv *.parquet *.arrow *.feather"),
+    ("Archivos Excel", "*.xlsx"),
+    ("Archivos CSV", "*.csv"),
+    ("Archivos Parquet/Arrow", "*.parquet *.arrow *.feather"),
+]
+
 def ask_file_paths(prompt_msg, multiple=False, allow_file_dialog=False):
     """
-    Solicita al usuario las rutas de los archivos XLSX a procesar.
+    Solicita al usuario las rutas de los archivos a procesar (XLSX, CSV, Parquet o Arrow).
     Permite seleccionar uno o varios archivos, ya sea por consola o usando un navegador de archivos gráfico.
     Permite volver al menú principal o cerrar la app.
     """
@@ -100,25 +151,27 @@ def ask_file_paths(prompt_msg, multiple=False, allow_file_dialog=False):
                 folder = interactive_folder_selection()
                 if folder is None:
                     return None  # Volver al menú principal
-                files = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith('.xlsx') and os.path.isfile(os.path.join(folder, f))]
+                files = scan_input_files(folder)
                 if not files:
-                    print(Fore.RED + "⚠ No se encontraron archivos .xlsx en la carpeta seleccionada.")
+                    print(Fore.RED + f"⚠ No se encontraron archivos ({', '.join(FILE_FORMATS)}) en la carpeta seleccionada.")
                     return []
                 print(Fore.GREEN + f"✔ {len(files)} archivo(s) seleccionado(s) para procesar.")
                 break
             elif sel == '2':
+                import tkinter as tk
+                from tkinter import filedialog
                 root = tk.Tk()
                 root.withdraw()  # Oculta la ventana principal de Tkinter
                 if multiple:
                     files = filedialog.askopenfilenames(
                         title="Selecciona uno o más archivos XLSX para procesar",
-                        filetypes=[("Archivos Excel", "*.xlsx")]
+                        filetypes=FILE_DIALOG_TYPES
                     )
                     files = list(files)
                 else:
                     file = filedialog.askopenfilename(
                         title="Selecciona un archivo XLSX para procesar",
-                        filetypes=[("Archivos Excel", "*.xlsx")]
+                        filetypes=FILE_DIALOG_TYPES
                     )
                     files = [file] if file else []
                 root.destroy()
@@ -159,8 +212,8 @@ def ask_file_paths(prompt_msg, multiple=False, allow_file_dialog=False):
         if not os.path.isfile(path):
             print(Fore.RED + f"❌ Archivo no encontrado: {path}")
             continue
-        if not path.lower().endswith('.xlsx'):
-            print(Fore.RED + "❌ Solo se permiten archivos con extensión .xlsx")
+        if not path.lower().endswith(tuple(FILE_FORMATS)):
+            print(Fore.RED + f"❌ Solo se permiten archivos con extensión {', '.join(FILE_FORMATS)}")
             continue
         files.append(path)
         if not multiple:
@@ -196,6 +249,8 @@ def ask_output_path(default_name):
             print(Fore.GREEN + f"✔ Carpeta seleccionada: {folder}")
             break
         elif sel == '3':
+            import tkinter as tk
+            from tkinter import filedialog
             root = tk.Tk()
             root.withdraw()
             folder = filedialog.askdirectory(title="Selecciona la carpeta de destino para guardar el archivo")
@@ -217,7 +272,8 @@ def ask_output_path(default_name):
     if not os.path.isdir(folder):
         print(Fore.RED + "⚠ La carpeta no existe. Usando carpeta actual.")
         folder = os.getcwd()
-    name = input(Fore.WHITE + f"Ingrese el nombre del archivo de salida (sin extensión, por defecto '{default_name}'): ").strip()
+    name = input(Fore.WHITE + f"Ingrese el nombre del archivo de salida (sin extensión para .xlsx, o con .csv/.parquet/.arrow; "
+                              f"por defecto '{default_name}'): ").strip()
     if name.lower() == 'm':
         print(Fore.YELLOW + "↩ Volviendo al menú principal...")
         return None
@@ -226,8 +282,10 @@ def ask_output_path(default_name):
         sys.exit(0)
     if not name:
         name = default_name
-    print(Fore.GREEN + f"✔ El archivo se guardará como: {name}.xlsx")
-    return os.path.join(folder, name + '.xlsx')
+    if not name.lower().endswith(tuple(FILE_FORMATS)):
+        name += '.xlsx'
+    print(Fore.GREEN + f"✔ El archivo se guardará como: {name}")
+    return os.path.join(folder, name)
 
 def get_headers(ws):
     """
@@ -235,270 +293,4358 @@ def get_headers(ws):
     """
     return [cell.value for cell in ws[1]]
 
-def check_same_headers(file_paths):
+# --- SECCIÓN DE LECTURA RÁPIDA DE ENCABEZADOS ---
+# Caché de encabezados por hoja: (ruta absoluta, hoja) -> (tamaño, fecha de modificación, encabezados)
+_HEADER_CACHE = {}
+
+REL_OFFICE_DOCUMENT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+REL_WORKSHEET = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+
+def _local_name(tag):
     """
-    Verifica que todos los archivos tengan los mismos encabezados.
-    Si encuentra diferencias, muestra un error y retorna False.
-    """
-    headers = None
-    for path in file_paths:
-        wb = load_workbook(path, read_only=True)
-        ws = wb.active
-        current_headers = get_headers(ws)
-        if headers is None:
-            headers = current_headers
-        elif headers != current_headers:
-            logging.error(f"Encabezados diferentes en el archivo: {path}")
-            return False
-        wb.close()
-    return True
+    Devuelve el nombre de una etiqueta XML sin su espacio de nombres ('{ns}row' -> 'row').
+    """
+    return tag.rsplit('}', 1)[-1]
 
-# --- SECCIÓN DE REPORTES DETALLADOS ---
-def print_report(report_data):
+def _read_rels(zf, rels_path):
     """
-    Imprime un reporte detallado de la operación realizada, incluyendo estadísticas y uso de recursos.
+    Lee un archivo de relaciones (.rels) del paquete y devuelve {id: (tipo, destino)}.
     """
-    print_separator()
-    print(Fore.GREEN + Style.BRIGHT + "📊 REPORTE DETALLADO DE LA OPERACIÓN")
-    print_separator()
-    print(Fore.CYAN + f"Archivos procesados: {report_data.get('files_processed', '-')}")
-    # Mostrar líneas por archivo si está disponible
-    file_lines = report_data.get('file_lines', None)
-    if file_lines:
-        print(Fore.BLUE + "Líneas procesadas por archivo:")
-        for fname, lines in file_lines.items():
-            print(Fore.BLUE + f"  - {os.path.basename(fname)}: {lines} líneas")
-    # Mostrar líneas al inicio y al final con textos personalizados
-    print(Fore.CYAN + f"Líneas al inicio: {report_data.get('lines_in_text', '-')}")
-    print(Fore.CYAN + f"Líneas al final: {report_data.get('lines_out_text', '-')}")
-    print(Fore.CYAN + f"Tiempo total de operación: {report_data.get('duration', '-')} segundos")
-    print(Fore.CYAN + f"Tamaño del archivo de salida: {report_data.get('output_size_kb', '-')} KB")
-    print(Fore.CYAN + f"Ruta del archivo de salida: {report_data.get('output_path', '-')}")
-    print(Fore.CYAN + f"Carpeta de destino: {report_data.get('output_folder', '-')}")
-    print(Fore.CYAN + f"Memoria RAM utilizada: {report_data.get('ram_used_mb', '-')} MB")
-    print(Fore.CYAN + f"Porcentaje de CPU utilizado: {report_data.get('cpu_percent', '-')} %")
-    print_separator()
-    print(Fore.YELLOW + "✅ Operación finalizada. Revise el archivo generado y los detalles anteriores para más información.")
+    rels = {}
+    root = ET.fromstring(zf.read(rels_path))
+    for rel in root:
+        rels[rel.get('Id')] = (rel.get('Type'), rel.get('Target'))
+    return rels
 
-# --- FIN SECCIÓN DE REPORTES DETALLADOS ---
+def _resolve_target(base_path, target):
+    """
+    Resuelve la ruta de destino de una relación respecto de la parte que la declara.
+    """
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_path), target))
 
-def merge_xlsx():
+def xlsx_sheets(zf):
     """
-    Función principal para combinar (merge) varios archivos XLSX en uno solo.
-    - Solicita al usuario los archivos a combinar.
-    - Verifica que tengan la misma estructura.
-    - Copia los datos de todos los archivos en uno nuevo.
-    - Mide recursos y tiempo, y muestra un reporte detallado.
+    Lee la lista de hojas del libro contenido en el paquete XLSX.
+    Devuelve (hojas, índice de la hoja activa, ruta del libro, relaciones del libro), donde hojas es la lista
+    [(nombre, ruta del XML de la hoja o None si no es una hoja de cálculo, p. ej. un gráfico)] en el orden del libro.
     """
-    print_menu_title("Función MERGE - Consolidar archivos XLSX")
-    files = ask_file_paths(
-        "Selecciona los archivos XLSX a combinar (varios archivos con misma estructura):",
-        multiple=True,
-        allow_file_dialog=True
-    )
-    if files is None:
-        return  # Volver al menú principal
-    if not files:
-        print(Fore.RED + "⚠ No se seleccionaron archivos para combinar. Operación cancelada.")
-        return
-    if not check_same_headers(files):
-        print(Fore.RED + "❌ Los archivos seleccionados no tienen los mismos encabezados. Operación cancelada.")
-        return
-    output_path = ask_output_path("merge_result")
-    if output_path is None:
-        return  # Volver al menú principal
-    # --- INICIO MEDICIÓN DE RECURSOS Y TIEMPO ---
-    start_time = time.time()
-    process = psutil.Process(os.getpid())
-    ram_before = process.memory_info().rss
-    cpu_before = psutil.cpu_percent(interval=None)
-    # ---
-    try:
-        wb_out = Workbook()  # Crea un nuevo libro de Excel para el resultado
-        ws_out = wb_out.active
-        # Copia el encabezado del primer archivo
-        wb_first = load_workbook(files[0], read_only=True)
-        ws_first = wb_first.active
-        ws_out.append(get_headers(ws_first))
-        wb_first.close()
-        # Copia los datos de todos los archivos (ignorando la primera fila)
-        total_lines_in = 0
-        file_lines = {}
-        for file in files:
-            logging.debug(f"Procesando archivo: {file}")
-            wb = load_workbook(file, read_only=True)
-            ws = wb.active
-            file_line_count = sum(1 for _ in ws.iter_rows(min_row=2, values_only=True))
-            file_lines[file] = file_line_count
-            total_lines_in += file_line_count
-            # Volver a iterar para copiar las filas (no se puede reutilizar el iterador anterior)
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                ws_out.append(row)
-            wb.close()
-        wb_out.save(output_path)  # Guarda el archivo combinado
-        # --- FIN MEDICIÓN DE RECURSOS Y TIEMPO ---
-        end_time = time.time()
-        ram_after = process.memory_info().rss
-        cpu_after = psutil.cpu_percent(interval=None)
-        output_size_kb = os.path.getsize(output_path) // 1024
-        output_folder = os.path.dirname(output_path)
-        # Cuenta las filas finales (sin encabezado)
-        wb_check = load_workbook(output_path, read_only=True)
-        ws_check = wb_check.active
-        lines_out = ws_check.max_row - 1  # sin encabezado
-        wb_check.close()
-        # Prepara los datos para el reporte detallado
-        report_data = {
-            'files_processed': len(files),
-            'file_lines': file_lines,
-            'lines_in': total_lines_in,
-            'lines_in_text': f"{total_lines_in} Líneas Totales (antes de merge)",
-            'lines_out': lines_out,
-            'lines_out_text': f"{lines_out} Líneas combinadas (sin duplicados de encabezado)",
-            'duration': round(end_time - start_time, 2),
-            'output_size_kb': output_size_kb,
-            'output_path': output_path,
-            'output_folder': output_folder,
-            'ram_used_mb': round((ram_after - ram_before) / (1024*1024), 2),
-            'cpu_percent': cpu_after
-        }
-        print(Fore.GREEN + f"\n🎉 Archivos combinados exitosamente en: {output_path}")
-        print_report(report_data)
-    except Exception as e:
-        logging.error(f"❌ Error al combinar archivos: {e}")
+    package_rels = _read_rels(zf, '_rels/.rels')
+    workbook_path = next(_resolve_target('', target) for rel_type, target in package_rels.values()
+                         if rel_type == REL_OFFICE_DOCUMENT)
+    rels_path = posixpath.join(posixpath.dirname(workbook_path), '_rels', posixpath.basename(workbook_path) + '.rels')
+    workbook_rels = _read_rels(zf, rels_path)
+    root = ET.fromstring(zf.read(workbook_path))
+    active_tab = 0
+    sheets = []
+    for element in root.iter():
+        name = _local_name(element.tag)
+        if name == 'workbookView':
+            active_tab = int(element.get('activeTab', 0))
+        elif name == 'sheet':
+            rel_id = next(value for attr, value in element.attrib.items() if _local_name(attr) == 'id')
+            rel_type, target = workbook_rels[rel_id]
+            sheet_path = _resolve_target(workbook_path, target) if rel_type == REL_WORKSHEET else None
+            sheets.append((element.get('name'), sheet_path))
+    if not 0 <= active_tab < len(sheets):
+        active_tab = 0
+    return sheets, active_tab, workbook_path, workbook_rels
 
-def wipe_xlsx():
+def xlsx_sheet(zf, sheet=None):
     """
-    Función principal para eliminar duplicados de un archivo XLSX.
-    - Solicita al usuario el archivo a purgar.
-    - Pide la columna que contiene los valores únicos.
-    - Elimina filas duplicadas según esa columna.
-    - Mide recursos y tiempo, y muestra un reporte detallado.
+    Localiza en el paquete XLSX la hoja indicada por nombre o, si sheet es None, la hoja activa
+    (la misma que devuelve wb.active en openpyxl).
+    Devuelve (ruta del XML de la hoja, ruta del libro, relaciones del libro).
+    Lanza KeyError si el libro no tiene una hoja de cálculo con ese nombre.
     """
-    print_menu_title("Función WIPE - Eliminar duplicados en archivo XLSX")
-    files = ask_file_paths(
-        "Selecciona el archivo XLSX a purgar (archivo unico):",
-        multiple=False,
-        allow_file_dialog=True
-    )
-    if files is None:
-        return  # Volver al menú principal
-    if not files:
-        print(Fore.RED + "⚠ No se seleccionó archivo para purgar. Operación cancelada.")
-        return
-    file = files[0]
-    # --- INICIO MEDICIÓN DE RECURSOS Y TIEMPO ---
-    start_time = time.time()
-    process = psutil.Process(os.getpid())
-    ram_before = process.memory_info().rss
-    cpu_before = psutil.cpu_percent(interval=None)
-    # ---
-    try:
-        wb = load_workbook(file)
-        ws = wb.active
-        headers = get_headers(ws)
-        # Muestra las columnas disponibles y sus encabezados
-        print(Fore.BLUE + "\nColumnas disponibles en el archivo:")
-        for idx, header in enumerate(headers):
-            col_letter = get_column_letter(idx + 1)
-            print(f"  Columna {col_letter} - {header}")
-        # Solicita al usuario la columna que contiene los valores únicos
-        while True:
-            col_input = input(Fore.WHITE + "¿Qué columna contiene los valores únicos? (Letra de columna, 'm' menú, 'q' salir): ").strip().upper()
-            if col_input.lower() == 'm':
-                print(Fore.YELLOW + "↩ Volviendo al menú principal...")
-                return  # Volver al menú principal
-            if col_input.lower() == 'q':
-                print(Fore.YELLOW + "⏹ Cerrando la aplicación. ¡Hasta pronto!")
-                sys.exit(0)
-            if not col_input:
-                print(Fore.RED + "⚠ Debe ingresar una letra de columna (ejemplo: A, B, C...).")
+    sheets, active_tab, workbook_path, workbook_rels = xlsx_sheets(zf)
+    if sheet is None:
+        sheet_path = sheets[active_tab][1]
+    else:
+        sheet_path = next((path for name, path in sheets if name == sheet), None)
+    if sheet_path is None:
+        raise KeyError(f"El libro no tiene la hoja de cálculo {sheet!r}")
+    return sheet_path, workbook_path, workbook_rels
+
+def list_sheets(path):
+    """
+    Devuelve los nombres de las hojas de cálculo de un archivo XLSX, en el orden del libro,
+    leyendo solo el XML del libro (sin openpyxl).
+    Lanza ValueError con los formatos sin hojas (CSV, Parquet, Arrow).
+    """
+    if file_format(path) != 'xlsx':
+        raise ValueError(f"{os.path.basename(path)}: solo los archivos XLSX tienen hojas")
+    with zipfile.ZipFile(path) as zf:
+        sheets = xlsx_sheets(zf)[0]
+    return [name for name, sheet_path in sheets if sheet_path is not None]
+
+def _string_item_text(item):
+    """
+    Devuelve el texto de un elemento de cadena (<si> o <is>): texto simple o fragmentos de texto enriquecido,
+    ignorando las guías fonéticas (<rPh>).
+    """
+    parts = []
+    for child in item:
+        name = _local_name(child.tag)
+        if name == 't':
+            parts.append(child.text or '')
+        elif name == 'r':
+            parts.extend(t.text or '' for t in child if _local_name(t.tag) == 't')
+    return ''.join(parts)
+
+def _read_shared_strings(zf, workbook_path, workbook_rels, needed):
+    """
+    Lee de la tabla de cadenas compartidas solo hasta el mayor índice necesario.
+    Devuelve {índice: texto} para los índices pedidos.
+    """
+    target = next((target for rel_type, target in workbook_rels.values() if rel_type.endswith('/sharedStrings')), None)
+    if target is None or not needed:
+        return {}
+    last = max(needed)
+    found = {}
+    with zf.open(_resolve_target(workbook_path, target)) as fh:
+        index = 0
+        for _, element in ET.iterparse(fh):
+            if _local_name(element.tag) != 'si':
                 continue
-            try:
-                col_idx = ord(col_input) - ord('A')
-                if 0 <= col_idx < len(headers):
-                    print(Fore.GREEN + f"✔ Columna seleccionada: {col_input} - {headers[col_idx]}")
+            if index in needed:
+                found[index] = _string_item_text(element)
+            element.clear()
+            if index >= last:
+                break
+            index += 1
+    return found
+
+def _cell_column(ref, default):
+    """
+    Convierte la referencia de una celda ('C1') en su índice de columna base 0.
+    """
+    if not ref:
+        return default
+    col = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        col = col * 26 + (ord(char.upper()) - 64)
+    return col - 1
+
+def _cast_number(text):
+    """
+    Convierte el texto de una celda numérica igual que openpyxl: entero si no tiene decimales ni exponente.
+    """
+    if '.' in text or 'E' in text or 'e' in text:
+        return float(text)
+    return int(text)
+
+def read_header_row(path, sheet=None):
+    """
+    Lector ligero de encabezados: abre el XLSX como zip y analiza solo el primer <row> del XML
+    de la hoja indicada (por defecto, la activa), sin cargar el libro con openpyxl.
+    Devuelve la lista de valores de la fila 1 sin las celdas vacías del final.
+    Si el formato no es el esperado (o hay encabezados con estilo numérico, como fechas),
+    recurre a openpyxl para obtener exactamente el mismo resultado.
+    """
+    try:
+        with zipfile.ZipFile(path) as zf:
+            sheet_path, workbook_path, workbook_rels = xlsx_sheet(zf, sheet)
+            raw_cells = []
+            with zf.open(sheet_path) as fh:
+                for _, element in ET.iterparse(fh):
+                    if _local_name(element.tag) != 'row':
+                        continue
+                    if element.get('r', '1') == '1':
+                        for position, cell in enumerate(c for c in element if _local_name(c.tag) == 'c'):
+                            values = {_local_name(child.tag): child for child in cell}
+                            text = values['v'].text if 'v' in values else None
+                            if 'is' in values:
+                                text = _string_item_text(values['is'])
+                            raw_cells.append((_cell_column(cell.get('r'), position), cell.get('t', 'n'), cell.get('s', '0'), text))
                     break
-                else:
-                    print(Fore.RED + "❌ Columna fuera de rango. Intente con una letra válida.")
-            except Exception:
-                print(Fore.RED + "❌ Entrada inválida. Intente nuevamente.")
-        unique_col = col_idx
-        seen = set()  # Conjunto para almacenar los valores únicos encontrados
-        rows_to_keep = []
-        total_lines_in = ws.max_row - 1  # sin encabezado
-        for i, row in enumerate(ws.iter_rows(values_only=True)):
-            if i == 0:
-                rows_to_keep.append(row)  # Siempre guarda el encabezado
-                continue
-            val = row[unique_col]
-            if val not in seen:
-                seen.add(val)
-                rows_to_keep.append(row)
-        output_path = ask_output_path("wipe_result")
-        if output_path is None:
-            return  # Volver al menú principal
-        wb_out = Workbook()
-        ws_out = wb_out.active
-        for row in rows_to_keep:
-            ws_out.append(row)
-        wb_out.save(output_path)
-        # --- FIN MEDICIÓN DE RECURSOS Y TIEMPO ---
-        end_time = time.time()
-        ram_after = process.memory_info().rss
-        cpu_after = psutil.cpu_percent(interval=None)
-        output_size_kb = os.path.getsize(output_path) // 1024
-        output_folder = os.path.dirname(output_path)
-        lines_out = len(rows_to_keep) - 1  # sin encabezado
-        lines_removed = total_lines_in - lines_out
-        # Prepara los datos para el reporte detallado
-        report_data = {
-            'files_processed': 1,
-            'file_lines': {file: total_lines_in},
-            'lines_in': total_lines_in,
-            'lines_in_text': f"{total_lines_in} Líneas Totales (antes de purgar)",
-            'lines_out': lines_out,
-            'lines_out_text': f"{lines_out} Líneas después del Wipe - {lines_removed} duplicados eliminados",
-            'duration': round(end_time - start_time, 2),
-            'output_size_kb': output_size_kb,
-            'output_path': output_path,
-            'output_folder': output_folder,
-            'ram_used_mb': round((ram_after - ram_before) / (1024*1024), 2),
-            'cpu_percent': cpu_after
-        }
-        print(Fore.GREEN + f"\n🧹 Archivo purgado exitosamente en: {output_path}")
-        print_report(report_data)
+            needed = {int(text) for _, cell_type, _, text in raw_cells if cell_type == 's' and text is not None}
+            shared = _read_shared_strings(zf, workbook_path, workbook_rels, needed)
+        headers = []
+        for col, cell_type, style, text in raw_cells:
+            if text is None:
+                value = None
+            elif cell_type == 's':
+                value = shared[int(text)]
+            elif cell_type == 'b':
+                value = text == '1'
+            elif cell_type in ('str', 'inlineStr', 'e'):
+                value = text
+            elif style != '0':
+                raise ValueError("encabezado numérico con estilo")
+            else:
+                value = _cast_number(text)
+            headers.extend([None] * (col - len(headers)))
+            headers.append(value)
     except Exception as e:
-        logging.error(f"❌ Error al purgar archivo: {e}")
+        logging.debug(f"Lector ligero de encabezados no aplicable a {path} ({e}); se usa openpyxl")
+        headers = list(read_headers(path, sheet))
+    while headers and headers[-1] is None:
+        headers.pop()
+    return headers
 
-def main_menu():
+def header_fingerprint(path, sheet=None):
     """
-    Muestra el menú principal del programa y gestiona la selección del usuario.
-    Permite elegir entre combinar archivos, eliminar duplicados o salir.
+    Devuelve los encabezados de una hoja (por defecto, la activa) como tupla (su "huella"), usando la caché
+    por ruta, hoja, tamaño y fecha de modificación: un archivo sin cambios no se vuelve a abrir.
+    En los archivos CSV, Parquet y Arrow se usan su primera fila o los nombres de sus columnas.
+    """
+    key = (os.path.abspath(path), sheet)
+    stat = os.stat(path)
+    cached = _HEADER_CACHE.get(key)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    if file_format(path) == 'xlsx':
+        headers = tuple(read_header_row(path, sheet))
+    else:
+        headers = tuple(read_table_headers(path))
+    _HEADER_CACHE[key] = (stat.st_size, stat.st_mtime_ns, headers)
+    return headers
+
+def find_header_mismatches(file_paths, workers=1, sheet=None):
+    """
+    Compara la huella de encabezados de todos los archivos con la del primero (en la hoja indicada o la activa).
+    Devuelve la lista completa de archivos cuyos encabezados difieren (vacía si todos coinciden).
+    Con workers > 1, los archivos que no están en caché se leen en paralelo con hilos
+    (es trabajo de E/S, útil en carpetas de red).
+    """
+    if workers > 1 and len(file_paths) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(workers, len(file_paths))) as pool:
+            fingerprints = list(pool.map(header_fingerprint, file_paths, [sheet] * len(file_paths)))
+    else:
+        fingerprints = [header_fingerprint(path, sheet) for path in file_paths]
+    return [path for path, fingerprint in zip(file_paths, fingerprints) if fingerprint != fingerprints[0]]
+
+# --- FIN SECCIÓN DE LECTURA RÁPIDA DE ENCABEZADOS ---
+
+def check_same_headers(file_paths, workers=1):
+    """
+    Verifica que todos los archivos tengan los mismos encabezados.
+    Si encuentra diferencias, muestra un error por cada archivo distinto (no solo el primero) y retorna False.
+    """
+    mismatches = find_header_mismatches(file_paths, workers)
+    for path in mismatches:
+        logging.error(f"Encabezados diferentes en el archivo: {path}")
+    return not mismatches
+
+def read_headers(path, sheet=None):
+    """
+    Lee únicamente los encabezados (primera fila) de la hoja indicada (por defecto, la activa) de un archivo XLSX.
+    Abre el libro en modo solo lectura y lo cierra siempre, incluso si ocurre un error.
+    """
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        return get_headers(wb[sheet] if sheet is not None else wb.active)
+    finally:
+        wb.close()
+
+def iter_openpyxl_rows(path, min_row=2, sheet=None):
+    """
+    Generador que recorre las filas de la hoja indicada (por defecto, la activa) de un archivo XLSX desde min_row.
+    Usa el modo solo lectura de openpyxl, por lo que las filas se leen bajo demanda sin cargar el libro completo.
+    """
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.active
+        for row in ws.iter_rows(min_row=min_row, values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+def iter_data_rows(path, engine='openpyxl', sheet=None):
+    """
+    Interfaz común de lectura: devuelve un iterador sobre las filas de datos (sin encabezado)
+    de la hoja indicada (por defecto, la activa), con el motor indicado ('openpyxl' o 'fast').
+    Ambos motores producen las mismas filas.
+    Los archivos CSV, Parquet y Arrow se leen con su adaptador (ver file_format), sin hojas ni motor.
+    """
+    fmt = file_format(path)
+    if fmt == 'csv':
+        return iter_csv_rows(path)
+    if fmt in ('parquet', 'arrow'):
+        return iter_arrow_rows(path)
+    if engine == 'fast':
+        return iter_rows_fast(path, min_row=2, sheet=sheet)
+    return iter_openpyxl_rows(path, min_row=2, sheet=sheet)
+
+# --- SECCIÓN DE LECTOR RÁPIDO DE XML ---
+class SharedStrings:
+    """
+    Tabla de cadenas compartidas compacta: todas las cadenas unidas en un único str
+    y un array de desplazamientos, en lugar de un objeto str por cadena.
+    """
+
+    def __init__(self, strings):
+        buffer = io.StringIO()
+        offsets = array.array('Q', [0])
+        position = 0
+        for text in strings:
+            buffer.write(text)
+            position += len(text)
+            offsets.append(position)
+        self._data = buffer.getvalue()
+        self._offsets = offsets
+
+    def __getitem__(self, index):
+        return self._data[self._offsets[index]:self._offsets[index + 1]]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+def _expat_batches(fh, parser, pending):
+    """
+    Alimenta un parser expat con bloques de FAST_READER_CHUNK_BYTES bytes y, tras cada bloque,
+    devuelve (como lista) los elementos que los manejadores dejaron en pending.
     """
     while True:
-        print_menu_title("MERGE-WIPER - Menú Principal")
-        print(Fore.MAGENTA + "1. Merge (Combinar/Mergear archivos XLSX) - Une varios archivos Excel en uno solo.")
-        print(Fore.MAGENTA + "2. Wipe (Eliminar/Wipear duplicados en archivo XLSX) - Elimina filas duplicadas según una columna.")
-        print(Fore.MAGENTA + "3. Salir del programa")
-        print(Fore.YELLOW + "Puede presionar 'q' en cualquier momento para cerrar la aplicación.")
-        choice = input(Fore.WHITE + "Seleccione una opción (1, 2, 3 o 'q'): ").strip()
-        if choice == '1':
-            merge_xlsx()
-        elif choice == '2':
-            wipe_xlsx()
-        elif choice == '3':
-            print(Fore.YELLOW + "👋 ¡Hasta luego! Gracias por usar Merge-Wiper.")
+        chunk = fh.read(FAST_READER_CHUNK_BYTES)
+        parser.Parse(chunk, not chunk)
+        if pending:
+            batch = pending[:]
+            del pending[:]
+            yield batch
+        if not chunk:
+            return
+
+def _iter_shared_strings(fh):
+    """
+    Generador de las cadenas de la tabla de cadenas compartidas (sharedStrings.xml), en streaming.
+    Replica a openpyxl: une el texto simple y los fragmentos enriquecidos, ignora las guías fonéticas
+    y elimina las secuencias de escape 'x005F_'.
+    """
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    pending = []
+    parts = []
+    state = {'collect': False, 'phonetic': False}
+
+    def start(name, attrs):
+        if ':' in name:
+            name = name.rpartition(':')[2]
+        if name == 't':
+            state['collect'] = not state['phonetic']
+        elif name == 'si':
+            del parts[:]
+        elif name == 'rPh':
+            state['phonetic'] = True
+
+    def end(name):
+        if ':' in name:
+            name = name.rpartition(':')[2]
+        if name == 't':
+            state['collect'] = False
+        elif name == 'si':
+            pending.append(''.join(parts).replace('x005F_', ''))
+        elif name == 'rPh':
+            state['phonetic'] = False
+
+    def data(text):
+        if state['collect']:
+            parts.append(text)
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = data
+    for batch in _expat_batches(fh, parser, pending):
+        yield from batch
+
+def _read_workbook_context(zf, workbook_path, workbook_rels):
+    """
+    Lee lo que el lector rápido necesita del libro para convertir valores igual que openpyxl:
+    cadenas compartidas, estilos con formato de fecha/duración y la época de fechas (1900 o 1904).
+    """
+    from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+    from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+    targets = {rel_type.rsplit('/', 1)[-1]: _resolve_target(workbook_path, target)
+               for rel_type, target in workbook_rels.values()}
+    context = {'shared': [], 'date_styles': set(), 'timedelta_styles': set(), 'epoch': CALENDAR_WINDOWS_1900}
+    if 'sharedStrings' in targets:
+        with zf.open(targets['sharedStrings']) as fh:
+            context['shared'] = SharedStrings(_iter_shared_strings(fh))
+    if 'styles' in targets:
+        root = ET.fromstring(zf.read(targets['styles']))
+        custom = {}
+        cell_formats = []
+        for element in root:
+            name = _local_name(element.tag)
+            if name == 'numFmts':
+                custom = {int(fmt.get('numFmtId')): fmt.get('formatCode') for fmt in element}
+            elif name == 'cellXfs':
+                cell_formats = [int(xf.get('numFmtId', 0)) for xf in element]
+        for idx, fmt_id in enumerate(cell_formats):
+            fmt = custom[fmt_id] if fmt_id in custom else builtin_format_code(fmt_id)
+            if is_date_format(fmt):
+                context['date_styles'].add(str(idx))
+            if is_timedelta_format(fmt):
+                context['timedelta_styles'].add(str(idx))
+    for element in ET.fromstring(zf.read(workbook_path)).iter():
+        if _local_name(element.tag) == 'workbookPr':
+            if element.get('date1904', 'false').lower() in ('1', 'true'):
+                context['epoch'] = CALENDAR_MAC_1904
             break
-        elif choice.lower() == 'q':
-            print(Fore.YELLOW + "⏹ Cerrando la aplicación. ¡Hasta pronto!")
-            sys.exit(0)
+    return context
+
+def _iter_raw_rows(fh, state):
+    """
+    Analiza el XML de una hoja con expat, por bloques, y devuelve lotes de filas sin convertir:
+    (número de fila, [celdas]) donde cada celda es [columna, tipo, estilo, texto de <v>, texto de la fórmula,
+    atributos de la fórmula, texto en línea]. La dimensión declarada de la hoja se guarda en state.
+    """
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    pending = []
+    ctx = {'row': 0, 'col': 0, 'cells': None, 'cell': None, 'parts': None, 'inline': False, 'phonetic': False}
+    columns = {}  # Caché letras de columna -> número de columna
+
+
+    def start(name, attrs):
+        if ':' in name:
+            name = name.rpartition(':')[2]
+        if name == 'c':
+            ref = attrs.get('r')
+            if ref:
+                letters = ref.rstrip('0123456789')
+                col = columns.get(letters)
+                if col is None:
+                    col = columns[letters] = _cell_column(letters, 0) + 1
+            else:
+                col = ctx['col'] + 1
+            ctx['col'] = col
+            ctx['cell'] = [col, attrs.get('t', 'n'), attrs.get('s') or '0', None, None, None, None]
+        elif name == 'v' or name == 'f':
+            ctx['parts'] = []
+            if name == 'f':
+                ctx['cell'][5] = dict(attrs)
+        elif name == 'row':
+            ref = attrs.get('r')
+            ctx['row'] = int(float(ref)) if ref else ctx['row'] + 1
+            ctx['col'] = 0
+            ctx['cells'] = []
+        elif name == 'is':
+            ctx['inline'] = True
+            ctx['cell'][6] = ''
+        elif name == 't' and ctx['inline'] and not ctx['phonetic']:
+            ctx['parts'] = []
+        elif name == 'rPh':
+            ctx['phonetic'] = True
+        elif name == 'dimension' and ctx['cells'] is None:
+            # Como openpyxl, solo cuenta la dimensión declarada antes de los datos
+            state['dimension'] = attrs.get('ref')
+
+    def end(name):
+        if ':' in name:
+            name = name.rpartition(':')[2]
+        if name == 'v':
+            ctx['cell'][3] = ''.join(ctx['parts'])
+            ctx['parts'] = None
+        elif name == 'c':
+            ctx['cells'].append(ctx['cell'])
+        elif name == 'row':
+            pending.append((ctx['row'], ctx['cells']))
+        elif name == 'f':
+            ctx['cell'][4] = ''.join(ctx['parts'])
+            ctx['parts'] = None
+        elif name == 't' and ctx['parts'] is not None:
+            ctx['cell'][6] += ''.join(ctx['parts'])
+            ctx['parts'] = None
+        elif name == 'is':
+            ctx['inline'] = False
+        elif name == 'rPh':
+            ctx['phonetic'] = False
+
+    def data(text):
+        parts = ctx['parts']
+        if parts is not None:
+            parts.append(text)
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = data
+    yield from _expat_batches(fh, parser, pending)
+
+def _formula_value(cell, row_idx, shared_formulae):
+    """
+    Devuelve el valor de una celda con fórmula tal como lo entrega openpyxl (data_only=False):
+    el texto '=...', traduciendo las fórmulas compartidas y creando los objetos de fórmulas matriciales.
+    """
+    from openpyxl.utils import get_column_letter
+    formula_attrs = cell[5]
+    value = "=" + (cell[4] or "")
+    formula_type = formula_attrs.get('t')
+    if formula_type == 'array':
+        from openpyxl.worksheet.formula import ArrayFormula
+        return ArrayFormula(ref=formula_attrs.get('ref'), text=value)
+    if formula_type == 'dataTable':
+        from openpyxl.worksheet.formula import DataTableFormula
+        return DataTableFormula(**formula_attrs)
+    if formula_type == 'shared':
+        from openpyxl.formula.translate import Translator
+        coordinate = f"{get_column_letter(cell[0])}{row_idx}"
+        idx = formula_attrs.get('si')
+        if idx in shared_formulae:
+            return shared_formulae[idx].translate_formula(coordinate)
+        if value != "=":
+            shared_formulae[idx] = Translator(value, coordinate)
+    return value
+
+def _convert_batch(batch, context, max_col, shared_formulae):
+    """
+    Convierte un lote de filas sin procesar en tuplas de valores, con las mismas reglas que openpyxl:
+    números enteros/decimales, fechas según el estilo, cadenas compartidas y en línea, booleanos y fórmulas.
+    Devuelve una lista de (número de fila, valores).
+    """
+    from openpyxl.utils.datetime import from_excel, from_ISO8601
+    shared = context['shared']
+    date_styles = context['date_styles']
+    timedelta_styles = context['timedelta_styles']
+    epoch = context['epoch']
+    converted = []
+    for row_idx, cells in batch:
+        if not cells and not max_col:
+            converted.append((row_idx, ()))
+            continue
+        width = max_col or cells[-1][0]
+        values = [None] * width
+        for cell in cells:
+            col, cell_type, style, text = cell[0], cell[1], cell[2], cell[3]
+            if col > width:
+                continue
+            if cell[5] is not None:
+                value = _formula_value(cell, row_idx, shared_formulae)
+            elif cell_type == 'inlineStr':
+                value = cell[6]
+            elif not text:
+                value = None
+            elif cell_type == 'n':
+                value = _cast_number(text)
+                if style in date_styles:
+                    try:
+                        value = from_excel(value, epoch, timedelta=style in timedelta_styles)
+                    except (OverflowError, ValueError):
+                        value = "#VALUE!"
+            elif cell_type == 's':
+                value = shared[int(text)]
+            elif cell_type == 'b':
+                value = bool(int(text))
+            elif cell_type == 'd':
+                value = from_ISO8601(text)
+            else:
+                value = text
+            values[col - 1] = value
+        converted.append((row_idx, tuple(values)))
+    return converted
+
+def iter_rows_fast(path, min_row=2, sheet=None):
+    """
+    Motor de lectura rápido: recorre las filas de la hoja indicada (por defecto, la activa) desde min_row leyendo directamente
+    el XML de la hoja desde el zip con expat, sin crear objetos de celda de openpyxl.
+    - Las cadenas compartidas se resuelven con una tabla compacta (SharedStrings).
+    - Las celdas se convierten por lotes (un lote por bloque de XML analizado).
+    - Las filas tienen la misma forma que las de openpyxl en modo solo lectura: se rellenan hasta la
+      dimensión declarada y se generan filas vacías para las que faltan.
+    """
+    from openpyxl.utils.cell import range_boundaries
+    with zipfile.ZipFile(path) as zf:
+        sheet_path, workbook_path, workbook_rels = xlsx_sheet(zf, sheet)
+        context = _read_workbook_context(zf, workbook_path, workbook_rels)
+        state = {}
+        shared_formulae = {}
+        with zf.open(sheet_path) as fh:
+            max_col = max_row = None
+            empty_row = []
+            counter = min_row
+            idx = 1
+            for batch in _iter_raw_rows(fh, state):
+                dimension = state.pop('dimension', None)
+                if dimension:
+                    _, _, max_col, max_row = range_boundaries(dimension)
+                    empty_row = (None,) * max_col if max_col is not None else []
+                for idx, values in _convert_batch(batch, context, max_col, shared_formulae):
+                    if max_row is not None and idx > max_row:
+                        break
+                    # Filas que faltan en el XML
+                    for _ in range(counter, idx):
+                        counter += 1
+                        yield empty_row
+                    if counter <= idx:
+                        counter += 1
+                        yield values
+                else:
+                    continue
+                break
+        if max_row is not None and max_row < idx:
+            for _ in range(counter, max_row + 1):
+                yield empty_row
+# --- FIN SECCIÓN DE LECTOR RÁPIDO DE XML ---
+
+# --- SECCIÓN DE ESCRITOR XLSX EN STREAMING ---
+OUTPUT_COMPRESSION = 6  # Nivel de compresión por defecto del archivo de salida (0 = sin comprimir, 9 = máximo)
+WRITER_FLUSH_ROWS = 1000  # Filas que el escritor acumula antes de comprimirlas y volcarlas al zip
+MAX_CELL_CHARS = 32767  # Longitud máxima de texto de una celda en Excel (openpyxl trunca igual)
+
+SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_FOOTER = '</sheetData></worksheet>'
+
+# Partes fijas del paquete XLSX; el libro, sus relaciones y los tipos de contenido dependen de las hojas (ver _package_parts)
+XLSX_STATIC_PARTS = {
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    # Estilos 1-4: fecha y hora, fecha, hora y duración (los mismos formatos que usa openpyxl)
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="3"><numFmt numFmtId="164" formatCode="yyyy-mm-dd h:mm:ss"/>'
+        '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/><numFmt numFmtId="166" formatCode="[hh]:mm:ss"/></numFmts>'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="5"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="166" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+MAX_SHEET_TITLE = 31  # Longitud máxima del nombre de una hoja en Excel
+
+def _xml_text(text):
+    """
+    Escapa un texto para incluirlo como contenido de un elemento XML.
+    """
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def _xml_attr(text):
+    """
+    Escapa un texto para incluirlo como valor de un atributo XML (entre comillas dobles).
+    """
+    return _xml_text(text).replace('"', '&quot;')
+
+def _package_parts(titles):
+    """
+    Genera las partes del paquete XLSX que dependen de las hojas: tipos de contenido, libro y relaciones del libro.
+    Devuelve {nombre de la parte: contenido}.
+    """
+    sheet_overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for number in range(1, len(titles) + 1))
+    sheet_entries = ''.join(
+        f'<sheet name="{_xml_attr(title)}" sheetId="{number}" r:id="rId{number}"/>'
+        for number, title in enumerate(titles, 1))
+    sheet_rels = ''.join(
+        f'<Relationship Id="rId{number}" Type="{REL_WORKSHEET}" Target="worksheets/sheet{number}.xml"/>'
+        for number in range(1, len(titles) + 1))
+    return {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{sheet_overrides}'
+            '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '</Types>'
+        ),
+        'xl/workbook.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<bookViews><workbookView/></bookViews><sheets>{sheet_entries}</sheets>'
+            '</workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{sheet_rels}'
+            f'<Relationship Id="rId{len(titles) + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ),
+    }
+
+def _number_text(value):
+    """
+    Formatea un número como lo hace openpyxl: 16 cifras significativas y vacío para NaN/infinito.
+    """
+    if math.isnan(value) or math.isinf(value):
+        return ''
+    return "%.16g" % value
+
+class XlsxStreamWriter:
+    """
+    Escritor XLSX de bajo nivel con la misma interfaz que una hoja write_only de openpyxl (append).
+    Cada fila se convierte directamente en XML y se comprime en el zip de salida por bloques de
+    WRITER_FLUSH_ROWS filas, de modo que la memoria no crece con el tamaño de la salida y no hay
+    una pausa larga al guardar: close() solo añade las partes fijas del paquete.
+    - Admite varias hojas: add_sheet() termina la hoja en curso y abre otra; si no se llama,
+      las filas van a una única hoja llamada "Sheet" (como en openpyxl).
+    - Los textos se escriben como cadenas en línea (sin tabla de cadenas compartidas que mantener en memoria).
+    - Los tipos se escriben como en openpyxl: fórmulas ('=...'), códigos de error, booleanos, números y
+      fechas/horas/duraciones con su formato, por lo que openpyxl y Excel leen los mismos valores.
+    - El archivo se escribe en un temporal junto al destino y se renombra al cerrarlo; si se aborta, se elimina.
+    """
+
+    def __init__(self, path, compression=OUTPUT_COMPRESSION):
+        self.path = path
+        fd, self.temp_path = tempfile.mkstemp(suffix='.xlsx.part', dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        method = zipfile.ZIP_DEFLATED if compression else zipfile.ZIP_STORED
+        self._zip = zipfile.ZipFile(self.temp_path, 'w', compression=method,
+                                    compresslevel=compression if compression else None)
+        self._sheet = None
+        self._pending = []
+        self._letters = []
+        self.titles = []
+        self.rows = 0
+
+    def add_sheet(self, title=None):
+        """
+        Termina la hoja en curso (si la hay) y empieza una nueva al final del libro.
+        Si el nombre ya existe (sin distinguir mayúsculas) o supera los 31 caracteres, se ajusta como en openpyxl.
+        """
+        self._finish_sheet()
+        title = (title or 'Sheet')[:MAX_SHEET_TITLE]
+        used = {existing.casefold() for existing in self.titles}
+        base, number = title, 0
+        while title.casefold() in used:
+            number += 1
+            title = f"{base[:MAX_SHEET_TITLE - len(str(number))]}{number}"
+        self.titles.append(title)
+        self._sheet = self._zip.open(f'xl/worksheets/sheet{len(self.titles)}.xml', 'w', force_zip64=True)
+        self._sheet.write(SHEET_HEADER.encode('utf-8'))
+        self.rows = 0
+        return title
+
+    def _finish_sheet(self):
+        """
+        Vuelca las filas pendientes y cierra el XML de la hoja en curso.
+        """
+        if self._sheet is None:
+            return
+        self._flush()
+        self._sheet.write(SHEET_FOOTER.encode('utf-8'))
+        self._sheet.close()
+        self._sheet = None
+
+    def _column_letters(self, width):
+        """
+        Amplía la lista de letras de columna en caché hasta width columnas.
+        """
+        from openpyxl.utils import get_column_letter
+        for col in range(len(self._letters) + 1, width + 1):
+            self._letters.append(get_column_letter(col))
+
+    def _cell_xml(self, ref, value):
+        """
+        Devuelve el XML de una celda (o '' si la celda está vacía).
+        """
+        value_type = type(value)
+        if value_type is str:
+            if not value:
+                return f'<c r="{ref}" t="inlineStr"/>'
+            return self._string_xml(ref, value)
+        if value_type is bool:
+            return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+        if value_type is int or value_type is float:
+            return f'<c r="{ref}" t="n"><v>{_number_text(value)}</v></c>'
+        if value is None:
+            return ''
+        return self._other_xml(ref, value)
+
+    def _string_xml(self, ref, value):
+        """
+        XML de una celda de texto: fórmula si empieza por '=', código de error o cadena en línea.
+        """
+        from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+        value = value[:MAX_CELL_CHARS]
+        if ILLEGAL_CHARACTERS_RE.search(value):
+            raise ValueError(f"La celda {ref} contiene caracteres no permitidos en Excel: {value!r}")
+        if len(value) > 1 and value.startswith('='):
+            return f'<c r="{ref}"><f>{_xml_text(value[1:])}</f><v></v></c>'
+        if value in ERROR_CODES:
+            return f'<c r="{ref}" t="e"><v>{_xml_text(value)}</v></c>'
+        space = ' xml:space="preserve"' if value != value.strip() else ''
+        return f'<c r="{ref}" t="inlineStr"><is><t{space}>{_xml_text(value)}</t></is></c>'
+
+    def _other_xml(self, ref, value):
+        """
+        XML de los tipos menos frecuentes: fechas, horas, duraciones, decimales y fórmulas matriciales.
+        """
+        from openpyxl.utils.datetime import to_excel
+        from openpyxl.worksheet.formula import ArrayFormula, DataTableFormula
+        if isinstance(value, bool):
+            return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)):
+            if getattr(value, 'tzinfo', None) is not None:
+                raise ValueError(f"La celda {ref} tiene una fecha con zona horaria, que Excel no admite: {value!r}")
+            if isinstance(value, datetime.datetime):
+                style = 1
+            elif isinstance(value, datetime.date):
+                style = 2
+            elif isinstance(value, datetime.time):
+                style = 3
+            else:
+                style = 4
+            return f'<c r="{ref}" s="{style}" t="n"><v>{_number_text(to_excel(value))}</v></c>'
+        if isinstance(value, (int, float, decimal.Decimal)):
+            return f'<c r="{ref}" t="n"><v>{_number_text(value)}</v></c>'
+        if isinstance(value, str):
+            return self._string_xml(ref, str(value)) if value else f'<c r="{ref}" t="inlineStr"/>'
+        if isinstance(value, ArrayFormula):
+            text = _xml_text(value.text[1:] if value.text.startswith('=') else value.text)
+            return f'<c r="{ref}"><f t="array" ref="{_xml_attr(value.ref)}">{text}</f><v></v></c>'
+        if isinstance(value, DataTableFormula):
+            attrs = ''.join(f' {name}="{_xml_attr(str(attr))}"' for name, attr in dict(value).items())
+            return f'<c r="{ref}"><f{attrs}/><v></v></c>'
+        raise ValueError(f"No se puede convertir {value!r} (celda {ref}) a un valor de Excel")
+
+    def append(self, row):
+        """
+        Añade una fila al final de la hoja en curso.
+        """
+        if self._sheet is None:
+            self.add_sheet()
+        self.rows += 1
+        number = self.rows
+        if len(row) > len(self._letters):
+            self._column_letters(len(row))
+        letters = self._letters
+        cell_xml = self._cell_xml
+        cells = ''.join([cell_xml(f'{letters[idx]}{number}', value)
+                         for idx, value in enumerate(row) if value is not None])
+        self._pending.append(f'<row r="{number}">{cells}</row>')
+        if len(self._pending) >= WRITER_FLUSH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        """
+        Comprime y vuelca al zip las filas acumuladas.
+        """
+        self._sheet.write(''.join(self._pending).encode('utf-8'))
+        self._pending = []
+
+    def close(self):
+        """
+        Termina la hoja, escribe las partes fijas del paquete y mueve el archivo a su ruta definitiva.
+        Llamarlo de nuevo (por ejemplo, al salir del bloque with) no hace nada.
+        """
+        if self._zip is None:
+            return
+        if not self.titles:
+            self.add_sheet()  # Un libro necesita al menos una hoja
+        self._finish_sheet()
+        parts = {**_package_parts(self.titles), **XLSX_STATIC_PARTS}
+        for name, content in parts.items():
+            self._zip.writestr(name, content)
+        self._zip.close()
+        self._zip = None
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        """
+        Descarta la salida a medio escribir (por ejemplo, si el proceso falla).
+        """
+        try:
+            if self._zip is not None:
+                if self._sheet is not None:
+                    self._sheet.close()
+                self._zip.close()
+                self._zip = None
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
         else:
-            print(Fore.RED + "❌ Opción inválida. Por favor, seleccione una opción válida.")
+            self.abort()
+# --- FIN SECCIÓN DE ESCRITOR XLSX EN STREAMING ---
+
+# --- SECCIÓN DE ADAPTADORES DE FORMATO (CSV, PARQUET, ARROW) ---
+# Formato de cada extensión de archivo; cualquier otra extensión se trata como XLSX
+FILE_FORMATS = {'.xlsx': 'xlsx', '.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+CSV_DELIMITERS = ',;\t|'  # Separadores que se detectan automáticamente en los CSV de entrada
+CSV_SNIFF_CHARS = 64 * 1024  # Caracteres del inicio del CSV que se analizan para detectar el separador y la codificación
+CSV_FALLBACK_ENCODINGS = ('cp1252', 'latin-1')  # Codificaciones que se prueban si el CSV no es UTF-8 (p. ej. Excel en Windows)
+ARROW_BATCH_ROWS = 64 * 1024  # Filas por lote (record batch) al leer y escribir Parquet/Arrow
+
+def file_format(path):
+    """
+    Devuelve el formato de un archivo según su extensión ('xlsx', 'csv', 'parquet' o 'arrow').
+    Las extensiones desconocidas se tratan como XLSX, como hasta ahora.
+    """
+    return FILE_FORMATS.get(os.path.splitext(str(path))[1].lower(), 'xlsx')
+
+def _import_pyarrow():
+    """
+    Importa pyarrow (dependencia opcional, solo para Parquet/Arrow) con un mensaje legible si no está instalado.
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ValueError("Para leer o escribir archivos Parquet/Arrow instale pyarrow (pip install pyarrow)")
+    return pyarrow
+
+def _csv_encoding(path):
+    """
+    Detecta la codificación de un CSV a partir de su inicio: UTF-8 (con o sin BOM) si es válido y, si no,
+    la primera de CSV_FALLBACK_ENCODINGS que lo decodifica (Excel en español guarda los CSV en cp1252).
+    """
+    with open(path, 'rb') as fh:
+        sample = fh.read(CSV_SNIFF_CHARS)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample)  # Sin final: el bloque puede cortar un carácter
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        pass
+    for encoding in CSV_FALLBACK_ENCODINGS[:-1]:
+        try:
+            sample.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            pass
+    return CSV_FALLBACK_ENCODINGS[-1]
+
+def _csv_decode_error(path, fh, exc):
+    """
+    Error legible para un CSV cuyo inicio era UTF-8 válido pero que más adelante contiene bytes de otra codificación.
+    """
+    return ValueError(f"El CSV {path} mezcla codificaciones: empieza como {fh.encoding} pero contiene "
+                      f"bytes no válidos ({exc.reason}); guárdelo de nuevo como CSV UTF-8")
+
+def _open_csv(path):
+    """
+    Abre un CSV con la codificación detectada (ver _csv_encoding) y detecta su separador entre CSV_DELIMITERS.
+    Devuelve (archivo abierto, lector csv).
+    """
+    fh = open(path, newline='', encoding=_csv_encoding(path))
+    try:
+        sample = fh.read(CSV_SNIFF_CHARS)
+    except UnicodeDecodeError as exc:
+        fh.close()
+        raise _csv_decode_error(path, fh, exc) from None
+    fh.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+    except csv.Error:
+        dialect = csv.excel
+    return fh, csv.reader(fh, dialect)
+
+def iter_csv_rows(path, min_row=2):
+    """
+    Generador que recorre las filas de un CSV desde min_row con el lector csv de la biblioteca estándar
+    (implementado en C). Los valores se leen como texto y las celdas vacías se devuelven como None, igual que en XLSX.
+    """
+    fh, reader = _open_csv(path)
+    with fh:
+        try:
+            for _ in range(min_row - 1):
+                next(reader, None)
+            for row in reader:
+                yield tuple([value or None for value in row]) if '' in row else tuple(row)
+        except UnicodeDecodeError as exc:
+            raise _csv_decode_error(path, fh, exc) from None
+
+def _open_arrow(path, columns=None):
+    """
+    Abre un archivo Parquet o Arrow (IPC, en formato de archivo o de flujo) para leerlo por lotes.
+    En Parquet, columns (lista de nombres) limita la lectura a esas columnas; en Arrow se ignora
+    (el archivo está mapeado en memoria y leer una columna no copia las demás).
+    Devuelve (esquema, generador de record batches).
+    """
+    pa = _import_pyarrow()
+    if file_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        return parquet_file.schema_arrow, parquet_file.iter_batches(batch_size=ARROW_BATCH_ROWS, columns=columns)
+    source = pa.memory_map(path)
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        source.seek(0)
+        reader = pa.ipc.open_stream(source)
+        batches = iter(reader)
+    return reader.schema, batches
+
+def iter_arrow_columns(path):
+    """
+    Camino columnar: generador que devuelve cada lote de un archivo Parquet/Arrow como (columnas, filas),
+    con una lista de valores Python por columna, sin construir las filas una a una.
+    """
+    _, batches = _open_arrow(path)
+    for batch in batches:
+        yield [column.to_pylist() for column in batch.columns], batch.num_rows
+
+def iter_arrow_rows(path):
+    """
+    Generador que recorre las filas (tuplas) de un archivo Parquet/Arrow, lote a lote.
+    """
+    for columns, count in iter_arrow_columns(path):
+        yield from zip(*columns) if columns else [()] * count
+
+def read_table_headers(path):
+    """
+    Encabezados de un archivo CSV (su primera fila) o Parquet/Arrow (los nombres de las columnas del esquema),
+    sin las columnas vacías del final.
+    """
+    if file_format(path) == 'csv':
+        fh, reader = _open_csv(path)
+        with fh:
+            headers = [value or None for value in next(reader, [])]
+    else:
+        schema, _ = _open_arrow(path)
+        headers = list(schema.names)
+    while headers and headers[-1] is None:
+        headers.pop()
+    return headers
+
+def estimate_table_rows(path):
+    """
+    Filas de datos de un archivo Parquet/Arrow (según sus metadatos) o estimación para un CSV
+    a partir del tamaño medio de las líneas de su inicio.
+    """
+    fmt = file_format(path)
+    if fmt == 'parquet':
+        _import_pyarrow()
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    if fmt == 'arrow':
+        _, batches = _open_arrow(path)  # Con el archivo mapeado en memoria, contar los lotes no copia los datos
+        return sum(batch.num_rows for batch in batches)
+    with open(path, 'rb') as fh:
+        sample = fh.read(CSV_SNIFF_CHARS)
+    lines = sample.count(b'\n')
+    if not lines:
+        return 0
+    return max(os.path.getsize(path) * lines // len(sample) - 1, 0)
+
+class CsvStreamWriter:
+    """
+    Escritor CSV con la misma interfaz que XlsxStreamWriter (append, add_sheet, close, abort),
+    sobre el escritor csv de la biblioteca estándar (implementado en C). Escribe UTF-8 separado por comas;
+    None se escribe como celda vacía. compression no se usa (se acepta por compatibilidad).
+    Un CSV tiene una sola hoja: pedir una segunda lanza ValueError.
+    """
+
+    def __init__(self, path, compression=OUTPUT_COMPRESSION):
+        self.path = path
+        fd, self.temp_path = tempfile.mkstemp(suffix='.csv.part', dir=os.path.dirname(os.path.abspath(path)))
+        self._file = os.fdopen(fd, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self.titles = []
+        self.rows = 0
+
+    def add_sheet(self, title=None):
+        """
+        Empieza la única hoja del archivo.
+        """
+        if self.titles:
+            raise ValueError(f"{os.path.basename(self.path)}: el formato CSV solo admite una hoja (use una salida .xlsx)")
+        self.titles.append(title or 'Sheet')
+        return self.titles[-1]
+
+    def append(self, row):
+        """
+        Añade una fila al final del archivo.
+        """
+        if not self.titles:
+            self.add_sheet()
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        """
+        Cierra el archivo y lo mueve a su ruta definitiva. Llamarlo de nuevo no hace nada.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        """
+        Descarta la salida a medio escribir.
+        """
+        try:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class ArrowStreamWriter:
+    """
+    Escritor Parquet/Arrow (IPC) con la misma interfaz que XlsxStreamWriter (append, add_sheet, close, abort).
+    - La primera fila añadida es el encabezado: da los nombres de las columnas (las vacías se llaman ColumnaN
+      y los repetidos se numeran).
+    - Las filas se acumulan en lotes de ARROW_BATCH_ROWS que se convierten por columnas en arrays de Arrow
+      y se escriben como un grupo de filas (Parquet) o un record batch (Arrow).
+    - El tipo de cada columna se deduce del primer lote; las columnas con tipos mezclados (habituales en Excel)
+      o vacías en el primer lote se guardan como texto. Si un lote posterior no cabe en el tipo fijado, la columna
+      se amplía (de entero a decimal si no se pierde precisión; si no, a texto) y lo ya escrito se reescribe
+      con el nuevo esquema (ver _widen): ningún valor se trunca.
+    - compression: 0 sin comprimir; 1-9 zstd (en Parquet, con ese nivel).
+    Requiere pyarrow. Como un CSV, tiene una sola hoja.
+    """
+
+    def __init__(self, path, compression=OUTPUT_COMPRESSION):
+        self._pa = _import_pyarrow()
+        self.path = path
+        self.format = file_format(path)
+        suffix = '.parquet.part' if self.format == 'parquet' else '.arrow.part'
+        fd, self.temp_path = tempfile.mkstemp(suffix=suffix, dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        self.compression = compression
+        self._writer = None
+        self._schema = None
+        self._names = None
+        self._pending = []
+        self._closed = False
+        self.titles = []
+        self.rows = 0
+
+    def add_sheet(self, title=None):
+        """
+        Empieza la única hoja del archivo.
+        """
+        if self.titles:
+            raise ValueError(f"{os.path.basename(self.path)}: el formato {self.format} solo admite una hoja (use una salida .xlsx)")
+        self.titles.append(title or 'Sheet')
+        return self.titles[-1]
+
+    def append(self, row):
+        """
+        Añade una fila: la primera es el encabezado y el resto se acumulan hasta completar un lote.
+        """
+        if not self.titles:
+            self.add_sheet()
+        self.rows += 1
+        if self._names is None:
+            self._names = self._column_names(row)
+            return
+        self._pending.append(row)
+        if len(self._pending) >= ARROW_BATCH_ROWS:
+            self._flush()
+
+    @staticmethod
+    def _column_names(headers):
+        """
+        Nombres de columna únicos y no vacíos a partir de la fila de encabezado.
+        """
+        names = []
+        used = set()
+        for idx, header in enumerate(headers):
+            base = str(header) if header is not None else f"Columna{idx + 1}"
+            name, number = base, 0
+            while name in used:
+                number += 1
+                name = f"{base}.{number}"
+            used.add(name)
+            names.append(name)
+        return names
+
+    def _column_array(self, values):
+        """
+        Convierte los valores de un lote de una columna en un array de Arrow con el tipo que deduce pyarrow.
+        Si los valores mezclan tipos que no caben en un mismo array, se convierten a texto.
+        """
+        pa = self._pa
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            return self._text_array(values)
+
+    def _text_array(self, values):
+        """
+        Array de texto con los valores convertidos con str() (None sigue siendo nulo).
+        """
+        return self._pa.array([None if value is None else str(value) for value in values], type=self._pa.string())
+
+    def _common_type(self, current, new):
+        """
+        Tipo en el que caben una columna del tipo current y un lote del tipo new:
+        el mismo tipo, decimal (float64) si se mezclan enteros y decimales, o texto en cualquier otro caso.
+        """
+        pa = self._pa
+        if new == current or pa.types.is_null(new):
+            return current
+        numeric = (pa.types.is_integer(current) or pa.types.is_floating(current)) and \
+                  (pa.types.is_integer(new) or pa.types.is_floating(new))
+        return pa.float64() if numeric else pa.string()
+
+    def _convert(self, array, field_type):
+        """
+        Convierte un array al tipo de su columna sin perder información (cast seguro); los enteros que no caben
+        exactos en un decimal y cualquier otra conversión imposible lanzan ArrowInvalid.
+        """
+        pa = self._pa
+        if array.type == field_type:
+            return array
+        if pa.types.is_string(field_type):
+            return self._text_array(array.to_pylist())
+        return array.cast(field_type, safe=True)
+
+    def _flush(self):
+        """
+        Convierte las filas acumuladas en columnas y las escribe como un lote.
+        """
+        pa = self._pa
+        width = len(self._names)
+        rows = self._pending
+        self._pending = []
+        for row in rows:
+            if len(row) > width and any(value is not None for value in row[width:]):
+                raise ValueError(f"Hay filas con más columnas ({len(row)}) que el encabezado ({width})")
+        columns = list(zip(*[tuple(row[:width]) + (None,) * (width - len(row)) for row in rows]))
+        if not columns:
+            columns = [[] for _ in range(width)]
+        arrays = [self._column_array(values) for values in columns]
+        if self._schema is None:
+            arrays = [array.cast(pa.string()) if pa.types.is_null(array.type) else array for array in arrays]
+            self._schema = pa.schema([pa.field(name, array.type) for name, array in zip(self._names, arrays)])
+            self._open_writer()
+        else:
+            types = [self._common_type(field.type, array.type) for field, array in zip(self._schema, arrays)]
+            converted = []
+            for idx, (array, field_type) in enumerate(zip(arrays, types)):
+                try:
+                    converted.append(self._convert(array, field_type))
+                except pa.ArrowInvalid:
+                    types[idx] = pa.string()
+                    converted.append(self._text_array(array.to_pylist()))
+            if types != self._schema.types:
+                types = self._widen(types)
+                converted = [self._convert(array, field_type) for array, field_type in zip(converted, types)]
+            arrays = converted
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def _widen(self, types):
+        """
+        Cambia el tipo de las columnas cuyos valores ya no caben en el tipo deducido al principio:
+        cierra el archivo temporal y lo reescribe lote a lote con el nuevo esquema. Si un valor ya escrito
+        no cabe exacto en el nuevo tipo (un entero grande al pasar a decimal), esa columna pasa a texto.
+        Devuelve los tipos finales de las columnas.
+        """
+        pa = self._pa
+        old_types = self._schema.types
+        old_path = self.temp_path
+        self._writer.close()
+        self._writer = None
+        try:
+            while True:
+                logging.debug(f"{os.path.basename(self.path)}: cambian los tipos de columna a {types}, "
+                              f"se reescribe lo ya escrito")
+                self._schema = pa.schema([pa.field(name, field_type) for name, field_type in zip(self._names, types)])
+                fd, self.temp_path = tempfile.mkstemp(suffix=f'.{self.format}.part', dir=os.path.dirname(old_path))
+                os.close(fd)
+                self._open_writer()
+                try:
+                    for batch in self._iter_written(old_path):
+                        arrays = [self._convert(column, field_type) for column, field_type in zip(batch.columns, types)]
+                        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+                    return types
+                except pa.ArrowInvalid:
+                    # Algún valor ya escrito no cabe en el nuevo tipo: las columnas que cambian pasan a texto
+                    self._writer.close()
+                    self._writer = None
+                    os.remove(self.temp_path)
+                    types = [field_type if field_type == old_type else pa.string()
+                             for field_type, old_type in zip(types, old_types)]
+        finally:
+            os.remove(old_path)
+
+    def _iter_written(self, path):
+        """
+        Generador con los lotes ya escritos en el archivo temporal indicado (Parquet o Arrow IPC).
+        """
+        pa = self._pa
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+            yield from pq.ParquetFile(path).iter_batches(batch_size=ARROW_BATCH_ROWS)
+        else:
+            with pa.memory_map(path) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    yield reader.get_batch(i)
+
+    def _open_writer(self):
+        """
+        Abre el escritor de pyarrow (Parquet o Arrow IPC) una vez fijado el esquema.
+        """
+        pa = self._pa
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+            if self.compression:
+                self._writer = pq.ParquetWriter(self.temp_path, self._schema, compression='zstd',
+                                                compression_level=self.compression)
+            else:
+                self._writer = pq.ParquetWriter(self.temp_path, self._schema, compression='none')
+        else:
+            options = pa.ipc.IpcWriteOptions(compression='zstd' if self.compression else None)
+            self._writer = pa.ipc.new_file(self.temp_path, self._schema, options=options)
+
+    def close(self):
+        """
+        Escribe el último lote, cierra el archivo y lo mueve a su ruta definitiva. Llamarlo de nuevo no hace nada.
+        """
+        if self._closed:
+            return
+        if self._names is None:
+            self._names = []
+        if self._pending or self._writer is None:
+            self._flush()
+        self._writer.close()
+        self._writer = None
+        self._closed = True
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        """
+        Descarta la salida a medio escribir.
+        """
+        try:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        finally:
+            self._closed = True
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def open_writer(path, compression=OUTPUT_COMPRESSION):
+    """
+    Crea el escritor en streaming adecuado para la extensión de la salida:
+    XlsxStreamWriter (.xlsx y extensiones desconocidas), CsvStreamWriter (.csv) o ArrowStreamWriter (.parquet, .arrow).
+    """
+    fmt = file_format(path)
+    if fmt == 'csv':
+        return CsvStreamWriter(path, compression)
+    if fmt in ('parquet', 'arrow'):
+        return ArrowStreamWriter(path, compression)
+    return XlsxStreamWriter(path, compression)
+# --- FIN SECCIÓN DE ADAPTADORES DE FORMATO ---
+
+def _encode_chunk(chunk):
+    """
+    Convierte un bloque de filas al formato columnar de los segmentos: (columnas, filas, longitudes).
+    Las filas más cortas se rellenan con None y se guarda su longitud original para restaurarlas.
+    """
+    width = max(map(len, chunk))
+    lengths = None
+    if any(len(row) != width for row in chunk):
+        lengths = [len(row) for row in chunk]
+        chunk = [tuple(row) + (None,) * (width - len(row)) for row in chunk]
+    return list(zip(*chunk)), len(chunk), lengths
+
+def write_segment(rows, segment_path):
+    """
+    Vuelca filas en un segmento binario columnar: bloques de SPOOL_CHUNK_ROWS filas,
+    cada uno guardado por columnas y serializado con pickle.
+    Es el formato de los archivos intermedios de los workers y de la caché del merge incremental.
+    Devuelve el número de filas escritas.
+    """
+    count = 0
+    with open(segment_path, 'wb') as segment:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= SPOOL_CHUNK_ROWS:
+                pickle.dump(_encode_chunk(chunk), segment, protocol=pickle.HIGHEST_PROTOCOL)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            pickle.dump(_encode_chunk(chunk), segment, protocol=pickle.HIGHEST_PROTOCOL)
+            count += len(chunk)
+    return count
+
+def write_column_segment(batches, segment_path):
+    """
+    Vuelca en un segmento lotes que ya vienen por columnas, (columnas, filas), como los de iter_arrow_columns:
+    cada lote se guarda tal cual, sin pasar por filas.
+    Devuelve el número de filas escritas.
+    """
+    count = 0
+    with open(segment_path, 'wb') as segment:
+        for columns, rows in batches:
+            pickle.dump((columns, rows, None), segment, protocol=pickle.HIGHEST_PROTOCOL)
+            count += rows
+    return count
+
+def iter_segment(segment_path):
+    """
+    Generador que devuelve, en su orden original, las filas guardadas en un segmento.
+    """
+    with open(segment_path, 'rb') as segment:
+        while True:
+            try:
+                columns, count, lengths = pickle.load(segment)
+            except EOFError:
+                return
+            rows = zip(*columns) if columns else [()] * count
+            if lengths:
+                rows = (row[:length] for row, length in zip(rows, lengths))
+            yield from rows
+
+def parse_to_spool(path, spool_dir, engine='openpyxl', sheet=None):
+    """
+    Tarea de un worker del pool de procesos.
+    Parsea una hoja (por defecto, la activa) de un archivo XLSX y vuelca sus filas de datos (sin encabezado)
+    en un segmento temporal (spool) dentro de spool_dir.
+    Devuelve un diccionario con la ruta del spool, el número de filas y el tiempo empleado por el worker.
+    """
+    start_time = time.time()
+    fd, spool_path = tempfile.mkstemp(suffix='.spool', dir=spool_dir)
+    os.close(fd)
+    if file_format(path) in ('parquet', 'arrow'):
+        # Camino columnar: los lotes de Arrow se vuelcan por columnas, sin construir filas
+        rows = write_column_segment(iter_arrow_columns(path), spool_path)
+    else:
+        rows = write_segment(iter_data_rows(path, engine, sheet), spool_path)
+    return {
+        'file': path,
+        'sheet': sheet,
+        'spool': spool_path,
+        'rows': rows,
+        'pid': os.getpid(),
+        'seconds': round(time.time() - start_time, 2)
+    }
+
+def parse_files(files, spool_dir, workers=1, engine='openpyxl', sheets=None):
+    """
+    Generador que parsea los archivos a spools dentro de spool_dir y devuelve sus resultados
+    en el orden original de los archivos (no en el de finalización).
+    sheets es, opcionalmente, la lista de hojas a leer de cada archivo (en paralelo a files);
+    así un mismo archivo puede aparecer varias veces, una por hoja.
+    Con workers > 1 los archivos (u hojas) se parsean en paralelo en un pool de procesos.
+    """
+    sheets = sheets if sheets is not None else [None] * len(files)
+    if workers > 1 and len(files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            futures = [pool.submit(parse_to_spool, file, spool_dir, engine, sheet) for file, sheet in zip(files, sheets)]
+            for future in futures:
+                yield future.result()
+    else:
+        for file, sheet in zip(files, sheets):
+            yield parse_to_spool(file, spool_dir, engine, sheet)
+
+# --- SECCIÓN DE BÚSQUEDA DE ENTRADAS Y LECTURA ANTICIPADA (CARPETAS DE RED) ---
+def scan_input_files(folder):
+    """
+    Devuelve los archivos admitidos (FILE_FORMATS) de una carpeta, ordenados por nombre.
+    Usa os.scandir: el tipo de cada entrada llega con el propio listado, sin un stat por archivo
+    (en unidades de red SMB/NFS cada stat es un viaje de ida y vuelta al servidor).
+    Para buscar también en las subcarpetas se usa un patrón con '**' (ver scan_glob).
+    """
+    with os.scandir(folder) as entries:
+        return sorted(entry.path for entry in entries
+                      if entry.is_file() and entry.name.lower().endswith(tuple(FILE_FORMATS)))
+
+def _scan_pattern(folder, parts):
+    """
+    Generador recursivo de scan_glob: devuelve los archivos bajo folder que coinciden con los segmentos
+    del patrón en parts ('**' equivale a cero o más carpetas). Como glob, omite los nombres que empiezan
+    por '.' salvo que el segmento también empiece por '.'.
+    """
+    import fnmatch
+    part, rest = parts[0], parts[1:]
+    if not glob.has_magic(part):
+        path = os.path.join(folder, part)
+        if rest:
+            if os.path.isdir(path):
+                yield from _scan_pattern(path, rest)
+        elif os.path.isfile(path):
+            yield path
+        return
+    try:
+        with os.scandir(folder or os.curdir) as iterator:
+            entries = list(iterator)
+    except OSError:
+        return
+    if part == '**':
+        if rest:
+            yield from _scan_pattern(folder, rest)
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            path = os.path.join(folder, entry.name)
+            if not rest and entry.is_file():
+                yield path
+            elif entry.is_dir():
+                yield from _scan_pattern(path, parts)
+        return
+    for entry in entries:
+        if entry.name.startswith('.') and not part.startswith('.'):
+            continue
+        if not fnmatch.fnmatch(entry.name, part):
+            continue
+        path = os.path.join(folder, entry.name)
+        if rest:
+            if entry.is_dir():
+                yield from _scan_pattern(path, rest)
+        elif entry.is_file():
+            yield path
+
+def scan_glob(pattern):
+    """
+    Equivalente a glob.glob(pattern, recursive=True) limitado a archivos, pero con os.scandir:
+    el tipo de cada entrada (archivo o carpeta) sale del listado, sin un stat por coincidencia.
+    Devuelve las rutas ordenadas (puede haber repetidas si el patrón tiene varios '**').
+    """
+    base, parts = pattern, []
+    while glob.has_magic(base):
+        base, part = os.path.split(base)
+        if part:
+            parts.insert(0, part)
+        if not part and not base:
+            break
+    if not parts:
+        return [pattern] if os.path.isfile(pattern) else []
+    return sorted(_scan_pattern(base, parts))
+
+def prefetch_files(files, depth=0):
+    """
+    Lectura anticipada de las entradas: generador que devuelve (archivo, ruta_local) en el orden de files.
+    Con depth > 0, un pool de depth hilos copia los siguientes depth archivos a una carpeta temporal local
+    mientras se procesa el actual, de modo que la espera de la red se solapa con el parseo; cada copia
+    se elimina en cuanto se pide el siguiente archivo (como mucho hay depth + 1 copias en disco).
+    Con depth=0 devuelve las rutas originales, sin copiar nada.
+    """
+    if depth < 1 or not files:
+        for file in files:
+            yield file, file
+        return
+    import shutil
+    from concurrent.futures import ThreadPoolExecutor
+    with tempfile.TemporaryDirectory(prefix='merge-wiper-prefetch-') as prefetch_dir:
+
+        def fetch(number, file):
+            # La copia conserva la extensión, de la que depende el formato de lectura (ver file_format)
+            local_path = os.path.join(prefetch_dir, f"{number}{os.path.splitext(file)[1]}")
+            shutil.copyfile(file, local_path)
+            return local_path
+
+        with ThreadPoolExecutor(max_workers=depth) as pool:
+            pending = [(file, pool.submit(fetch, number, file)) for number, file in enumerate(files[:depth])]
+            next_number = len(pending)
+            try:
+                while pending:
+                    file, future = pending.pop(0)
+                    if next_number < len(files):
+                        pending.append((files[next_number], pool.submit(fetch, next_number, files[next_number])))
+                        next_number += 1
+                    local_path = future.result()
+                    try:
+                        yield file, local_path
+                    finally:
+                        os.remove(local_path)
+            finally:
+                # Si se deja de consumir (o hay un error), no empieza ninguna copia más
+                for _, future in pending:
+                    future.cancel()
+# --- FIN SECCIÓN DE BÚSQUEDA DE ENTRADAS Y LECTURA ANTICIPADA ---
+
+# --- SECCIÓN DE MERGE INCREMENTAL (MANIFIESTO Y CACHÉ DE SEGMENTOS) ---
+MANIFEST_VERSION = 1  # Cambiarlo invalida las cachés existentes (por ejemplo, si cambia el formato de los segmentos)
+
+def manifest_paths(output_path):
+    """
+    Devuelve las rutas del manifiesto y de la carpeta de caché de segmentos asociados a un archivo de salida.
+    """
+    return output_path + '.manifest.json', output_path + '.cache'
+
+def file_digest(path):
+    """
+    Calcula el hash BLAKE2b del contenido de un archivo, leyéndolo por bloques.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(manifest_path):
+    """
+    Lee el manifiesto del merge incremental. Si no existe, está dañado o es de otra versión, devuelve uno vacío.
+    """
+    try:
+        with open(manifest_path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+        if manifest.get('version') == MANIFEST_VERSION and isinstance(manifest.get('files'), dict):
+            return manifest
+        logging.debug(f"Manifiesto de otra versión, se ignora: {manifest_path}")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logging.debug(f"Manifiesto ilegible, se ignora: {manifest_path} ({e})")
+    return {'version': MANIFEST_VERSION, 'files': {}}
+
+def save_manifest(manifest, manifest_path, cache_dir):
+    """
+    Guarda el manifiesto de forma atómica y elimina de la caché los segmentos que ya no usa ningún archivo.
+    """
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    in_use = {entry['segment'] for entry in manifest['files'].values()}
+    for name in os.listdir(cache_dir):
+        if name not in in_use:
+            os.remove(os.path.join(cache_dir, name))
+
+def check_cached_file(path, entry, cache_dir):
+    """
+    Indica si el segmento en caché de un archivo sigue siendo válido.
+    Si el tamaño y la fecha de modificación coinciden no se lee el archivo; si cambiaron,
+    se compara el hash del contenido (un archivo solo "tocado" sigue siendo un acierto).
+    Devuelve (es_válido, datos_actualizados_del_archivo).
+    """
+    stat = os.stat(path)
+    info = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    segment_ok = entry is not None and os.path.isfile(os.path.join(cache_dir, entry['segment']))
+    if segment_ok and entry['size'] == info['size'] and entry['mtime_ns'] == info['mtime_ns']:
+        info['hash'] = entry['hash']
+        return True, info
+    info['hash'] = file_digest(path)
+    return segment_ok and entry['hash'] == info['hash'], info
+# --- FIN SECCIÓN DE MERGE INCREMENTAL ---
+
+# --- SECCIÓN DE MERGE REANUDABLE (DIARIO DE PUNTOS DE CONTROL) ---
+JOURNAL_VERSION = 1  # Cambiarlo invalida los diarios existentes
+
+def journal_paths(output_path):
+    """
+    Devuelve las rutas del diario y de la carpeta de segmentos del merge reanudable asociados a un archivo de salida.
+    """
+    return output_path + '.journal.json', output_path + '.resume'
+
+def load_journal(journal_path):
+    """
+    Lee el diario del merge reanudable. Si no existe, está dañado o es de otra versión, devuelve uno vacío.
+    """
+    try:
+        with open(journal_path, encoding='utf-8') as fh:
+            journal = json.load(fh)
+        if journal.get('version') == JOURNAL_VERSION and isinstance(journal.get('files'), dict):
+            return journal
+        logging.debug(f"Diario de otra versión, se ignora: {journal_path}")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logging.debug(f"Diario ilegible, se ignora: {journal_path} ({e})")
+    return {'version': JOURNAL_VERSION, 'files': {}}
+
+def save_journal(journal, journal_path):
+    """
+    Guarda el diario de forma atómica (temporal + os.replace): tras una interrupción queda la versión anterior o la nueva, nunca una a medias.
+    """
+    tmp_path = journal_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(journal, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, journal_path)
+
+def discard_journal(output_path):
+    """
+    Elimina el diario y los segmentos del merge reanudable una vez escrita la salida.
+    """
+    journal_path, resume_dir = journal_paths(output_path)
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+    if os.path.isdir(resume_dir):
+        for name in os.listdir(resume_dir):
+            os.remove(os.path.join(resume_dir, name))
+        os.rmdir(resume_dir)
+
+def merge_resumable(files, output_path, ws_out, workers, stats, projections, engine='openpyxl', metrics=None):
+    """
+    Parte reanudable del merge, en dos etapas:
+    - Cada archivo se parsea (en paralelo si workers > 1) a un segmento en la carpeta <salida>.resume y,
+      en cuanto termina, se anota en el diario <salida>.journal.json con su tamaño, fecha y filas.
+      Si el merge se interrumpe (un archivo dañado, falta de memoria), los archivos anotados no se vuelven a parsear
+      en la siguiente ejecución con resume, siempre que no hayan cambiado; un archivo a medias se parsea de nuevo.
+    - Con todos los archivos anotados, la salida se escribe a partir de los segmentos en el orden original.
+    El diario y los segmentos se eliminan en merge_files cuando la salida queda guardada (ver discard_journal).
+    Actualiza stats con las líneas escritas y devuelve cuántos archivos se recuperaron del diario.
+    """
+    row_metrics = metrics  # None sin reporte: las filas se copian sin medir (ver append_rows)
+    metrics = metrics if metrics is not None else PhaseMetrics()
+    journal_path, resume_dir = journal_paths(output_path)
+    os.makedirs(resume_dir, exist_ok=True)
+    journal = load_journal(journal_path)
+    committed = {}
+    pending = []
+    file_infos = {}
+    with metrics.phase('verify'):
+        for file in files:
+            key = os.path.abspath(file)
+            stat = os.stat(file)
+            info = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            entry = journal['files'].get(key)
+            if (entry is not None and entry.get('size') == info['size'] and entry.get('mtime_ns') == info['mtime_ns']
+                    and os.path.isfile(os.path.join(resume_dir, entry['segment']))):
+                committed[key] = entry
+            else:
+                pending.append(file)
+                file_infos[file] = info
+        # Los segmentos de archivos que cambiaron o ya no forman parte del merge (y los spools a medias) sobran
+        in_use = {entry['segment'] for entry in committed.values()}
+        for name in os.listdir(resume_dir):
+            if name not in in_use:
+                os.remove(os.path.join(resume_dir, name))
+    journal = {'version': JOURNAL_VERSION, 'output': os.path.abspath(output_path), 'files': committed}
+    save_journal(journal, journal_path)
+    if committed:
+        logging.debug(f"Merge reanudado: {len(committed)} archivo(s) ya completados según {journal_path}, {len(pending)} por parsear")
+    parsed = parse_files(pending, resume_dir, workers, engine)
+    try:
+        # Los resultados llegan en el mismo orden que la lista de archivos por parsear
+        for result in metrics.timed('read', parsed):
+            file = result['file']
+            key = os.path.abspath(file)
+            segment = hashlib.blake2b(key.encode('utf-8'), digest_size=10).hexdigest() + '.seg'
+            os.replace(result['spool'], os.path.join(resume_dir, segment))
+            committed[key] = {**file_infos[file], 'segment': segment, 'rows': result['rows']}
+            save_journal(journal, journal_path)
+            stats['worker_timings'][file] = {'pid': result['pid'], 'seconds': result['seconds']}
+    except Exception:
+        logging.error(f"❌ Merge interrumpido: {len(committed)} de {len(files)} archivo(s) quedan guardados en {journal_path}; "
+                      f"vuelva a ejecutarlo con --resume para continuar desde ahí")
+        raise
+    finally:
+        parsed.close()
+    for file in files:
+        entry = committed[os.path.abspath(file)]
+        append_rows(ws_out, iter_segment(os.path.join(resume_dir, entry['segment'])), projections.get(file), row_metrics)
+        stats['file_lines'][file] = entry['rows']
+        stats['lines_out'] += entry['rows']
+    return {'resumed_files': len(files) - len(pending)}
+# --- FIN SECCIÓN DE MERGE REANUDABLE ---
+
+# --- SECCIÓN DE ALINEACIÓN DE ESQUEMAS ---
+SCHEMA_MODES = ('strict', 'union', 'intersection')
+
+def _header_keys(headers):
+    """
+    Identifica cada columna por (nombre, n-ésima aparición de ese nombre), de modo que los encabezados
+    repetidos se emparejan en orden. Las columnas sin encabezado se marcan con None.
+    """
+    counts = {}
+    keys = []
+    for header in headers:
+        if header is None:
+            keys.append(None)
+            continue
+        occurrence = counts.get(header, 0)
+        counts[header] = occurrence + 1
+        keys.append((header, occurrence))
+    return keys
+
+def build_schema(all_headers, mode):
+    """
+    Construye el esquema unificado por nombre de encabezado a partir de los encabezados de cada archivo.
+    - union: todas las columnas, en el orden en que aparecen por primera vez.
+    - intersection: solo las columnas presentes en todos los archivos, en el orden del primero.
+    Las columnas sin encabezado no se pueden alinear por nombre y se descartan.
+    Devuelve (encabezados unificados, remapeos), donde cada remapeo indica para cada columna del
+    esquema su índice en el archivo, o -1 si el archivo no la tiene.
+    """
+    file_keys = [_header_keys(headers) for headers in all_headers]
+    if mode == 'union':
+        schema = []
+        seen = set()
+        for keys in file_keys:
+            for key in keys:
+                if key is not None and key not in seen:
+                    seen.add(key)
+                    schema.append(key)
+    else:
+        common = set(file_keys[0])
+        for keys in file_keys[1:]:
+            common &= set(keys)
+        schema = [key for key in file_keys[0] if key is not None and key in common]
+    if not schema:
+        raise ValueError("Los archivos no tienen ninguna columna en común para alinear")
+    remaps = []
+    for keys in file_keys:
+        positions = {key: idx for idx, key in enumerate(keys) if key is not None}
+        remaps.append(tuple(positions.get(key, -1) for key in schema))
+    return [name for name, _ in schema], remaps
+
+def compile_projection(remap):
+    """
+    Precompila la proyección que reordena una fila de un archivo al esquema unificado.
+    - Si las columnas ya están en orden, se recorta la fila con un itemgetter de slice.
+    - Si no, un único itemgetter toma las columnas en el nuevo orden sobre la fila ampliada con None,
+      de modo que las columnas que faltan (índice -1) y las celdas finales vacías quedan en None.
+      Los lectores devuelven listas vacías para las filas que faltan en hojas sin dimensión, por eso la fila
+      se convierte antes a tupla (tuple() sobre una tupla no la copia).
+    """
+    width = len(remap)
+    if remap == tuple(range(width)):
+        return itemgetter(slice(0, width))
+    getter = itemgetter(*remap)
+    padding = (None,) * (max(remap) + 2)
+    if width == 1:
+        return lambda row: (getter(tuple(row) + padding),)
+    return lambda row: getter(tuple(row) + padding)
+
+def merge_schema(files, mode='strict', sheet=None):
+    """
+    Determina los encabezados de salida del merge y la proyección de columnas de cada archivo
+    (en la hoja indicada o, por defecto, en la activa).
+    En modo strict se usan los encabezados del primer archivo sin proyección;
+    en modo union/intersection se alinean las columnas por nombre de encabezado.
+    Devuelve (encabezados, {archivo: proyección}).
+    """
+    if mode == 'strict':
+        return list(header_fingerprint(files[0], sheet)), {}
+    headers, remaps = build_schema([header_fingerprint(file, sheet) for file in files], mode)
+    return headers, {file: compile_projection(remap) for file, remap in zip(files, remaps)}
+
+def append_rows(ws_out, rows, project=None, metrics=None):
+    """
+    Escribe las filas en la hoja de salida, aplicando la proyección de columnas si la hay.
+    Con metrics (PhaseMetrics), acumula por separado el tiempo de lectura, de proyección y de escritura.
+    Devuelve el número de filas escritas.
+    """
+    if metrics is not None:
+        return _append_rows_timed(ws_out, rows, project, metrics)
+    if project is not None:
+        rows = map(project, rows)
+    count = 0
+    for row in rows:
+        ws_out.append(row)
+        count += 1
+    return count
+
+def _append_rows_timed(ws_out, rows, project, metrics):
+    """
+    Variante de append_rows que mide las fases por lotes de METRICS_BATCH_ROWS filas
+    (unas pocas lecturas del reloj por lote en lugar de tres por fila).
+    """
+    perf_counter = time.perf_counter
+    append = ws_out.append
+    read_seconds = transform_seconds = write_seconds = 0.0
+    count = 0
+    started = perf_counter()
+    for batch in iter_row_batches(rows, METRICS_BATCH_ROWS):
+        read_done = perf_counter()
+        read_seconds += read_done - started
+        if project is not None:
+            batch = list(map(project, batch))
+            transform_done = perf_counter()
+            transform_seconds += transform_done - read_done
+        else:
+            transform_done = read_done
+        for row in batch:
+            append(row)
+        count += len(batch)
+        started = perf_counter()
+        write_seconds += started - transform_done
+    read_seconds += perf_counter() - started  # Fin del iterador
+    metrics.add('read', read_seconds, count)
+    if project is not None:
+        metrics.add('transform', transform_seconds, count)
+    metrics.add('write', write_seconds, count)
+    return count
+# --- FIN SECCIÓN DE ALINEACIÓN DE ESQUEMAS ---
+
+# --- SECCIÓN DE SELECCIÓN DE HOJAS (MULTIHOJA) ---
+def select_sheets(names, patterns):
+    """
+    Devuelve, en el orden del libro, los nombres de hoja que coinciden con alguno de los patrones:
+    nombres exactos o comodines ('*', '?'), sin distinguir mayúsculas como hace Excel.
+    """
+    import fnmatch
+    folded = [pattern.casefold() for pattern in patterns]
+    return [name for name in names if any(fnmatch.fnmatchcase(name.casefold(), pattern) for pattern in folded)]
+
+def plan_sheets(files, patterns):
+    """
+    Agrupa por nombre de hoja las hojas seleccionadas de todos los archivos, para combinarlas hoja a hoja.
+    Devuelve [(hoja, [archivos que la contienen])] en orden de primera aparición.
+    Lanza ValueError si ninguna hoja de ningún archivo coincide con los patrones.
+    """
+    plan = {}
+    for file in files:
+        for sheet in select_sheets(list_sheets(file), patterns):
+            plan.setdefault(sheet, []).append(file)
+    if not plan:
+        raise ValueError(f"Ninguna hoja de los archivos de entrada coincide con: {', '.join(patterns)}")
+    return list(plan.items())
+# --- FIN SECCIÓN DE SELECCIÓN DE HOJAS ---
+
+def merge_files(files, output_path, workers=1, incremental=False, schema='strict', engine='openpyxl',
+                compression=OUTPUT_COMPRESSION, metrics=None, sheets=None, resume=False, prefetch=0):
+    """
+    Motor de merge en streaming.
+    - Recorre cada archivo una sola vez, contando las filas mientras las copia.
+    - Escribe con el escritor XLSX en streaming (XlsxStreamWriter), que comprime las filas en el zip de salida
+      a medida que llegan, sin mantenerlas en memoria ni pausar al guardar; compression es su nivel (0-9).
+      Si la salida es .csv, .parquet o .arrow se usa el escritor de ese formato (ver open_writer).
+    - Las entradas pueden ser XLSX, CSV, Parquet o Arrow, incluso mezcladas (ver iter_data_rows).
+    - Con workers > 1, cada archivo se parsea en un proceso del pool hacia un spool temporal y el proceso
+      principal escribe los spools en el orden original de los archivos, por lo que el resultado es
+      idéntico al del modo secuencial.
+    - Con incremental=True, solo se parsean los archivos nuevos o modificados desde la última ejecución
+      (según el manifiesto junto a la salida); el resto se toma de su segmento en caché.
+    - Con resume=True, cada archivo terminado se anota en un diario junto a la salida; si el merge se interrumpe,
+      la siguiente ejecución con resume continúa desde el último archivo anotado (ver merge_resumable).
+    - Con prefetch > 0 (y sin workers), los siguientes prefetch archivos se copian a disco local mientras
+      se escribe el actual (ver prefetch_files), para solapar la espera de las carpetas de red con el parseo.
+    - Con schema='union' o 'intersection', las columnas se alinean por nombre de encabezado
+      mediante una proyección precompilada por archivo (ver merge_schema).
+    - engine elige el motor de lectura de filas ('openpyxl' o 'fast', ver iter_data_rows).
+    - Con metrics (PhaseMetrics) se acumulan los tiempos de las fases validate, read, transform y write.
+    - Con sheets (lista de nombres o patrones de hoja), se combina hoja a hoja en una salida multihoja
+      (ver merge_sheets) en lugar de usar solo la hoja activa.
+    Devuelve un diccionario con las líneas por archivo, el total de líneas escritas (sin encabezado),
+    el tiempo de cada worker (si se parseó en paralelo), los aciertos/fallos de la caché incremental
+    y los archivos recuperados del diario (con resume).
+    """
+    row_metrics = metrics  # None sin reporte: las filas se copian sin medir (ver append_rows)
+    metrics = metrics if metrics is not None else PhaseMetrics()
+    if sheets:
+        return merge_sheets(files, output_path, sheets, workers, schema, engine, compression, row_metrics)
+    # Encabezado de salida (ya leído y en caché tras la verificación de encabezados) y proyecciones por archivo
+    with metrics.phase('validate'):
+        headers, projections = merge_schema(files, schema)
+    stats = {'file_lines': {}, 'lines_out': 0, 'worker_timings': {}, 'columns': len(headers)}
+    # El archivo combinado queda guardado al cerrar el escritor (y se descarta si algo falla)
+    with open_writer(output_path, compression) as ws_out:
+        ws_out.append(headers)
+        if incremental:
+            stats.update(merge_incremental(files, output_path, ws_out, workers, stats, projections, engine, row_metrics))
+        elif resume:
+            stats.update(merge_resumable(files, output_path, ws_out, workers, stats, projections, engine, row_metrics))
+        elif workers > 1 and len(files) > 1:
+            with tempfile.TemporaryDirectory(prefix='merge-wiper-') as spool_dir:
+                # La espera a los workers cuenta como lectura
+                for result in metrics.timed('read', parse_files(files, spool_dir, workers, engine)):
+                    logging.debug(f"Escribiendo archivo parseado por el worker {result['pid']}: {result['file']}")
+                    append_rows(ws_out, iter_segment(result['spool']), projections.get(result['file']), row_metrics)
+                    os.remove(result['spool'])
+                    stats['file_lines'][result['file']] = result['rows']
+                    stats['worker_timings'][result['file']] = {'pid': result['pid'], 'seconds': result['seconds']}
+                    stats['lines_out'] += result['rows']
+        else:
+            # La espera a las copias anticipadas (si prefetch > 0) cuenta como lectura
+            fetched = prefetch_files(files, prefetch)
+            sources = metrics.timed('read', fetched)
+            try:
+                for file, local_path in sources:
+                    logging.debug(f"Procesando archivo: {file}")
+                    file_line_count = append_rows(ws_out, iter_data_rows(local_path, engine), projections.get(file), row_metrics)
+                    stats['file_lines'][file] = file_line_count
+                    stats['lines_out'] += file_line_count
+            finally:
+                sources.close()
+                fetched.close()
+        with metrics.phase('write'):
+            ws_out.close()
+    if resume:
+        # La salida ya está guardada (renombrada a su ruta final): el diario deja de hacer falta
+        discard_journal(output_path)
+    return stats
+
+def merge_sheets(files, output_path, sheets, workers=1, schema='strict', engine='openpyxl',
+                 compression=OUTPUT_COMPRESSION, metrics=None):
+    """
+    Merge multihoja: para cada hoja seleccionada (por nombre o patrón), combina esa hoja de todos los archivos
+    que la tienen en una hoja de salida con el mismo nombre.
+    - Los encabezados se verifican (o se alinean, según schema) hoja por hoja.
+    - Con workers > 1, todas las parejas archivo/hoja son independientes y se parsean a la vez en el pool
+      de procesos; el proceso principal escribe cada hoja de salida en streaming, en orden.
+    Devuelve el mismo diccionario que merge_files, con las líneas por "archivo [hoja]" y el detalle por hoja.
+    """
+    row_metrics = metrics  # None sin reporte: las filas se copian sin medir (ver append_rows)
+    metrics = metrics if metrics is not None else PhaseMetrics()
+    with metrics.phase('validate'):
+        plan = plan_sheets(files, sheets)
+        schemas = {}
+        for sheet, sheet_files in plan:
+            if schema == 'strict':
+                mismatches = find_header_mismatches(sheet_files, workers, sheet)
+                if mismatches:
+                    names = ", ".join(os.path.basename(path) for path in mismatches)
+                    raise ValueError(f"Hoja '{sheet}': {len(mismatches)} archivo(s) con encabezados diferentes "
+                                     f"a los de {os.path.basename(sheet_files[0])}: {names}")
+            schemas[sheet] = merge_schema(sheet_files, schema, sheet)
+    sheet_stats = {}
+    stats = {'file_lines': {}, 'lines_out': 0, 'worker_timings': {}, 'sheets': sheet_stats,
+             'columns': sum(len(headers) for headers, _ in schemas.values())}
+    tasks = [(file, sheet) for sheet, sheet_files in plan for file in sheet_files]
+    with open_writer(output_path, compression) as ws_out:
+        with tempfile.TemporaryDirectory(prefix='merge-wiper-') as spool_dir:
+            parallel = workers > 1 and len(tasks) > 1
+            # Con workers > 1 los resultados llegan en el orden de tasks: hoja a hoja y, dentro de cada hoja, archivo a archivo
+            parsed = parse_files([file for file, _ in tasks], spool_dir, workers, engine,
+                                 [sheet for _, sheet in tasks]) if parallel else iter(())
+            results = metrics.timed('read', parsed)
+            try:
+                for sheet, sheet_files in plan:
+                    headers, projections = schemas[sheet]
+                    ws_out.add_sheet(sheet)
+                    ws_out.append(headers)
+                    sheet_lines = 0
+                    for file in sheet_files:
+                        label = f"{file} [{sheet}]"
+                        if parallel:
+                            result = next(results)
+                            rows = append_rows(ws_out, iter_segment(result['spool']), projections.get(file), row_metrics)
+                            os.remove(result['spool'])
+                            stats['worker_timings'][label] = {'pid': result['pid'], 'seconds': result['seconds']}
+                        else:
+                            logging.debug(f"Procesando hoja '{sheet}' de: {file}")
+                            rows = append_rows(ws_out, iter_data_rows(file, engine, sheet), projections.get(file), row_metrics)
+                        stats['file_lines'][label] = rows
+                        sheet_lines += rows
+                    sheet_stats[sheet] = {'files': len(sheet_files), 'lines_in': sheet_lines, 'lines_out': sheet_lines}
+                    stats['lines_out'] += sheet_lines
+            finally:
+                results.close()
+                if parallel:
+                    parsed.close()
+        with metrics.phase('write'):
+            ws_out.close()
+    return stats
+
+def merge_incremental(files, output_path, ws_out, workers, stats, projections, engine='openpyxl', metrics=None):
+    """
+    Parte incremental del merge: reconstruye la salida a partir de los segmentos en caché y
+    parsea (en paralelo si workers > 1) solo los archivos nuevos o modificados.
+    Los segmentos guardan las filas originales; la proyección de columnas de cada archivo se aplica al escribir.
+    Actualiza stats con las líneas escritas y devuelve los aciertos y fallos de la caché.
+    La comprobación de los archivos en caché (tamaño, fecha y hash) se mide como fase verify.
+    """
+    row_metrics = metrics  # None sin reporte: las filas se copian sin medir (ver append_rows)
+    metrics = metrics if metrics is not None else PhaseMetrics()
+    manifest_path, cache_dir = manifest_paths(output_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    new_manifest = {'version': MANIFEST_VERSION, 'files': {}}
+    file_infos = {}
+    misses = []
+    with metrics.phase('verify'):
+        for file in files:
+            key = os.path.abspath(file)
+            entry = manifest['files'].get(key)
+            valid, info = check_cached_file(file, entry, cache_dir)
+            if valid:
+                info.update(segment=entry['segment'], rows=entry['rows'])
+            else:
+                misses.append(file)
+            file_infos[file] = info
+    logging.debug(f"Merge incremental: {len(files) - len(misses)} archivo(s) en caché, {len(misses)} por parsear")
+    parsed = parse_files(misses, cache_dir, workers, engine)
+    try:
+        for file in files:
+            info = file_infos[file]
+            if 'segment' not in info:
+                # Los resultados llegan en el mismo orden que la lista de archivos por parsear
+                with metrics.phase('read'):
+                    result = next(parsed)
+                info['segment'] = f"{info['hash']}.seg"
+                info['rows'] = result['rows']
+                os.replace(result['spool'], os.path.join(cache_dir, info['segment']))
+                stats['worker_timings'][file] = {'pid': result['pid'], 'seconds': result['seconds']}
+            append_rows(ws_out, iter_segment(os.path.join(cache_dir, info['segment'])), projections.get(file), row_metrics)
+            stats['file_lines'][file] = info['rows']
+            stats['lines_out'] += info['rows']
+            new_manifest['files'][os.path.abspath(file)] = info
+    finally:
+        parsed.close()
+    save_manifest(new_manifest, manifest_path, cache_dir)
+    return {'cache_hits': len(files) - len(misses), 'cache_misses': len(misses)}
+
+# --- SECCIÓN DE CLAVES DE DEDUPLICACIÓN ---
+def normalize_numeric(value):
+    """
+    Convierte números y textos numéricos a un mismo valor: 123, 123.0 y "123" dan 123.
+    - Los textos enteros se convierten con int(), sin pasar por float: los identificadores largos
+      (más de 15-16 dígitos) se conservan exactos y no se confunden entre sí.
+    - El resto de textos se interpreta con Decimal y se reduce a float cuando el float más corto que lo
+      representa se escribe igual ("0.1" da 0.1, como la celda numérica de Excel); solo los textos con más
+      precisión de la que cabe en un float se conservan como Decimal.
+    - La coma no se interpreta ("1,000" no es 1 ni 1000): esos textos se devuelven sin cambios.
+    Los valores no numéricos se devuelven sin cambios.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        if '_' in text:
+            return value  # int() y Decimal() aceptan "1_000", que no es un número escrito en una celda
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            number = decimal.Decimal(text)
+        except decimal.InvalidOperation:
+            return value
+        if not number.is_finite():
+            return value
+        if number == number.to_integral_value():
+            return int(number)
+        value = float(number)
+        return value if decimal.Decimal(repr(value)) == number else number
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def normalize_date(value):
+    """
+    Convierte fechas a texto ISO 8601. Las fechas con hora 00:00:00 se reducen a la fecha (AAAA-MM-DD).
+    Acepta objetos date/datetime y textos en formato ISO; el resto se devuelve sin cambios.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.fromisoformat(value.strip())
+        except ValueError:
+            return value
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time(0, 0):
+            return value.date().isoformat()
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+def _text_normalizer(func):
+    """
+    Adapta una función de texto para que deje pasar sin cambios los valores que no son cadenas.
+    """
+    def normalizer(value):
+        return func(value) if isinstance(value, str) else value
+    return normalizer
+
+# Normalizaciones disponibles para cada columna de la clave (se aplican en el orden indicado)
+KEY_NORMALIZERS = {
+    'strip': _text_normalizer(str.strip),
+    'casefold': _text_normalizer(str.casefold),
+    'nfkc': _text_normalizer(lambda value: unicodedata.normalize('NFKC', value)),
+    'numeric': normalize_numeric,
+    'date': normalize_date,
+}
+
+def column_index(token, headers):
+    """
+    Devuelve el índice (base 0) de una columna indicada por su letra (A, B, ..., AA, AB...)
+    o por el nombre de su encabezado. Los nombres entre corchetes ([ID]) se buscan solo como encabezado.
+    """
+    from openpyxl.utils import column_index_from_string
+    names = {str(header).strip().casefold(): idx for idx, header in reversed(list(enumerate(headers))) if header is not None}
+    if token.startswith('[') and token.endswith(']'):
+        token = token[1:-1].strip()
+    elif token.isalpha() and token.isascii():
+        try:
+            idx = column_index_from_string(token.upper()) - 1
+        except ValueError:
+            idx = None
+        if idx is not None and idx < len(headers):
+            return idx
+    idx = names.get(token.casefold())
+    if idx is None:
+        raise ValueError(f"Columna no encontrada: '{token}'")
+    return idx
+
+def parse_key_spec(spec, headers):
+    """
+    Interpreta la especificación de la clave de deduplicación.
+    Formato: columnas separadas por comas, cada una con normalizaciones opcionales tras ':' unidas con '+'.
+    Ejemplo: "A, Cliente:strip+casefold, AB:numeric".
+    Devuelve una lista de tuplas (índice de columna, [nombres de normalización]).
+    """
+    columns = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        token, _, norms = part.partition(':')
+        norm_names = [name.strip().lower() for name in norms.split('+') if name.strip()]
+        for name in norm_names:
+            if name not in KEY_NORMALIZERS:
+                raise ValueError(f"Normalización desconocida: '{name}' (disponibles: {', '.join(KEY_NORMALIZERS)})")
+        columns.append((column_index(token.strip(), headers), norm_names))
+    if not columns:
+        raise ValueError("Debe indicar al menos una columna para la clave")
+    return columns
+
+def compile_key_extractor(columns):
+    """
+    Precompila, una sola vez, la función que construye la clave de cada fila.
+    Se genera una única expresión lambda con las llamadas de normalización ya anidadas,
+    para no recorrer la especificación en cada fila.
+    Las filas más cortas que la clave (las hojas sin <dimension> no guardan las celdas vacías del final)
+    se leen como si esas celdas fueran None; las filas completas toman las columnas directamente.
+    Una sola columna produce una clave escalar; varias columnas producen una tupla.
+    """
+    namespace = {}
+    width = max(idx for idx, _ in columns) + 1
+
+    def build(cell):
+        parts = []
+        for idx, norms in columns:
+            expr = cell(idx)
+            for name in norms:
+                namespace[f"_{name}"] = KEY_NORMALIZERS[name]
+                expr = f"_{name}({expr})"
+            parts.append(expr)
+        return parts[0] if len(parts) == 1 else "(" + ", ".join(parts) + ",)"
+
+    full = build(lambda idx: f"row[{idx}]")
+    short = build(lambda idx: f"(row[{idx}] if len(row) > {idx} else None)")
+    return eval(f"lambda row: ({full}) if len(row) >= {width} else ({short})", namespace)
+
+def describe_key(columns, headers):
+    """
+    Devuelve una descripción legible de la clave (columnas y normalizaciones) para mensajes y reportes.
+    """
+    from openpyxl.utils import get_column_letter
+    parts = []
+    for idx, norms in columns:
+        text = f"{get_column_letter(idx + 1)} ({headers[idx]})"
+        if norms:
+            text += " [" + "+".join(norms) + "]"
+        parts.append(text)
+    return ", ".join(parts)
+# --- FIN SECCIÓN DE CLAVES DE DEDUPLICACIÓN ---
+
+# --- SECCIÓN DE ALMACENES DE CLAVES PARA EL WIPE ---
+def canonical_key(key):
+    """
+    Forma canónica de una clave con la misma igualdad que un set de Python: 1, 1.0, True y Decimal('1')
+    son la misma clave (y 1.5 y Decimal('1.5') también). Se aplica a cada elemento de las claves compuestas.
+    """
+    if type(key) is tuple:
+        return tuple(map(canonical_key, key))
+    if isinstance(key, (bool, int)):
+        return int(key)
+    if isinstance(key, float):
+        return int(key) if key.is_integer() else key
+    if isinstance(key, decimal.Decimal) and key.is_finite():
+        if key == key.to_integral_value():
+            return int(key)
+        return float(key) if decimal.Decimal(float(key)) == key else key
+    return key
+
+def key_to_bytes(key):
+    """
+    Serializa una clave de deduplicación a bytes de forma estable (se usa para hashes y para disco).
+    Se serializa su forma canónica (ver canonical_key), para que todos los almacenes consideren iguales
+    las mismas claves que el set.
+    """
+    return repr(canonical_key(key)).encode('utf-8')
+
+class SetKeyStore:
+    """
+    Almacén de claves exacto basado en un set de Python.
+    Es el más rápido, pero guarda el objeto completo de cada clave distinta.
+    """
+    name = 'set'
+
+    def __init__(self):
+        self._seen = set()
+        self._key_bytes = 0
+
+    def add(self, key):
+        """
+        Registra la clave y devuelve True si no se había visto antes.
+        """
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._key_bytes += sys.getsizeof(key)
+        return True
+
+    def filter(self, keys):
+        """
+        Versión por lotes de add: registra las claves de una lista en orden y devuelve una lista de booleanos
+        (True para las que no se habían visto antes). La comprobación se hace en una comprensión con los métodos
+        del set ya resueltos, sin una llamada a add por fila.
+        """
+        seen = self._seen
+        seen_add = seen.add
+        # seen_add devuelve None, así que 'k in seen or seen_add(k)' es falso solo la primera vez que aparece k
+        keep = [not (k in seen or seen_add(k)) for k in keys]
+        self._key_bytes += sum(map(sys.getsizeof, compress(keys, keep)))
+        return keep
+
+    def __len__(self):
+        return len(self._seen)
+
+    def memory_bytes(self):
+        return sys.getsizeof(self._seen) + self._key_bytes
+
+    def close(self):
+        self._seen = set()
+
+class DiskKeyStore:
+    """
+    Almacén de claves exacto que se vuelca a disco en una base SQLite temporal.
+    Sirve para columnas cuyo conjunto de claves no cabe en RAM; la memoria queda acotada por la caché de páginas.
+    """
+    name = 'disk'
+    CACHE_KB = 64 * 1024  # Tamaño máximo de la caché de páginas de SQLite
+    COMMIT_EVERY = 50_000
+
+    def __init__(self, spill_dir=None):
+        fd, self._path = tempfile.mkstemp(prefix='merge-wiper-', suffix='.keys', dir=spill_dir)
+        os.close(fd)
+        self._db = sqlite3.connect(self._path)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute(f"PRAGMA cache_size=-{self.CACHE_KB}")
+        self._db.execute("CREATE TABLE keys (k BLOB PRIMARY KEY) WITHOUT ROWID")
+        self._count = 0
+        self._pending = 0
+
+    def add(self, key):
+        """
+        Registra la clave y devuelve True si no se había visto antes.
+        """
+        cursor = self._db.execute("INSERT OR IGNORE INTO keys VALUES (?)", (key_to_bytes(key),))
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+        if cursor.rowcount:
+            self._count += 1
+            return True
+        return False
+
+    def filter(self, keys):
+        """
+        Versión por lotes de add (ver SetKeyStore.filter).
+        """
+        return list(map(self.add, keys))
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return min(os.path.getsize(self._path), self.CACHE_KB * 1024)
+
+    def disk_bytes(self):
+        return os.path.getsize(self._path)
+
+    def close(self):
+        self._db.close()
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+class HashKeyStore:
+    """
+    Almacén de claves compacto: guarda solo un digest de ancho fijo (64 o 128 bits) por clave
+    en una tabla de direccionamiento abierto respaldada por un array de enteros sin signo.
+    - Cada clave ocupa 8 o 16 bytes en lugar del objeto Python completo.
+    - Con verify=True las claves exactas se guardan además en un DiskKeyStore, que solo se consulta
+      cuando el digest ya existe, para distinguir un duplicado real de una colisión.
+    """
+    MAX_LOAD = 0.7  # Factor de carga máximo antes de duplicar la tabla
+
+    def __init__(self, digest_bits=64, verify=False, capacity=1024, spill_dir=None):
+        self.name = f'hash{digest_bits}'
+        self._words = digest_bits // 64
+        self._capacity = 1024
+        while self._capacity * self.MAX_LOAD < capacity:
+            self._capacity *= 2
+        self._table = array.array('Q', bytes(8 * self._words * self._capacity))
+        self._count = 0
+        self._exact = DiskKeyStore(spill_dir) if verify else None
+        self.collisions = 0
+
+    def _digest(self, key):
+        digest = hashlib.blake2b(key_to_bytes(key), digest_size=8 * self._words).digest()
+        # El valor 0 marca las casillas vacías de la tabla, por eso nunca se usa como digest
+        high = int.from_bytes(digest[:8], 'little') or 1
+        low = int.from_bytes(digest[8:], 'little') if self._words == 2 else 0
+        return high, low
+
+    def _insert(self, high, low):
+        """
+        Inserta un digest en la tabla (sondeo lineal). Devuelve False si ya estaba presente.
+        """
+        table = self._table
+        words = self._words
+        mask = self._capacity - 1
+        slot = high & mask
+        while True:
+            current = table[slot * words]
+            if current == 0:
+                table[slot * words] = high
+                if words == 2:
+                    table[slot * words + 1] = low
+                self._count += 1
+                if self._count > self._capacity * self.MAX_LOAD:
+                    self._grow()
+                return True
+            if current == high and (words == 1 or table[slot * words + 1] == low):
+                return False
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        old_table = self._table
+        words = self._words
+        self._capacity *= 2
+        self._table = array.array('Q', bytes(8 * words * self._capacity))
+        self._count = 0
+        for i in range(0, len(old_table), words):
+            if old_table[i]:
+                self._insert(old_table[i], old_table[i + 1] if words == 2 else 0)
+
+    def add(self, key):
+        """
+        Registra la clave y devuelve True si no se había visto antes.
+        """
+        high, low = self._digest(key)
+        if self._insert(high, low):
+            if self._exact is not None:
+                self._exact.add(key)
+            return True
+        # El digest ya existía: es un duplicado, salvo que la verificación exacta detecte una colisión
+        if self._exact is not None and self._exact.add(key):
+            self.collisions += 1
+            return True
+        return False
+
+    def filter(self, keys):
+        """
+        Versión por lotes de add (ver SetKeyStore.filter).
+        """
+        return list(map(self.add, keys))
+
+    def __len__(self):
+        return self._count + self.collisions
+
+    def memory_bytes(self):
+        exact_bytes = self._exact.memory_bytes() if self._exact is not None else 0
+        return self._table.itemsize * len(self._table) + exact_bytes
+
+    def close(self):
+        self._table = array.array('Q')
+        if self._exact is not None:
+            self._exact.close()
+
+def estimate_rows(path, sheet=None):
+    """
+    Estima el número de filas de datos de la hoja indicada (por defecto, la activa) sin recorrerla,
+    usando la dimensión declarada en el XLSX. Si el archivo no la declara (por ejemplo,
+    los generados en modo write_only de openpyxl o por este programa), la estima muestreando el XML de la hoja
+    (ver estimate_sheet_rows).
+    En los archivos CSV, Parquet y Arrow se usa estimate_table_rows.
+    """
+    if file_format(path) != 'xlsx':
+        return estimate_table_rows(path)
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        max_row = (wb[sheet] if sheet is not None else wb.active).max_row
+    finally:
+        wb.close()
+    if max_row:
+        return max_row - 1
+    return estimate_sheet_rows(path, sheet)
+
+def estimate_sheet_rows(path, sheet=None):
+    """
+    Estima las filas de datos de una hoja sin dimensión declarada: descomprime solo los primeros
+    ESTIMATE_SAMPLE_BYTES de su XML, cuenta los elementos <row> de la muestra y extrapola
+    con el tamaño sin comprimir del XML (que figura en el zip). Si la muestra es la hoja entera, la cuenta es exacta.
+    """
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(xlsx_sheet(zf, sheet)[0])
+        with zf.open(info) as fh:
+            sample = fh.read(ESTIMATE_SAMPLE_BYTES)
+    rows = sum(sample.count(tag) for tag in (b'<row ', b'<row>', b':row ', b':row>'))
+    if sample and len(sample) < info.file_size:
+        rows = rows * info.file_size // len(sample)
+    return max(rows - 1, 0)
+
+def create_key_store(backend='auto', estimated_rows=0, verify=False, spill_dir=None):
+    """
+    Crea el almacén de claves indicado. Con backend='auto' lo elige según las filas estimadas:
+    set para archivos pequeños, tabla de hashes de 64 bits para los grandes y disco para los enormes.
+    Si 'auto' elige la tabla de hashes, no se fuerza la verificación exacta (costaría más que el almacén
+    en disco): se informa de la cota de la probabilidad de colisión y verify se respeta tal como venga.
+    """
+    if backend not in KEY_STORE_BACKENDS:
+        raise ValueError(f"Almacén de claves desconocido: {backend}")
+    if backend == 'auto':
+        if estimated_rows <= KEY_STORE_SET_MAX_ROWS:
+            backend = 'set'
+        elif estimated_rows <= KEY_STORE_HASH_MAX_ROWS:
+            backend = 'hash64'
+            if not verify:
+                # Cota de la paradoja del cumpleaños: n claves en 2^64 digests
+                bound = min(1.0, estimated_rows * estimated_rows / 2 ** 65)
+                logging.info(f"Almacén de claves hash64: probabilidad de colisión ≤ {bound:.1e} "
+                             "(una colisión descartaría una fila única); use --verify-keys o --key-store disk "
+                             "para un resultado exacto")
+        else:
+            backend = 'disk'
+        logging.debug(f"Almacén de claves elegido automáticamente: {backend} (filas estimadas: {estimated_rows})")
+    if backend == 'set':
+        return SetKeyStore()
+    if backend == 'disk':
+        return DiskKeyStore(spill_dir)
+    return HashKeyStore(
+        digest_bits=64 if backend == 'hash64' else 128,
+        verify=verify,
+        capacity=estimated_rows,
+        spill_dir=spill_dir
+    )
+# --- FIN SECCIÓN DE ALMACENES DE CLAVES PARA EL WIPE ---
+
+def prepare_wipe(file, key_spec, key_store='auto', verify_keys=False, spill_dir=None, sheet=None):
+    """
+    Prepara el wipe de una hoja (por defecto, la activa): lee sus encabezados, interpreta la clave
+    y crea el almacén de claves según las filas estimadas.
+    Devuelve (encabezados, columnas de la clave, extractor de la clave, almacén de claves).
+    """
+    headers = list(header_fingerprint(file, sheet))
+    try:
+        key_columns = parse_key_spec(key_spec, headers)
+    except ValueError as e:
+        if sheet is None:
+            raise
+        raise ValueError(f"Hoja '{sheet}': {e}") from e
+    extract_key = compile_key_extractor(key_columns)
+    seen = create_key_store(key_store, estimate_rows(file, sheet), verify=verify_keys, spill_dir=spill_dir)
+    return headers, key_columns, extract_key, seen
+
+def iter_row_batches(rows, size=KEY_BATCH_ROWS):
+    """
+    Generador que agrupa las filas en listas de hasta size filas consecutivas.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def iter_unique_rows(rows, seen, extract_key):
+    """
+    Generador con las filas cuya clave no se había visto antes, en su orden original.
+    Las claves se calculan y se filtran por lotes de KEY_BATCH_ROWS filas (ver wipe_rows).
+    """
+    for batch in iter_row_batches(rows):
+        yield from compress(batch, seen.filter(list(map(extract_key, batch))))
+
+def wipe_rows(rows, seen, extract_key, ws_out, metrics):
+    """
+    Escribe en ws_out las filas cuya clave no se había visto antes, midiendo por separado
+    la lectura, la deduplicación (transform) y la escritura.
+    Trabaja por lotes de KEY_BATCH_ROWS filas: las claves de cada lote se calculan con map,
+    se filtran de una vez con seen.filter y solo se escriben las filas que sobreviven, en su orden original.
+    Devuelve (líneas leídas, líneas conservadas).
+    """
+    lines_in = 0
+    lines_out = 0
+    perf_counter = time.perf_counter
+    read_seconds = transform_seconds = write_seconds = 0.0
+    started = perf_counter()
+    for batch in iter_row_batches(rows):
+        read_done = perf_counter()
+        read_seconds += read_done - started
+        keep = seen.filter(list(map(extract_key, batch)))
+        transform_done = perf_counter()
+        transform_seconds += transform_done - read_done
+        for row in compress(batch, keep):
+            ws_out.append(row)
+            lines_out += 1
+        lines_in += len(batch)
+        started = perf_counter()
+        write_seconds += started - transform_done
+    read_seconds += perf_counter() - started  # Fin del iterador
+    metrics.add('read', read_seconds, lines_in)
+    metrics.add('transform', transform_seconds, lines_in)
+    metrics.add('write', write_seconds, lines_out)
+    return lines_in, lines_out
+
+def wipe_file(file, output_path, key_spec, key_store='auto', verify_keys=False, engine='openpyxl',
+              compression=OUTPUT_COMPRESSION, metrics=None, sheets=None, workers=1, wipe_engine='rows'):
+    """
+    Motor de wipe en streaming.
+    - Lee el archivo en modo solo lectura, fila a fila, una única vez.
+    - Filtra los duplicados según la clave indicada en key_spec (una o varias columnas, con
+      normalizaciones opcionales; ver parse_key_spec) y escribe las filas conservadas
+      directamente con el escritor XLSX en streaming (XlsxStreamWriter, nivel de compresión compression)
+      o con el del formato de la salida (ver open_writer).
+    - Con sheets (lista de nombres o patrones), purga cada hoja seleccionada por separado
+      y genera una salida con una hoja por cada una (ver wipe_sheets).
+    - Con wipe_engine='arrow', las entradas Parquet/Arrow se purgan con el motor columnar (ver wipe_arrow_file);
+      si no se puede usar, se avisa y se sigue el camino fila a fila.
+    Lo único que crece es el almacén de claves ya vistas, elegido según el tamaño estimado del archivo.
+    Con metrics (PhaseMetrics) se acumulan los tiempos de las fases validate, read, transform (deduplicación) y write.
+    Devuelve un diccionario con las líneas leídas, las conservadas (ambas sin encabezado)
+    y el almacén de claves utilizado con su consumo de memoria.
+    """
+    metrics = metrics if metrics is not None else PhaseMetrics()
+    if wipe_engine == 'arrow':
+        if sheets:
+            logging.warning("⚠️ El motor de wipe arrow no admite la selección de hojas (--sheets); se usa el wipe fila a fila")
+        else:
+            stats = wipe_arrow_file(file, output_path, key_spec, compression, metrics)
+            if stats is not None:
+                return stats
+    if sheets:
+        return wipe_sheets(file, output_path, sheets, key_spec, key_store, verify_keys, engine, compression,
+                           metrics, workers)
+    with metrics.phase('validate'):
+        headers, key_columns, extract_key, seen = prepare_wipe(
+            file, key_spec, key_store, verify_keys, spill_dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        with open_writer(output_path, compression) as ws_out:
+            ws_out.append(headers)  # Siempre guarda el encabezado
+            lines_in, lines_out = wipe_rows(iter_data_rows(file, engine), seen, extract_key, ws_out, metrics)
+            with metrics.phase('write'):
+                ws_out.close()
+        return {
+            'lines_in': lines_in,
+            'lines_out': lines_out,
+            'key': describe_key(key_columns, headers),
+            'key_store': seen.name,
+            'key_store_mb': round(seen.memory_bytes() / (1024*1024), 2),
+            'wipe_engine': 'rows'
+        }
+    finally:
+        seen.close()
+
+# --- SECCIÓN DE WIPE COLUMNAR (MOTOR VECTORIZADO PARA PARQUET/ARROW) ---
+def arrow_key_supported(field_type):
+    """
+    Indica si una columna de Arrow de ese tipo puede formar parte de la clave del motor columnar: tipos cuya igualdad
+    en Arrow es la misma que la de sus valores en Python (enteros, textos, booleanos, fechas y marcas de tiempo
+    hasta microsegundos). Los decimales quedan fuera (NaN y -0.0 se agrupan distinto que en un set).
+    """
+    pa = _import_pyarrow()
+    if pa.types.is_timestamp(field_type):
+        return field_type.unit != 'ns'
+    return (pa.types.is_integer(field_type) or pa.types.is_string(field_type) or pa.types.is_large_string(field_type)
+            or pa.types.is_boolean(field_type) or pa.types.is_date(field_type))
+
+def arrow_first_occurrences(keys):
+    """
+    Recibe las columnas de la clave completas (lista de ChunkedArray de Arrow, una por columna de la clave) y devuelve
+    un array booleano de NumPy con True en la primera fila de cada clave distinta (los nulos cuentan como un valor,
+    igual que None en la tupla de la clave).
+    Las claves se agrupan de una vez con la tabla de hashes de Arrow (group_by sobre todas las columnas, en C++)
+    tomando el índice mínimo de cada grupo; no se crea ningún objeto Python por fila.
+    """
+    pa = _import_pyarrow()
+    try:
+        import numpy
+    except ImportError:
+        raise ValueError("El motor de wipe arrow (--wipe-engine arrow) necesita numpy (pip install numpy)")
+    count = len(keys[0])
+    # Nombres sintéticos: la misma columna puede aparecer dos veces en la clave
+    names = [f'key{i}' for i in range(len(keys))]
+    table = pa.table({**dict(zip(names, keys)), 'row': pa.array(numpy.arange(count, dtype=numpy.int64))})
+    first_rows = table.group_by(names, use_threads=False).aggregate([('row', 'min')]).column('row_min')
+    keep = numpy.zeros(count, dtype=bool)
+    keep[first_rows.to_numpy()] = True
+    return keep
+
+def wipe_arrow_file(file, output_path, key_spec, compression=OUTPUT_COMPRESSION, metrics=None):
+    """
+    Motor de wipe columnar (--wipe-engine arrow) para entradas Parquet/Arrow con una clave de una o varias
+    columnas sin normalizaciones y de tipos admitidos (ver arrow_key_supported):
+    - Primera pasada: lee solo las columnas de la clave (en Parquet, sin leer el resto de columnas)
+      y marca la primera fila de cada clave con arrow_first_occurrences.
+    - Segunda pasada: filtra cada lote con su tramo de la máscara (batch.filter) y solo convierte a filas
+      de Python las que sobreviven, en su orden original.
+    El resultado es el mismo que el del wipe fila a fila (se conserva la primera fila de cada clave).
+    Devuelve el mismo diccionario que wipe_file, o None (tras avisar del motivo) si el archivo o la clave
+    no admiten este motor.
+    """
+    metrics = metrics if metrics is not None else PhaseMetrics()
+
+    def fallback(reason):
+        logging.warning(f"⚠️ Motor de wipe arrow no disponible para {os.path.basename(file)}: {reason}; "
+                        "se usa el wipe fila a fila")
+
+    if file_format(file) not in ('parquet', 'arrow'):
+        fallback("solo admite entradas Parquet/Arrow")
+        return None
+    with metrics.phase('validate'):
+        pa = _import_pyarrow()
+        headers = list(header_fingerprint(file))
+        key_columns = parse_key_spec(key_spec, headers)
+        schema, _ = _open_arrow(file)
+        if any(transforms for _, transforms in key_columns):
+            fallback("la clave usa normalizaciones")
+            return None
+        unsupported = [schema.names[idx] for idx, _ in key_columns if not arrow_key_supported(schema.field(idx).type)]
+        if unsupported:
+            fallback(f"tipo de columna no admitido en la clave ({', '.join(unsupported)}; "
+                     "use texto, entero, booleano o fecha)")
+            return None
+        indexes = [idx for idx, _ in key_columns]
+        names = [schema.names[idx] for idx in indexes]
+        # En Parquet se leen solo las columnas de la clave (si sus nombres no están repetidos)
+        unique_names = all(schema.names.count(name) == 1 for name in names)
+        columns = list(dict.fromkeys(names)) if file_format(file) == 'parquet' and unique_names else None
+    started = time.perf_counter()
+    _, batches = _open_arrow(file, columns)
+    key_batches = [[] for _ in indexes]
+    for batch in batches:
+        for chunks, idx, name in zip(key_batches, indexes, names):
+            chunks.append(batch.column(name) if columns else batch.column(idx))
+    keys = [pa.chunked_array(chunks, type=schema.field(idx).type) for chunks, idx in zip(key_batches, indexes)]
+    metrics.add('read', time.perf_counter() - started, len(keys[0]))
+    with metrics.phase('transform', len(keys[0])):
+        keep = arrow_first_occurrences(keys)
+    lines_out = 0
+    with open_writer(output_path, compression) as ws_out:
+        ws_out.append(headers)  # Siempre guarda el encabezado
+        offset = 0
+        _, batches = _open_arrow(file)
+        while True:
+            # La espera a cada lote cuenta como lectura (sin filas: ya se contaron en la primera pasada)
+            with metrics.phase('read'):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            with metrics.phase('transform'):
+                survivors = batch.filter(pa.array(keep[offset:offset + batch.num_rows]))
+                offset += batch.num_rows
+            with metrics.phase('write', survivors.num_rows):
+                values = [column.to_pylist() for column in survivors.columns]
+                for row in zip(*values) if values else [()] * survivors.num_rows:
+                    ws_out.append(row)
+            lines_out += survivors.num_rows
+        with metrics.phase('write'):
+            ws_out.close()
+    return {
+        'lines_in': len(keep),
+        'lines_out': lines_out,
+        'key': describe_key(key_columns, headers),
+        'key_store': 'arrow',
+        'key_store_mb': round(keep.nbytes / (1024*1024), 2),
+        'wipe_engine': 'arrow'
+    }
+# --- FIN SECCIÓN DE WIPE COLUMNAR ---
+
+def wipe_sheet_to_spool(file, sheet, key_spec, key_store, verify_keys, engine, spool_dir):
+    """
+    Tarea de un worker del pool de procesos para el wipe multihoja.
+    Purga una hoja y vuelca las filas conservadas en un segmento temporal (spool) dentro de spool_dir.
+    Devuelve un diccionario con la ruta del spool, las líneas leídas y conservadas, la clave,
+    el almacén de claves utilizado y el tiempo empleado por el worker.
+    """
+    start_time = time.time()
+    headers, key_columns, extract_key, seen = prepare_wipe(file, key_spec, key_store, verify_keys, spool_dir, sheet)
+    try:
+        counts = {'lines_in': 0}
+
+        def counted_rows():
+            for row in iter_data_rows(file, engine, sheet):
+                counts['lines_in'] += 1
+                yield row
+
+        fd, spool_path = tempfile.mkstemp(suffix='.spool', dir=spool_dir)
+        os.close(fd)
+        lines_out = write_segment(iter_unique_rows(counted_rows(), seen, extract_key), spool_path)
+        return {
+            'sheet': sheet,
+            'headers': headers,
+            'spool': spool_path,
+            'lines_in': counts['lines_in'],
+            'lines_out': lines_out,
+            'key': describe_key(key_columns, headers),
+            'key_store': seen.name,
+            'key_store_mb': round(seen.memory_bytes() / (1024*1024), 2),
+            'pid': os.getpid(),
+            'seconds': round(time.time() - start_time, 2)
+        }
+    finally:
+        seen.close()
+
+def wipe_sheets(file, output_path, sheets, key_spec, key_store='auto', verify_keys=False, engine='openpyxl',
+                compression=OUTPUT_COMPRESSION, metrics=None, workers=1):
+    """
+    Wipe multihoja: purga por separado cada hoja del archivo que coincide con sheets (cada una con su
+    propio almacén de claves) y escribe una hoja de salida por cada una, con el mismo nombre.
+    Con workers > 1 las hojas se purgan en paralelo en un pool de procesos (cada una hacia un spool)
+    y se escriben en el orden del libro.
+    Devuelve el mismo diccionario que wipe_file, sumando las líneas de todas las hojas y con el detalle por hoja.
+    """
+    row_metrics = metrics  # None sin reporte: las filas se copian sin medir (ver append_rows)
+    metrics = metrics if metrics is not None else PhaseMetrics()
+    with metrics.phase('validate'):
+        selected = select_sheets(list_sheets(file), sheets)
+        if not selected:
+            raise ValueError(f"Ninguna hoja de {os.path.basename(file)} coincide con: {', '.join(sheets)}")
+    spill_dir = os.path.dirname(os.path.abspath(output_path))
+    sheet_stats = {}
+    stats = {'lines_in': 0, 'lines_out': 0, 'worker_timings': {}, 'sheets': sheet_stats}
+    keys = []
+    stores = []
+    store_mb = 0.0
+
+    def record(sheet, lines_in, lines_out, key, store_name, mb):
+        nonlocal store_mb
+        sheet_stats[sheet] = {'files': 1, 'lines_in': lines_in, 'lines_out': lines_out}
+        stats['lines_in'] += lines_in
+        stats['lines_out'] += lines_out
+        keys.append(f"{sheet}: {key}")
+        if store_name not in stores:
+            stores.append(store_name)
+        store_mb += mb
+
+    with open_writer(output_path, compression) as ws_out:
+        if workers > 1 and len(selected) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with tempfile.TemporaryDirectory(prefix='merge-wiper-', dir=spill_dir) as spool_dir:
+                with ProcessPoolExecutor(max_workers=min(workers, len(selected))) as pool:
+                    futures = [pool.submit(wipe_sheet_to_spool, file, sheet, key_spec, key_store, verify_keys,
+                                           engine, spool_dir) for sheet in selected]
+                    for future in futures:
+                        with metrics.phase('read'):
+                            result = future.result()
+                        ws_out.add_sheet(result['sheet'])
+                        ws_out.append(result['headers'])
+                        append_rows(ws_out, iter_segment(result['spool']), metrics=row_metrics)
+                        os.remove(result['spool'])
+                        stats['worker_timings'][f"{file} [{result['sheet']}]"] = {'pid': result['pid'], 'seconds': result['seconds']}
+                        record(result['sheet'], result['lines_in'], result['lines_out'], result['key'],
+                               result['key_store'], result['key_store_mb'])
+        else:
+            for sheet in selected:
+                with metrics.phase('validate'):
+                    headers, key_columns, extract_key, seen = prepare_wipe(file, key_spec, key_store, verify_keys,
+                                                                           spill_dir, sheet)
+                try:
+                    ws_out.add_sheet(sheet)
+                    ws_out.append(headers)
+                    lines_in, lines_out = wipe_rows(iter_data_rows(file, engine, sheet), seen, extract_key, ws_out, metrics)
+                    record(sheet, lines_in, lines_out, describe_key(key_columns, headers), seen.name,
+                           round(seen.memory_bytes() / (1024*1024), 2))
+                finally:
+                    seen.close()
+        with metrics.phase('write'):
+            ws_out.close()
+    stats.update(key="; ".join(keys), key_store=", ".join(stores), key_store_mb=round(store_mb, 2))
+    return stats
+
+# --- SECCIÓN DE MERGE CON DEDUPLICACIÓN (MERGE + WIPE EN UNA SOLA OPERACIÓN) ---
+KEEP_POLICIES = ('first', 'last', 'newest')  # Fila que se conserva entre las que comparten clave
+
+def parse_keep_policy(spec, headers=None):
+    """
+    Interpreta la política que decide qué fila se conserva entre las que comparten clave:
+    - 'first': la primera, en el orden de los archivos (como el wipe).
+    - 'last': la última.
+    - 'newest:COLUMNA': la de mayor valor en esa columna (por ejemplo, una fecha de modificación), con
+      normalizaciones opcionales como en la clave ('newest:Fecha:date'); en caso de empate, la última.
+    Sin headers solo se valida el formato.
+    Devuelve (política, extractor del valor de comparación o None, descripción legible).
+    """
+    policy, _, column = str(spec).strip().partition(':')
+    policy = policy.strip().lower()
+    column = column.strip()
+    if policy not in KEEP_POLICIES:
+        raise ValueError(f"Política de conservación desconocida: '{spec}' (use first, last o newest:COLUMNA)")
+    if policy != 'newest':
+        if column:
+            raise ValueError(f"La política '{policy}' no admite columna: '{spec}'")
+        return policy, None, policy
+    if not column:
+        raise ValueError("La política 'newest' necesita una columna: newest:COLUMNA")
+    if headers is None:
+        return policy, None, f"newest ({column})"
+    rank_columns = parse_key_spec(column, headers)
+    if len(rank_columns) != 1:
+        raise ValueError("La política 'newest' admite una sola columna")
+    return policy, compile_key_extractor(rank_columns), f"newest ({describe_key(rank_columns, headers)})"
+
+def iter_merge_sources(files, spool_dir, workers=1, engine='openpyxl', projections=None, metrics=None,
+                       worker_timings=None, prefetch=0):
+    """
+    Generador que devuelve, en el orden de los archivos, (archivo, filas) con las filas de datos de cada uno
+    ya proyectadas al esquema de salida. Las filas de un archivo deben consumirse antes de pedir el siguiente.
+    Con workers > 1 los archivos se parsean en paralelo a spools (ver parse_files) y el tiempo de cada
+    worker se anota en worker_timings; si no, con prefetch > 0 los siguientes archivos se copian a disco local
+    mientras se procesa el actual (ver prefetch_files).
+    """
+    projections = projections or {}
+    metrics = metrics if metrics is not None else PhaseMetrics()
+    if workers > 1 and len(files) > 1:
+        parsed = parse_files(files, spool_dir, workers, engine)
+        # La espera a los workers cuenta como lectura
+        results = metrics.timed('read', parsed)
+        try:
+            for result in results:
+                if worker_timings is not None:
+                    worker_timings[result['file']] = {'pid': result['pid'], 'seconds': result['seconds']}
+                project = projections.get(result['file'])
+                rows = iter_segment(result['spool'])
+                yield result['file'], map(project, rows) if project is not None else rows
+                os.remove(result['spool'])
+        finally:
+            results.close()
+            parsed.close()
+    else:
+        fetched = prefetch_files(files, prefetch)
+        results = metrics.timed('read', fetched)
+        try:
+            for file, local_path in results:
+                logging.debug(f"Procesando archivo: {file}")
+                project = projections.get(file)
+                rows = iter_data_rows(local_path, engine)
+                yield file, map(project, rows) if project is not None else rows
+        finally:
+            results.close()
+            fetched.close()
+
+def track_winners(rows, winners, extract_key, extract_rank, position, metrics):
+    """
+    Generador de la primera pasada de dedup_files con keep='last' o 'newest': devuelve las filas sin cambios
+    (para volcarlas al spool) y anota en winners, para cada clave, la posición global de la fila ganadora.
+    position es la posición global de la primera fila.
+    - Con extract_rank=None gana la última fila de cada clave y winners guarda solo su posición.
+    - Si no, gana la de mayor valor de comparación (las celdas vacías son las más antiguas y los empates
+      los gana la última) y winners guarda (posición, valor).
+    Mide por separado la lectura y la comparación (transform).
+    """
+    perf_counter = time.perf_counter
+    read_seconds = transform_seconds = 0.0
+    count = 0
+    started = perf_counter()
+    try:
+        for row in rows:
+            read_done = perf_counter()
+            read_seconds += read_done - started
+            key = extract_key(row)
+            if extract_rank is None:
+                winners[key] = position
+            else:
+                rank = extract_rank(row)
+                best = winners.get(key)
+                try:
+                    if best is None or best[1] is None or (rank is not None and rank >= best[1]):
+                        winners[key] = (position, rank)
+                except TypeError:
+                    raise ValueError(f"No se pueden comparar los valores {best[1]!r} y {rank!r} de la columna de "
+                                     f"'newest' (use una normalización como ':date' o ':numeric')") from None
+            position += 1
+            count += 1
+            transform_seconds += perf_counter() - read_done
+            yield row
+            started = perf_counter()
+        read_seconds += perf_counter() - started  # Fin del iterador
+    finally:
+        metrics.add('read', read_seconds, count)
+        metrics.add('transform', transform_seconds, count)
+
+def dedup_files(files, output_path, key_spec, keep='first', key_store='auto', verify_keys=False, workers=1,
+                schema='strict', engine='openpyxl', compression=OUTPUT_COMPRESSION, metrics=None, prefetch=0):
+    """
+    Merge + wipe en una sola operación: las filas de todos los archivos pasan por un único filtro de
+    duplicados según la clave y se escriben una sola vez, sin escribir ni volver a parsear un merge intermedio.
+    - Las columnas se alinean como en el merge (schema) y la clave se interpreta sobre los encabezados de salida.
+    - keep='first' filtra en streaming, en una pasada, con el almacén de claves del wipe (key_store).
+    - keep='last' o 'newest:COLUMNA' solo pueden decidir tras ver todas las filas: la primera pasada vuelca
+      las filas a spools temporales mientras anota la fila ganadora de cada clave (en un diccionario en memoria)
+      y la segunda escribe solo las ganadoras, en su orden original.
+    - Con workers > 1 los archivos se parsean en paralelo y, si no, con prefetch > 0 se leen por adelantado,
+      como en el merge.
+    Devuelve un diccionario con las líneas leídas y los duplicados eliminados por archivo, las líneas escritas,
+    la clave, la política de conservación y el almacén de claves utilizado con su consumo de memoria.
+    """
+    metrics = metrics if metrics is not None else PhaseMetrics()
+    spill_dir = os.path.dirname(os.path.abspath(output_path))
+    with metrics.phase('validate'):
+        headers, projections = merge_schema(files, schema)
+        key_columns = parse_key_spec(key_spec, headers)
+        extract_key = compile_key_extractor(key_columns)
+        policy, extract_rank, keep_text = parse_keep_policy(keep, headers)
+        seen = None
+        if policy == 'first':
+            estimated_rows = sum(estimate_rows(file) for file in files)
+            seen = create_key_store(key_store, estimated_rows, verify=verify_keys, spill_dir=spill_dir)
+    stats = {'file_lines': {}, 'duplicates': {}, 'lines_in': 0, 'lines_out': 0, 'worker_timings': {},
+             'columns': len(headers), 'key': describe_key(key_columns, headers), 'keep': keep_text}
+    try:
+        with tempfile.TemporaryDirectory(prefix='merge-wiper-', dir=spill_dir) as spool_dir:
+            sources = iter_merge_sources(files, spool_dir, workers, engine, projections, metrics,
+                                         stats['worker_timings'], prefetch)
+            try:
+                with open_writer(output_path, compression) as ws_out:
+                    ws_out.append(headers)
+                    if seen is not None:
+                        for file, rows in sources:
+                            lines_in, lines_out = wipe_rows(rows, seen, extract_key, ws_out, metrics)
+                            stats['file_lines'][file] = lines_in
+                            stats['duplicates'][file] = lines_in - lines_out
+                        stats['key_store'] = seen.name
+                        stats['key_store_mb'] = round(seen.memory_bytes() / (1024*1024), 2)
+                    else:
+                        # Primera pasada: spool de cada archivo y posición de la fila ganadora de cada clave
+                        winners = {}
+                        spooled = []
+                        position = 0
+                        for file, rows in sources:
+                            fd, segment_path = tempfile.mkstemp(suffix='.seg', dir=spool_dir)
+                            os.close(fd)
+                            count = write_segment(
+                                track_winners(rows, winners, extract_key, extract_rank, position, metrics), segment_path)
+                            spooled.append((file, segment_path, position, count))
+                            stats['file_lines'][file] = count
+                            position += count
+                        stats['key_store'] = 'dict'
+                        stats['key_store_mb'] = round(
+                            (sys.getsizeof(winners) + sum(map(sys.getsizeof, winners))) / (1024*1024), 2)
+                        # Las ganadoras se marcan en un mapa de bytes (uno por fila) y el diccionario se libera
+                        keep_rows = bytearray(position)
+                        for winner in winners.values():
+                            keep_rows[winner if extract_rank is None else winner[0]] = 1
+                        winners = None
+                        # Segunda pasada: solo las filas ganadoras, en su orden original
+                        for file, segment_path, offset, count in spooled:
+                            flags = keep_rows[offset:offset + count]
+                            start_time = time.perf_counter()
+                            lines_out = append_rows(ws_out, compress(iter_segment(segment_path), flags))
+                            metrics.add('write', time.perf_counter() - start_time, lines_out)
+                            os.remove(segment_path)
+                            stats['duplicates'][file] = count - lines_out
+                    with metrics.phase('write'):
+                        ws_out.close()
+            finally:
+                sources.close()
+    finally:
+        if seen is not None:
+            seen.close()
+    stats['lines_in'] = sum(stats['file_lines'].values())
+    stats['lines_out'] = stats['lines_in'] - sum(stats['duplicates'].values())
+    return stats
+# --- FIN SECCIÓN DE MERGE CON DEDUPLICACIÓN ---
+
+# --- SECCIÓN DE REPORTES DETALLADOS ---
+METRICS_SAMPLE_SECONDS = 0.05  # Intervalo de muestreo de la memoria (pico de RSS) durante una operación
+METRICS_PHASES = ('validate', 'read', 'transform', 'write', 'verify')  # Fases medidas, en orden de reporte
+METRICS_BATCH_ROWS = 1000  # Filas por lote al medir las fases de la copia de filas (ver _append_rows_timed)
+
+def rss_with_children(process):
+    """
+    Memoria residente (RSS) del proceso más la de sus procesos hijos (workers del pool), en bytes.
+    """
+    import psutil
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.Error:
+            pass  # El worker terminó entre la consulta y la lectura
+    return rss
+
+class ResourceSampler:
+    """
+    Muestreador en segundo plano: cada METRICS_SAMPLE_SECONDS lee la memoria del proceso (y de sus workers)
+    y guarda el pico, que una medición antes/después no ve si la memoria se libera antes del final.
+    """
+
+    def __init__(self, process):
+        import threading
+        self.process = process
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+
+    def _run(self):
+        import psutil
+        while True:
+            try:
+                self.peak_rss = max(self.peak_rss, rss_with_children(self.process))
+            except psutil.Error:
+                return  # El proceso observado ya terminó
+            if self._stop.wait(METRICS_SAMPLE_SECONDS):
+                return
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Detiene el muestreo (con una última muestra) y devuelve el pico de memoria en bytes.
+        """
+        self._stop.set()
+        self._thread.join()
+        return self.peak_rss
+
+class PhaseMetrics:
+    """
+    Tiempos por fase de una operación (validate, read, transform, write, verify) y filas procesadas en cada una.
+    En el procesamiento en streaming las fases se intercalan fila a fila, por lo que se acumulan
+    los tiempos de cada fase en lugar de medir intervalos consecutivos.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.rows = {}
+
+    def add(self, name, seconds, rows=0):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.rows[name] = self.rows.get(name, 0) + rows
+
+    @contextmanager
+    def phase(self, name, rows=0):
+        """
+        Mide el tiempo del bloque y lo suma a la fase indicada.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_time, rows)
+
+    def timed(self, name, iterable):
+        """
+        Envuelve un iterador y suma a la fase indicada solo el tiempo que se pasa esperando cada elemento.
+        """
+        iterator = iter(iterable)
+        perf_counter = time.perf_counter
+        seconds = 0.0
+        count = 0
+        try:
+            while True:
+                start_time = perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += perf_counter() - start_time
+                count += 1
+                yield item
+        finally:
+            self.add(name, seconds, count)
+
+    def as_dict(self):
+        """
+        Devuelve las fases medidas, en el orden de METRICS_PHASES, con sus segundos, filas y filas por segundo.
+        """
+        names = [name for name in METRICS_PHASES if name in self.seconds]
+        names += [name for name in self.seconds if name not in METRICS_PHASES]
+        phases = {}
+        for name in names:
+            seconds = self.seconds[name]
+            rows = self.rows[name]
+            phases[name] = {
+                'seconds': round(seconds, 3),
+                'rows': rows,
+                'rows_per_second': round(rows / seconds) if rows and seconds > 0 else None
+            }
+        return phases
+
+def start_measurement(enabled=True):
+    """
+    Inicia la medición de tiempo y, si está activada, de recursos: un muestreador en segundo plano
+    registra el pico de memoria y se guarda el tiempo de CPU inicial.
+    psutil solo se importa cuando la medición está activada.
+    """
+    snapshot = {'start_time': time.time(), 'process': None, 'phases': PhaseMetrics(), 'enabled': enabled}
+    if enabled:
+        import psutil
+        snapshot['process'] = psutil.Process(os.getpid())
+        snapshot['ram_before'] = snapshot['process'].memory_info().rss
+        snapshot['cpu_before'] = process_cpu_seconds(snapshot['process'])
+        snapshot['sampler'] = ResourceSampler(snapshot['process']).start()
+    return snapshot
+
+def job_metrics(snapshot):
+    """
+    Métricas por fase que se pasan a los motores: las de la medición en curso o None si está desactivada
+    (sin reporte ni --metrics-out), para que la copia de filas no mida nada (ver append_rows).
+    """
+    return snapshot['phases'] if snapshot['enabled'] else None
+
+def process_cpu_seconds(process):
+    """
+    Tiempo de CPU consumido por el proceso y por sus procesos hijos ya terminados (workers del pool), en segundos.
+    """
+    times = process.cpu_times()
+    return times.user + times.system + getattr(times, 'children_user', 0) + getattr(times, 'children_system', 0)
+
+def stop_measurement(snapshot):
+    """
+    Finaliza la medición iniciada con start_measurement y devuelve los datos para el reporte:
+    duración, tiempos por fase y, si se midieron recursos, pico de memoria, memoria usada
+    (pico menos memoria inicial, nunca negativa) y tiempo y porcentaje de CPU.
+    """
+    elapsed = time.time() - snapshot['start_time']
+    measurement = {'duration': round(elapsed, 2), 'phases': snapshot['phases'].as_dict()}
+    if snapshot['process'] is not None:
+        peak_rss = max(snapshot['sampler'].stop(), snapshot['process'].memory_info().rss)
+        measurement['ram_peak_mb'] = round(peak_rss / (1024*1024), 2)
+        measurement['ram_used_mb'] = round(max(peak_rss - snapshot['ram_before'], 0) / (1024*1024), 2)
+        # CPU medio de la operación (100 % = un núcleo ocupado todo el tiempo), no una muestra instantánea del sistema
+        cpu_seconds = process_cpu_seconds(snapshot['process']) - snapshot['cpu_before']
+        measurement['cpu_seconds'] = round(cpu_seconds, 2)
+        measurement['cpu_percent'] = round(100 * cpu_seconds / elapsed, 1) if elapsed > 0 else 0.0
+    return measurement
+
+def print_report(report_data):
+    """
+    Imprime un reporte detallado de la operación realizada, incluyendo estadísticas y uso de recursos.
+    """
+    print_separator()
+    print(Fore.GREEN + Style.BRIGHT + "📊 REPORTE DETALLADO DE LA OPERACIÓN")
+    print_separator()
+    print(Fore.CYAN + f"Archivos procesados: {report_data.get('files_processed', '-')}")
+    # Mostrar líneas por archivo si está disponible
+    file_lines = report_data.get('file_lines', None)
+    if file_lines:
+        print(Fore.BLUE + "Líneas procesadas por archivo:")
+        for fname, lines in file_lines.items():
+            print(Fore.BLUE + f"  - {os.path.basename(fname)}: {lines} líneas")
+    # Mostrar los duplicados eliminados de cada archivo en el merge con deduplicación
+    duplicates = report_data.get('duplicates', None)
+    if duplicates:
+        print(Fore.BLUE + "Duplicados eliminados por archivo:")
+        for fname, count in duplicates.items():
+            print(Fore.BLUE + f"  - {os.path.basename(fname)}: {count} duplicados")
+    # Mostrar el tiempo de cada worker si se usó el modo paralelo
+    worker_timings = report_data.get('worker_timings', None)
+    if worker_timings:
+        print(Fore.BLUE + f"Tiempo de parseo por worker ({report_data.get('workers', '-')} workers):")
+        for fname, timing in worker_timings.items():
+            print(Fore.BLUE + f"  - {os.path.basename(fname)} (PID {timing['pid']}): {timing['seconds']} segundos")
+    # Mostrar líneas al inicio y al final con textos personalizados
+    print(Fore.CYAN + f"Líneas al inicio: {report_data.get('lines_in_text', '-')}")
+    print(Fore.CYAN + f"Líneas al final: {report_data.get('lines_out_text', '-')}")
+    print(Fore.CYAN + f"Tiempo total de operación: {report_data.get('duration', '-')} segundos")
+    # Mostrar el tiempo de cada fase (acumulado) y su ritmo en filas por segundo
+    phases = report_data.get('phases', None)
+    if phases:
+        print(Fore.BLUE + "Tiempo por fase:")
+        for name, phase in phases.items():
+            rate = f" ({phase['rows_per_second']} filas/s)" if phase['rows_per_second'] else ""
+            print(Fore.BLUE + f"  - {name}: {phase['seconds']} segundos{rate}")
+    print(Fore.CYAN + f"Tamaño del archivo de salida: {report_data.get('output_size_kb', '-')} KB")
+    print(Fore.CYAN + f"Ruta del archivo de salida: {report_data.get('output_path', '-')}")
+    print(Fore.CYAN + f"Carpeta de destino: {report_data.get('output_folder', '-')}")
+    print(Fore.CYAN + f"Memoria RAM utilizada: {report_data.get('ram_used_mb', '-')} MB (pico: {report_data.get('ram_peak_mb', '-')} MB)")
+    if 'engine' in report_data:
+        print(Fore.CYAN + f"Motor de lectura: {report_data['engine']}")
+    # Mostrar el detalle por hoja en los trabajos multihoja
+    sheets = report_data.get('sheets', None)
+    if sheets:
+        print(Fore.BLUE + f"Hojas procesadas ({len(sheets)}):")
+        for sheet, sheet_stats in sheets.items():
+            print(Fore.BLUE + f"  - {sheet}: {sheet_stats['files']} archivo(s), "
+                              f"{sheet_stats['lines_in']} líneas -> {sheet_stats['lines_out']} líneas")
+    if 'schema' in report_data:
+        print(Fore.CYAN + f"Esquema de columnas: {report_data['schema']}")
+    if report_data.get('cache_hits') is not None:
+        print(Fore.CYAN + f"Caché incremental: {report_data['cache_hits']} aciertos, {report_data['cache_misses']} fallos (archivos parseados)")
+    if report_data.get('resumed_files'):
+        print(Fore.CYAN + f"Merge reanudado: {report_data['resumed_files']} archivo(s) recuperados del diario (sin volver a parsear)")
+    if 'key' in report_data:
+        print(Fore.CYAN + f"Clave de deduplicación: {report_data['key']}")
+    if 'keep' in report_data:
+        print(Fore.CYAN + f"Fila conservada entre duplicados: {report_data['keep']}")
+    if 'key_store' in report_data:
+        print(Fore.CYAN + f"Almacén de claves: {report_data['key_store']} ({report_data.get('key_store_mb', '-')} MB)")
+    if 'wipe_engine' in report_data:
+        print(Fore.CYAN + f"Motor del wipe: {report_data['wipe_engine']}")
+    print(Fore.CYAN + f"Porcentaje de CPU utilizado: {report_data.get('cpu_percent', '-')} %")
+    print_separator()
+    print(Fore.YELLOW + "✅ Operación finalizada. Revise el archivo generado y los detalles anteriores para más información.")
+
+def build_metrics(job, report_data):
+    """
+    Reúne las métricas de un trabajo terminado en un diccionario plano, apto para exportar.
+    """
+    return {
+        'job': job['name'],
+        'operation': job['type'],
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'duration_seconds': report_data['duration'],
+        'rows_in': report_data['lines_in'],
+        'rows_out': report_data['lines_out'],
+        'output_bytes': os.path.getsize(report_data['output_path']),
+        'peak_rss_mb': report_data.get('ram_peak_mb'),
+        'ram_used_mb': report_data.get('ram_used_mb') if report_data.get('ram_used_mb') != '-' else None,
+        'cpu_seconds': report_data.get('cpu_seconds'),
+        'cpu_percent': report_data.get('cpu_percent') if report_data.get('cpu_percent') != '-' else None,
+        'phases': report_data.get('phases', {})
+    }
+
+def _prometheus_labels(labels):
+    """
+    Formatea las etiquetas de una métrica Prometheus, escapando sus valores.
+    """
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+def format_prometheus(metrics):
+    """
+    Convierte las métricas de un trabajo al formato de texto de Prometheus (para el textfile collector de node_exporter).
+    """
+    labels = {'job_name': metrics['job'], 'operation': metrics['operation']}
+    lines = []
+
+    def gauge(name, help_text, samples):
+        samples = [(sample_labels, value) for sample_labels, value in samples if value is not None]
+        if not samples:
+            return
+        lines.append(f"# HELP merge_wiper_{name} {help_text}")
+        lines.append(f"# TYPE merge_wiper_{name} gauge")
+        for sample_labels, value in samples:
+            lines.append(f"merge_wiper_{name}{_prometheus_labels(sample_labels)} {value}")
+
+    peak_rss = metrics['peak_rss_mb']
+    gauge('duration_seconds', "Duración total del trabajo.", [(labels, metrics['duration_seconds'])])
+    gauge('rows_in', "Filas de datos leídas.", [(labels, metrics['rows_in'])])
+    gauge('rows_out', "Filas de datos escritas.", [(labels, metrics['rows_out'])])
+    gauge('output_bytes', "Tamaño del archivo de salida.", [(labels, metrics['output_bytes'])])
+    gauge('peak_rss_bytes', "Pico de memoria residente (proceso y workers).",
+          [(labels, int(peak_rss * 1024 * 1024) if peak_rss is not None else None)])
+    gauge('cpu_seconds', "Tiempo de CPU consumido (proceso y workers).", [(labels, metrics['cpu_seconds'])])
+    phases = metrics['phases']
+    gauge('phase_seconds', "Tiempo acumulado por fase.",
+          [({**labels, 'phase': name}, phase['seconds']) for name, phase in phases.items()])
+    gauge('phase_rows', "Filas procesadas por fase.",
+          [({**labels, 'phase': name}, phase['rows']) for name, phase in phases.items()])
+    gauge('phase_rows_per_second', "Filas por segundo por fase.",
+          [({**labels, 'phase': name}, phase['rows_per_second']) for name, phase in phases.items()])
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(path, metrics):
+    """
+    Exporta las métricas de un trabajo a path: en formato de texto de Prometheus si la extensión es .prom,
+    en JSON en cualquier otro caso. Se escribe en un temporal y se renombra, para que un recolector
+    nunca lea un archivo a medias.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=folder)
+    with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+        if path.lower().endswith('.prom'):
+            fh.write(format_prometheus(metrics))
+        else:
+            json.dump(metrics, fh, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+# --- FIN SECCIÓN DE REPORTES DETALLADOS ---
+
+# --- SECCIÓN DE EJECUCIÓN DE TRABAJOS (MERGE / WIPE / DEDUP SIN INTERACCIÓN) ---
+# Opciones por defecto de cada trabajo; el menú interactivo, la línea de comandos y los archivos de trabajos las comparten
+JOB_TYPES = ('merge', 'wipe', 'dedup')  # dedup: merge + wipe en una sola operación (ver dedup_files)
+JOB_DEFAULTS = {
+    'workers': 1,
+    'key_store': 'auto',
+    'verify_keys': False,
+    'report': True,
+    'incremental': False,
+    'resume': False,
+    'prefetch': 0,
+    'schema': 'strict',
+    'engine': 'openpyxl',
+    'wipe_engine': 'rows',
+    'compression': OUTPUT_COMPRESSION,
+    'metrics_out': None,
+    'sheets': None,
+}
+
+def run_merge(job):
+    """
+    Ejecuta un trabajo de merge ya validado, sin interacción con el usuario.
+    Verifica los encabezados, combina los archivos y mide recursos y tiempo.
+    Devuelve los datos del reporte detallado; lanza una excepción si la operación falla.
+    """
+    files = job['inputs']
+    output_path = job['output']
+    workers = job['workers']
+    # --- INICIO MEDICIÓN DE RECURSOS Y TIEMPO ---
+    snapshot = start_measurement(job['report'] or bool(job['metrics_out']))
+    try:
+        with snapshot['phases'].phase('validate'):
+            # En modo multihoja los encabezados se verifican hoja por hoja dentro del merge
+            strict = job['schema'] == 'strict' and not job['sheets']
+            mismatches = find_header_mismatches(files, workers) if strict else []
+        if mismatches:
+            names = ", ".join(os.path.basename(path) for path in mismatches)
+            raise ValueError(f"{len(mismatches)} archivo(s) con encabezados diferentes a los de {os.path.basename(files[0])}: {names}")
+        # Merge en streaming: una sola pasada por archivo, contando mientras se copia
+        stats = merge_files(files, output_path, workers, job['incremental'], job['schema'], job['engine'],
+                            job['compression'], job_metrics(snapshot), job['sheets'], job['resume'], job['prefetch'])
+    finally:
+        # --- FIN MEDICIÓN DE RECURSOS Y TIEMPO ---
+        measurement = stop_measurement(snapshot)
+    file_lines = stats['file_lines']
+    lines_out = stats['lines_out']
+    total_lines_in = sum(file_lines.values())
+    output_size_kb = os.path.getsize(output_path) // 1024
+    output_folder = os.path.dirname(output_path)
+    # Prepara los datos para el reporte detallado
+    return {
+        'files_processed': len(files),
+        'file_lines': file_lines,
+        'lines_in': total_lines_in,
+        'lines_in_text': f"{total_lines_in} Líneas Totales (antes de merge)",
+        'lines_out': lines_out,
+        'lines_out_text': f"{lines_out} Líneas combinadas (sin duplicados de encabezado)",
+        'duration': measurement['duration'],
+        'output_size_kb': output_size_kb,
+        'output_path': output_path,
+        'output_folder': output_folder,
+        'ram_used_mb': measurement.get('ram_used_mb', '-'),
+        'ram_peak_mb': measurement.get('ram_peak_mb', '-'),
+        'cpu_percent': measurement.get('cpu_percent', '-'),
+        'cpu_seconds': measurement.get('cpu_seconds'),
+        'phases': measurement['phases'],
+        'workers': workers,
+        'worker_timings': stats['worker_timings'],
+        'schema': f"{job['schema']} ({stats['columns']} columnas)",
+        'engine': job['engine'],
+        'sheets': stats.get('sheets'),
+        'cache_hits': stats.get('cache_hits'),
+        'cache_misses': stats.get('cache_misses'),
+        'resumed_files': stats.get('resumed_files')
+    }
+
+def run_wipe(job):
+    """
+    Ejecuta un trabajo de wipe ya validado, sin interacción con el usuario.
+    Elimina los duplicados según la clave del trabajo y mide recursos y tiempo.
+    Devuelve los datos del reporte detallado; lanza una excepción si la operación falla.
+    """
+    file = job['input']
+    output_path = job['output']
+    # --- INICIO MEDICIÓN DE RECURSOS Y TIEMPO ---
+    snapshot = start_measurement(job['report'] or bool(job['metrics_out']))
+    try:
+        stats = wipe_file(file, output_path, job['key'], job['key_store'], job['verify_keys'], job['engine'],
+                          job['compression'], job_metrics(snapshot), job['sheets'], job['workers'], job['wipe_engine'])
+    finally:
+        # --- FIN MEDICIÓN DE RECURSOS Y TIEMPO ---
+        measurement = stop_measurement(snapshot)
+    total_lines_in = stats['lines_in']
+    lines_out = stats['lines_out']
+    output_size_kb = os.path.getsize(output_path) // 1024
+    output_folder = os.path.dirname(output_path)
+    lines_removed = total_lines_in - lines_out
+    # Prepara los datos para el reporte detallado
+    return {
+        'files_processed': 1,
+        'file_lines': {file: total_lines_in},
+        'lines_in': total_lines_in,
+        'lines_in_text': f"{total_lines_in} Líneas Totales (antes de purgar)",
+        'lines_out': lines_out,
+        'lines_out_text': f"{lines_out} Líneas después del Wipe - {lines_removed} duplicados eliminados",
+        'duration': measurement['duration'],
+        'output_size_kb': output_size_kb,
+        'output_path': output_path,
+        'output_folder': output_folder,
+        'ram_used_mb': measurement.get('ram_used_mb', '-'),
+        'ram_peak_mb': measurement.get('ram_peak_mb', '-'),
+        'cpu_percent': measurement.get('cpu_percent', '-'),
+        'cpu_seconds': measurement.get('cpu_seconds'),
+        'phases': measurement['phases'],
+        'key': stats['key'],
+        'key_store': stats['key_store'],
+        'key_store_mb': stats['key_store_mb'],
+        'engine': job['engine'],
+        'wipe_engine': stats.get('wipe_engine', 'rows'),
+        'sheets': stats.get('sheets'),
+        'workers': job['workers'],
+        'worker_timings': stats.get('worker_timings')
+    }
+
+def run_dedup(job):
+    """
+    Ejecuta un trabajo de merge con deduplicación (merge + wipe en una sola operación) ya validado,
+    sin interacción con el usuario. Verifica los encabezados, combina los archivos filtrando los duplicados
+    según la clave y la política de conservación del trabajo, y mide recursos y tiempo.
+    Devuelve los datos del reporte detallado; lanza una excepción si la operación falla.
+    """
+    files = job['inputs']
+    output_path = job['output']
+    workers = job['workers']
+    # --- INICIO MEDICIÓN DE RECURSOS Y TIEMPO ---
+    snapshot = start_measurement(job['report'] or bool(job['metrics_out']))
+    try:
+        with snapshot['phases'].phase('validate'):
+            mismatches = find_header_mismatches(files, workers) if job['schema'] == 'strict' else []
+        if mismatches:
+            names = ", ".join(os.path.basename(path) for path in mismatches)
+            raise ValueError(f"{len(mismatches)} archivo(s) con encabezados diferentes a los de {os.path.basename(files[0])}: {names}")
+        stats = dedup_files(files, output_path, job['key'], job['keep'], job['key_store'], job['verify_keys'], workers,
+                            job['schema'], job['engine'], job['compression'], job_metrics(snapshot), job['prefetch'])
+    finally:
+        # --- FIN MEDICIÓN DE RECURSOS Y TIEMPO ---
+        measurement = stop_measurement(snapshot)
+    total_lines_in = stats['lines_in']
+    lines_out = stats['lines_out']
+    output_size_kb = os.path.getsize(output_path) // 1024
+    output_folder = os.path.dirname(output_path)
+    lines_removed = total_lines_in - lines_out
+    # Prepara los datos para el reporte detallado
+    return {
+        'files_processed': len(files),
+        'file_lines': stats['file_lines'],
+        'duplicates': stats['duplicates'],
+        'lines_in': total_lines_in,
+        'lines_in_text': f"{total_lines_in} Líneas Totales (antes de merge)",
+        'lines_out': lines_out,
+        'lines_out_text': f"{lines_out} Líneas combinadas - {lines_removed} duplicados eliminados",
+        'duration': measurement['duration'],
+        'output_size_kb': output_size_kb,
+        'output_path': output_path,
+        'output_folder': output_folder,
+        'ram_used_mb': measurement.get('ram_used_mb', '-'),
+        'ram_peak_mb': measurement.get('ram_peak_mb', '-'),
+        'cpu_percent': measurement.get('cpu_percent', '-'),
+        'cpu_seconds': measurement.get('cpu_seconds'),
+        'phases': measurement['phases'],
+        'workers': workers,
+        'worker_timings': stats['worker_timings'],
+        'schema': f"{job['schema']} ({stats['columns']} columnas)",
+        'engine': job['engine'],
+        'key': stats['key'],
+        'keep': stats['keep'],
+        'key_store': stats['key_store'],
+        'key_store_mb': stats['key_store_mb']
+    }
+
+def execute_job(job):
+    """
+    Ejecuta un trabajo (merge, wipe o dedup) ya validado y devuelve los datos de su reporte.
+    Resuelve sus archivos de entrada y crea la carpeta de salida si todavía no existe.
+    Si el trabajo indica 'metrics_out', exporta allí sus métricas ('{name}' se sustituye por el nombre del trabajo).
+    """
+    job = resolve_job_inputs(job)
+    output_folder = os.path.dirname(os.path.abspath(job['output']))
+    os.makedirs(output_folder, exist_ok=True)
+    if job['type'] == 'merge':
+        report_data = run_merge(job)
+    elif job['type'] == 'dedup':
+        report_data = run_dedup(job)
+    else:
+        report_data = run_wipe(job)
+    if job['metrics_out']:
+        metrics_path = job['metrics_out'].replace('{name}', job['name'])
+        write_metrics(metrics_path, build_metrics(job, report_data))
+        logging.debug(f"Métricas exportadas a: {metrics_path}")
+    return report_data
+
+def resolve_inputs(patterns, base_dir=None):
+    """
+    Convierte una lista de rutas, carpetas y patrones glob en la lista de archivos a procesar.
+    - Las carpetas aportan todos sus archivos .xlsx, .csv, .parquet, .arrow y .feather (ordenados por nombre).
+    - Los patrones admiten '**' para buscar de forma recursiva.
+    - Las rutas relativas se interpretan desde base_dir (por defecto, la carpeta actual).
+    Las carpetas y patrones se recorren con os.scandir (ver scan_input_files y scan_glob).
+    Conserva el orden indicado y descarta repetidos.
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    files = []
+    found = set()
+    for pattern in patterns:
+        pattern = os.path.expanduser(str(pattern))
+        if base_dir and not os.path.isabs(pattern):
+            pattern = os.path.join(base_dir, pattern)
+        if os.path.isdir(pattern):
+            matches = scan_input_files(pattern)
+        elif glob.has_magic(pattern):
+            matches = [f for f in scan_glob(pattern) if f.lower().endswith(tuple(FILE_FORMATS))]
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            raise ValueError(f"Archivo no encontrado: {pattern}")
+        if not matches:
+            raise ValueError(f"No se encontraron archivos ({', '.join(FILE_FORMATS)}) para: {pattern}")
+        for match in matches:
+            if match not in found:
+                found.add(match)
+                files.append(match)
+    return files
+
+def normalize_job(job, base_dir=None, number=1):
+    """
+    Valida un trabajo descrito como diccionario (línea de comandos o archivo de trabajos),
+    completa las opciones por defecto y resuelve sus rutas de entrada y salida.
+    Lanza ValueError con un mensaje legible si el trabajo no es válido.
+    """
+    job = {**JOB_DEFAULTS, **job}
+    job_type = job.get('type')
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"Trabajo {number}: el tipo debe ser 'merge', 'wipe' o 'dedup' (recibido: {job_type!r})")
+    job.setdefault('name', f"{job_type}-{number}")
+    if not job.get('output'):
+        raise ValueError(f"Trabajo '{job['name']}': falta la ruta de salida ('output')")
+    output = os.path.expanduser(str(job['output']))
+    if base_dir and not os.path.isabs(output):
+        output = os.path.join(base_dir, output)
+    job['output'] = output
+    if job['metrics_out']:
+        metrics_out = os.path.expanduser(str(job['metrics_out']))
+        if base_dir and not os.path.isabs(metrics_out):
+            metrics_out = os.path.join(base_dir, metrics_out)
+        job['metrics_out'] = metrics_out
+    if not isinstance(job['workers'], int) or job['workers'] < 1:
+        raise ValueError(f"Trabajo '{job['name']}': 'workers' debe ser un número entero mayor o igual a 1")
+    if not isinstance(job['prefetch'], int) or job['prefetch'] < 0:
+        raise ValueError(f"Trabajo '{job['name']}': 'prefetch' debe ser un número entero mayor o igual a 0")
+    if job['schema'] not in SCHEMA_MODES:
+        raise ValueError(f"Trabajo '{job['name']}': esquema desconocido: {job['schema']} (use {', '.join(SCHEMA_MODES)})")
+    if job['sheets']:
+        sheets = job['sheets'].split(',') if isinstance(job['sheets'], str) else job['sheets']
+        job['sheets'] = [str(sheet).strip() for sheet in sheets if str(sheet).strip()]
+        if job['incremental']:
+            raise ValueError(f"Trabajo '{job['name']}': el merge incremental no admite la selección de hojas ('sheets')")
+        if job['resume']:
+            raise ValueError(f"Trabajo '{job['name']}': el merge reanudable ('resume') no admite la selección de hojas ('sheets')")
+    if job['incremental'] and job['resume']:
+        raise ValueError(f"Trabajo '{job['name']}': 'incremental' y 'resume' no se pueden combinar")
+    if job_type == 'dedup' and (job['sheets'] or job['incremental'] or job['resume']):
+        raise ValueError(f"Trabajo '{job['name']}': el merge con deduplicación no admite 'sheets', 'incremental' ni 'resume'")
+    if not isinstance(job['compression'], int) or not 0 <= job['compression'] <= 9:
+        raise ValueError(f"Trabajo '{job['name']}': 'compression' debe ser un número entero entre 0 y 9")
+    if job['engine'] not in READ_ENGINES:
+        raise ValueError(f"Trabajo '{job['name']}': motor de lectura desconocido: {job['engine']} (use {', '.join(READ_ENGINES)})")
+    if job['key_store'] not in KEY_STORE_BACKENDS:
+        raise ValueError(f"Trabajo '{job['name']}': almacén de claves desconocido: {job['key_store']}")
+    if job['wipe_engine'] not in WIPE_ENGINES:
+        raise ValueError(f"Trabajo '{job['name']}': motor de wipe desconocido: {job['wipe_engine']} (use {', '.join(WIPE_ENGINES)})")
+    job['base_dir'] = base_dir
+    if job_type in ('merge', 'dedup'):
+        job['inputs'] = job.get('inputs') or job.get('input')
+        if not job['inputs']:
+            raise ValueError(f"Trabajo '{job['name']}': no se indicaron archivos de entrada ('inputs')")
+    else:
+        job['input'] = job.get('input') or job.get('inputs')
+        if not job['input']:
+            raise ValueError(f"Trabajo '{job['name']}': falta el archivo de entrada ('input')")
+        if not job.get('key'):
+            raise ValueError(f"Trabajo '{job['name']}': falta la clave de deduplicación ('key')")
+        job['key'] = str(job['key'])
+    if job_type == 'dedup':
+        if not job.get('key'):
+            raise ValueError(f"Trabajo '{job['name']}': falta la clave de deduplicación ('key')")
+        job['key'] = str(job['key'])
+        job['keep'] = str(job.get('keep') or 'first')
+        try:
+            parse_keep_policy(job['keep'])
+        except ValueError as e:
+            raise ValueError(f"Trabajo '{job['name']}': {e}") from e
+    return job
+
+def resolve_job_inputs(job):
+    """
+    Resuelve las rutas, carpetas y patrones de entrada de un trabajo en la lista de archivos a procesar.
+    Se hace justo antes de ejecutarlo, para que un trabajo pueda usar la salida de uno anterior.
+    """
+    job = dict(job)
+    if job['type'] in ('merge', 'dedup'):
+        job['inputs'] = resolve_inputs(job['inputs'], job.get('base_dir'))
+    else:
+        inputs = resolve_inputs(job['input'], job.get('base_dir'))
+        if len(inputs) != 1:
+            raise ValueError(f"Trabajo '{job['name']}': el wipe necesita exactamente un archivo de entrada ('input')")
+        job['input'] = inputs[0]
+    return job
+
+def load_job_file(path, options=None):
+    """
+    Lee un archivo de trabajos en JSON o YAML (.yml/.yaml, requiere PyYAML) y devuelve la lista de trabajos validados.
+    Estructura: {"defaults": {...opciones...}, "jobs": [{"type": "merge", "inputs": [...], "output": "..."}, ...]}
+    (también se acepta directamente la lista de trabajos). Las rutas relativas se resuelven desde la carpeta del archivo.
+    Cada opción se toma del trabajo, si no de "defaults" del archivo y, por último, de options (línea de comandos).
+    """
+    with open(path, encoding='utf-8') as fh:
+        text = fh.read()
+    if path.lower().endswith(('.yml', '.yaml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Para leer archivos de trabajos YAML instale PyYAML (pip install pyyaml) o use JSON")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, list):
+        data = {'jobs': data}
+    if not isinstance(data, dict) or not isinstance(data.get('jobs'), list) or not data['jobs']:
+        raise ValueError("El archivo de trabajos debe contener una lista 'jobs' con al menos un trabajo")
+    defaults = {**(options or {}), **(data.get('defaults') or {})}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return [normalize_job({**defaults, **job}, base_dir, number) for number, job in enumerate(data['jobs'], 1)]
+
+def run_jobs(jobs, fail_fast=False):
+    """
+    Ejecuta los trabajos uno tras otro en el mismo proceso y muestra el reporte de cada uno.
+    Devuelve el código de salida: EXIT_OK si todos terminaron bien, EXIT_PARTIAL si alguno falló
+    y EXIT_FAILURE si fallaron todos (o el primero, con fail_fast).
+    """
+    results = []
+    for job in jobs:
+        print_menu_title(f"Trabajo {job['name']} ({job['type'].upper()})")
+        try:
+            report_data = execute_job(job)
+            if job['report']:
+                print_report(report_data)
+            results.append((job, True, report_data['duration']))
+        except Exception as e:
+            logging.error(f"❌ Error en el trabajo '{job['name']}': {e}")
+            results.append((job, False, None))
+            if fail_fast:
+                break
+    print_separator()
+    print(Fore.GREEN + Style.BRIGHT + "📋 RESUMEN DE TRABAJOS")
+    print_separator()
+    for job, ok, duration in results:
+        if ok:
+            print(Fore.GREEN + f"✔ {job['name']} ({job['type']}): {duration} segundos -> {job['output']}")
+        else:
+            print(Fore.RED + f"❌ {job['name']} ({job['type']}): falló")
+    skipped = len(jobs) - len(results)
+    if skipped:
+        print(Fore.YELLOW + f"⏭ {skipped} trabajo(s) sin ejecutar por --fail-fast")
+    failed = sum(1 for _, ok, _ in results if not ok) + skipped
+    if not failed:
+        return EXIT_OK
+    return EXIT_FAILURE if failed == len(jobs) else EXIT_PARTIAL
+# --- FIN SECCIÓN DE EJECUCIÓN DE TRABAJOS ---
+
+# --- SECCIÓN DE BENCHMARK (GENERADOR SINTÉTICO Y COMPARACIÓN CON LÍNEA BASE) ---
+BENCH_VERSION = 1  # Versión del formato del archivo de resultados del benchmark
+BENCH_COLUMN_TYPES = ('int', 'float', 'str', 'date', 'bool')  # Tipos de columna del generador sintético
+BENCH_OPERATIONS = ('merge', 'wipe')
+BENCH_TOLERANCE = 0.15  # Empeoramiento relativo admitido frente a la línea base antes de marcarlo como regresión
+BENCH_RECENT_ROWS = 1000  # Filas recientes entre las que el generador elige las duplicadas
+
+def generate_workbook(path, rows, columns=8, types=BENCH_COLUMN_TYPES, cardinality=1000, dup_ratio=0.0,
+                      seed=0, compression=OUTPUT_COMPRESSION):
+    """
+    Genera un archivo XLSX sintético para el benchmark, en streaming (sin mantener las filas en memoria).
+    - La primera columna ('ID') es un identificador entero único por fila original.
+    - El resto de columnas toma, en ciclo, los tipos indicados en types; los textos se eligen entre
+      cardinality valores distintos.
+    - Con probabilidad dup_ratio, una fila repite exactamente una de las últimas filas generadas,
+      de modo que un wipe por 'ID' elimina aproximadamente esa proporción de filas.
+    Devuelve el número de filas de datos escritas.
+    """
+    import random
+    rng = random.Random(seed)
+    column_types = [types[idx % len(types)] for idx in range(columns - 1)]
+    headers = ['ID'] + [f"{column_type}_{idx + 2}" for idx, column_type in enumerate(column_types)]
+    base_date = datetime.datetime(2020, 1, 1)
+    generators = {
+        'int': lambda: rng.randrange(1000000),
+        'float': lambda: round(rng.uniform(0, 10000), 2),
+        'str': lambda: f"valor-{rng.randrange(cardinality)}",
+        'date': lambda: base_date + datetime.timedelta(days=rng.randrange(3650)),
+        'bool': lambda: rng.random() < 0.5,
+    }
+    makers = [generators[column_type] for column_type in column_types]
+    recent = []
+    next_id = 1
+    with XlsxStreamWriter(path, compression) as ws_out:
+        ws_out.append(headers)
+        for _ in range(rows):
+            if recent and rng.random() < dup_ratio:
+                row = rng.choice(recent)
+            else:
+                row = [next_id] + [make() for make in makers]
+                next_id += 1
+                if len(recent) < BENCH_RECENT_ROWS:
+                    recent.append(row)
+                else:
+                    recent[rng.randrange(BENCH_RECENT_ROWS)] = row
+            ws_out.append(row)
+    return rows
+
+def run_bench_case(command):
+    """
+    Ejecuta una operación del benchmark como proceso independiente (la misma línea de comandos que usaría
+    un usuario) y muestrea su memoria, incluida la de sus workers, mientras dura.
+    Devuelve el tiempo total y el pico de memoria residente (RSS) en bytes.
+    """
+    import subprocess
+    import psutil
+    start_time = time.perf_counter()
+    child = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    sampler = ResourceSampler(psutil.Process(child.pid)).start()
+    stderr = child.communicate()[1].decode('utf-8', 'replace')
+    seconds = time.perf_counter() - start_time
+    peak_rss = sampler.stop()
+    if child.returncode != EXIT_OK:
+        raise RuntimeError(f"La ejecución terminó con código {child.returncode}: {stderr.strip()[-500:]}")
+    return seconds, peak_rss
+
+def run_benchmark(config, work_dir):
+    """
+    Ejecuta el benchmark descrito en config sobre archivos sintéticos generados en work_dir.
+    Para cada tamaño (filas por archivo) genera los archivos de entrada y mide cada operación
+    (merge de todos los archivos, wipe por 'ID' del primero) con cada motor de lectura.
+    Con repeat > 1 se conserva el mejor tiempo y el mayor pico de memoria.
+    Devuelve la lista de resultados (un diccionario por caso).
+    """
+    results = []
+    script = os.path.abspath(__file__)
+    for rows in config['rows']:
+        inputs = []
+        for number in range(config['files']):
+            path = os.path.join(work_dir, f"bench-{rows}-{number + 1}.xlsx")
+            generate_workbook(path, rows, config['columns'], config['types'], config['cardinality'],
+                              config['dup_ratio'], seed=number, compression=config['compression'])
+            inputs.append(path)
+        for operation in config['operations']:
+            for engine in config['engines']:
+                case = f"{operation}-{engine}-{rows}"
+                output_path = os.path.join(work_dir, f"{case}-out.xlsx")
+                if operation == 'merge':
+                    command = [sys.executable, script, 'merge', *inputs, '-o', output_path]
+                    rows_in = rows * len(inputs)
+                else:
+                    command = [sys.executable, script, 'wipe', inputs[0], '-o', output_path, '-k', 'ID']
+                    rows_in = rows
+                command += ['--engine', engine, '--workers', str(config['workers']),
+                            '--compression', str(config['compression']), '--no-report']
+                timings = [run_bench_case(command) for _ in range(config['repeat'])]
+                seconds = min(seconds for seconds, _ in timings)
+                result = {
+                    'case': case,
+                    'operation': operation,
+                    'engine': engine,
+                    'rows': rows_in,
+                    'seconds': round(seconds, 3),
+                    'rows_per_second': round(rows_in / seconds) if seconds else None,
+                    'peak_rss_mb': round(max(rss for _, rss in timings) / (1024*1024), 1),
+                    'output_kb': os.path.getsize(output_path) // 1024
+                }
+                logging.debug(f"Benchmark {case}: {result['seconds']} s, {result['rows_per_second']} filas/s, "
+                              f"{result['peak_rss_mb']} MB")
+                results.append(result)
+    return results
+
+def compare_with_baseline(results, baseline, tolerance=BENCH_TOLERANCE):
+    """
+    Compara los resultados con los de una línea base (mismo formato) caso a caso.
+    Un caso es una regresión si su tiempo o su pico de memoria empeoran más que tolerance (relativo).
+    Devuelve la lista de comparaciones con los cocientes actual/base y si hay regresión.
+    """
+    previous = {result['case']: result for result in baseline.get('results', [])}
+    comparisons = []
+    for result in results:
+        base = previous.get(result['case'])
+        if not base:
+            continue
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] else 1.0
+        rss_ratio = result['peak_rss_mb'] / base['peak_rss_mb'] if base['peak_rss_mb'] else 1.0
+        comparisons.append({
+            'case': result['case'],
+            'time_ratio': round(time_ratio, 3),
+            'rss_ratio': round(rss_ratio, 3),
+            'regression': time_ratio > 1 + tolerance or rss_ratio > 1 + tolerance
+        })
+    return comparisons
+
+def print_bench_results(results, comparisons):
+    """
+    Muestra la tabla de resultados del benchmark y, si hay línea base, la comparación con ella.
+    """
+    print_separator()
+    print(Fore.GREEN + Style.BRIGHT + "⏱ RESULTADOS DEL BENCHMARK")
+    print_separator()
+    for result in results:
+        print(Fore.CYAN + f"{result['case']:<28} {result['seconds']:>9.3f} s {result['rows_per_second'] or 0:>10} filas/s "
+                          f"{result['peak_rss_mb']:>8} MB RSS {result['output_kb']:>9} KB")
+    if comparisons:
+        print_separator()
+        print(Fore.GREEN + Style.BRIGHT + "📈 COMPARACIÓN CON LA LÍNEA BASE (actual / base)")
+        print_separator()
+        for comparison in comparisons:
+            color = Fore.RED if comparison['regression'] else Fore.GREEN
+            mark = "❌ regresión" if comparison['regression'] else "✔"
+            print(color + f"{comparison['case']:<28} tiempo x{comparison['time_ratio']:<6} memoria x{comparison['rss_ratio']:<6} {mark}")
+
+def parse_bench_list(text, cast=str, choices=None):
+    """
+    Convierte una lista separada por comas de la línea de comandos ("1000,10000") en una lista de valores.
+    Lanza ValueError si algún valor no es válido.
+    """
+    values = [cast(item.strip()) for item in str(text).split(',') if item.strip()]
+    if not values:
+        raise ValueError(f"Lista vacía: {text!r}")
+    if choices is not None:
+        unknown = [value for value in values if value not in choices]
+        if unknown:
+            raise ValueError(f"Valores desconocidos: {', '.join(map(str, unknown))} (use {', '.join(choices)})")
+    return values
+
+def bench_command(args):
+    """
+    Subcomando 'bench': genera las entradas sintéticas, ejecuta el benchmark, guarda los resultados
+    en JSON y, si se indica una línea base, la compara con ella.
+    Devuelve EXIT_FAILURE si se detecta alguna regresión.
+    """
+    config = {
+        'rows': parse_bench_list(args.rows, int),
+        'files': args.files,
+        'columns': args.columns,
+        'types': parse_bench_list(args.types, choices=BENCH_COLUMN_TYPES),
+        'cardinality': args.cardinality,
+        'dup_ratio': args.dup_ratio,
+        'operations': parse_bench_list(args.operations, choices=BENCH_OPERATIONS),
+        'engines': parse_bench_list(args.engines, choices=READ_ENGINES),
+        'workers': args.workers,
+        'compression': args.compression,
+        'repeat': args.repeat,
+    }
+    if min(config['rows']) < 1 or config['files'] < 1 or config['columns'] < 1 or config['repeat'] < 1:
+        raise ValueError("Las filas, archivos, columnas y repeticiones del benchmark deben ser mayores que 0")
+    if not 0 <= config['dup_ratio'] < 1:
+        raise ValueError("--dup-ratio debe estar entre 0 y 1")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+    import platform
+    if args.work_dir:
+        os.makedirs(args.work_dir, exist_ok=True)
+        results = run_benchmark(config, args.work_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix='merge-wiper-bench-') as work_dir:
+            results = run_benchmark(config, work_dir)
+    comparisons = compare_with_baseline(results, baseline, args.tolerance) if baseline else []
+    report = {
+        'version': BENCH_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': config,
+        'results': results,
+        'comparisons': comparisons
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+    print_bench_results(results, comparisons)
+    if any(comparison['regression'] for comparison in comparisons):
+        return EXIT_FAILURE
+    return EXIT_OK
+# --- FIN SECCIÓN DE BENCHMARK ---
+
+def merge_xlsx(options=None):
+    """
+    Función principal para combinar (merge) varios archivos XLSX en uno solo.
+    - Solicita al usuario los archivos a combinar.
+    - Verifica que tengan la misma estructura.
+    - Copia los datos de todos los archivos en uno nuevo (en paralelo si workers > 1).
+    - Mide recursos y tiempo, y muestra un reporte detallado.
+    """
+    print_menu_title("Función MERGE - Consolidar archivos XLSX")
+    options = {**JOB_DEFAULTS, **(options or {})}
+    files = ask_file_paths(
+        "Selecciona los archivos XLSX a combinar (varios archivos con misma estructura):",
+        multiple=True,
+        allow_file_dialog=True
+    )
+    if files is None:
+        return  # Volver al menú principal
+    if not files:
+        print(Fore.RED + "⚠ No se seleccionaron archivos para combinar. Operación cancelada.")
+        return
+    if options['schema'] == 'strict' and not check_same_headers(files, options['workers']):
+        print(Fore.RED + "❌ Los archivos seleccionados no tienen los mismos encabezados. Operación cancelada.")
+        return
+    output_path = ask_output_path("merge_result")
+    if output_path is None:
+        return  # Volver al menú principal
+    try:
+        report_data = execute_job({**options, 'type': 'merge', 'inputs': files, 'output': output_path})
+        print(Fore.GREEN + f"\n🎉 Archivos combinados exitosamente en: {output_path}")
+        if options['report']:
+            print_report(report_data)
+    except Exception as e:
+        logging.error(f"❌ Error al combinar archivos: {e}")
+
+def ask_key_spec(headers):
+    """
+    Muestra las columnas disponibles y pide al usuario la columna (o columnas) que forman la clave
+    de valores únicos, hasta que indique una clave válida.
+    Devuelve la clave indicada, o None si el usuario eligió volver al menú principal.
+    """
+    from openpyxl.utils import get_column_letter
+    # Muestra las columnas disponibles y sus encabezados
+    print(Fore.BLUE + "\nColumnas disponibles en el archivo:")
+    for idx, header in enumerate(headers):
+        col_letter = get_column_letter(idx + 1)
+        print(f"  Columna {col_letter} - {header}")
+    # Solicita al usuario la columna (o columnas) que forman la clave de valores únicos
+    print(Fore.YELLOW + "Puede indicar varias columnas separadas por comas (letras como A o AB, o nombres de encabezado)")
+    print(Fore.YELLOW + f"y normalizaciones opcionales tras ':' unidas con '+' ({', '.join(KEY_NORMALIZERS)}).")
+    print(Fore.YELLOW + "Ejemplo: A, Cliente:strip+casefold, AB:numeric")
+    while True:
+        key_spec = input(Fore.WHITE + "¿Qué columna(s) contienen los valores únicos? (columnas, 'm' menú, 'q' salir): ").strip()
+        if key_spec.lower() == 'm':
+            print(Fore.YELLOW + "↩ Volviendo al menú principal...")
+            return None
+        if key_spec.lower() == 'q':
+            print(Fore.YELLOW + "⏹ Cerrando la aplicación. ¡Hasta pronto!")
+            sys.exit(0)
+        if not key_spec:
+            print(Fore.RED + "⚠ Debe ingresar al menos una columna (ejemplo: A, B, C...).")
+            continue
+        try:
+            key_columns = parse_key_spec(key_spec, headers)
+            print(Fore.GREEN + f"✔ Clave seleccionada: {describe_key(key_columns, headers)}")
+            return key_spec
+        except ValueError as e:
+            print(Fore.RED + f"❌ {e}. Intente nuevamente.")
+
+def wipe_xlsx(options=None):
+    """
+    Función principal para eliminar duplicados de un archivo XLSX.
+    - Solicita al usuario el archivo a purgar.
+    - Pide la columna (o columnas) que forman la clave de valores únicos.
+    - Elimina filas duplicadas según esa clave.
+    - Mide recursos y tiempo, y muestra un reporte detallado.
+    """
+    print_menu_title("Función WIPE - Eliminar duplicados en archivo XLSX")
+    options = {**JOB_DEFAULTS, **(options or {})}
+    files = ask_file_paths(
+        "Selecciona el archivo XLSX a purgar (archivo unico):",
+        multiple=False,
+        allow_file_dialog=True
+    )
+    if files is None:
+        return  # Volver al menú principal
+    if not files:
+        print(Fore.RED + "⚠ No se seleccionó archivo para purgar. Operación cancelada.")
+        return
+    file = files[0]
+    try:
+        # Lee solo los encabezados (modo solo lectura) para que el usuario elija la columna
+        key_spec = ask_key_spec(list(header_fingerprint(file)))
+        if key_spec is None:
+            return  # Volver al menú principal
+        # La salida se pide antes de procesar: las filas se escriben directamente mientras se leen
+        output_path = ask_output_path("wipe_result")
+        if output_path is None:
+            return  # Volver al menú principal
+        report_data = execute_job({**options, 'type': 'wipe', 'input': file, 'key': key_spec, 'output': output_path})
+        print(Fore.GREEN + f"\n🧹 Archivo purgado exitosamente en: {output_path}")
+        if options['report']:
+            print_report(report_data)
+    except Exception as e:
+        logging.error(f"❌ Error al purgar archivo: {e}")
+
+def dedup_xlsx(options=None):
+    """
+    Función principal para combinar varios archivos XLSX eliminando a la vez los duplicados (merge + wipe).
+    - Solicita al usuario los archivos a combinar y verifica que tengan la misma estructura.
+    - Pide la clave de valores únicos y qué fila conservar entre las duplicadas (primera, última o más reciente).
+    - Escribe una sola vez el resultado, sin generar un merge intermedio.
+    - Mide recursos y tiempo, y muestra un reporte detallado con los duplicados de cada archivo.
+    """
+    print_menu_title("Función MERGE + WIPE - Combinar sin duplicados")
+    options = {**JOB_DEFAULTS, **(options or {})}
+    files = ask_file_paths(
+        "Selecciona los archivos XLSX a combinar sin duplicados (varios archivos con misma estructura):",
+        multiple=True,
+        allow_file_dialog=True
+    )
+    if files is None:
+        return  # Volver al menú principal
+    if not files:
+        print(Fore.RED + "⚠ No se seleccionaron archivos para combinar. Operación cancelada.")
+        return
+    if options['schema'] == 'strict' and not check_same_headers(files, options['workers']):
+        print(Fore.RED + "❌ Los archivos seleccionados no tienen los mismos encabezados. Operación cancelada.")
+        return
+    try:
+        # La clave se elige sobre los encabezados de salida (ya alineados si el esquema no es strict)
+        headers, _ = merge_schema(files, options['schema'])
+        key_spec = ask_key_spec(headers)
+        if key_spec is None:
+            return  # Volver al menú principal
+        while True:
+            keep = input(Fore.WHITE + "¿Qué fila conservar entre las duplicadas? "
+                                      "(first, last o newest:COLUMNA; Enter = first): ").strip() or 'first'
+            try:
+                _, _, keep_text = parse_keep_policy(keep, headers)
+                print(Fore.GREEN + f"✔ Fila conservada: {keep_text}")
+                break
+            except ValueError as e:
+                print(Fore.RED + f"❌ {e}. Intente nuevamente.")
+        output_path = ask_output_path("dedup_result")
+        if output_path is None:
+            return  # Volver al menú principal
+        report_data = execute_job({**options, 'type': 'dedup', 'inputs': files, 'key': key_spec, 'keep': keep,
+                                   'output': output_path})
+        print(Fore.GREEN + f"\n🎉 Archivos combinados sin duplicados en: {output_path}")
+        if options['report']:
+            print_report(report_data)
+    except Exception as e:
+        logging.error(f"❌ Error al combinar archivos sin duplicados: {e}")
+
+def main_menu(options=None):
+    """
+    Muestra el menú principal del programa y gestiona la selección del usuario.
+    Permite elegir entre combinar archivos, eliminar duplicados, combinar sin duplicados o salir.
+    Las opciones (workers, almacén de claves...) recibidas desde la línea de comandos se aplican a cada operación.
+    """
+    while True:
+        print_menu_title("MERGE-WIPER - Menú Principal")
+        print(Fore.MAGENTA + "1. Merge (Combinar/Mergear archivos XLSX) - Une varios archivos Excel en uno solo.")
+        print(Fore.MAGENTA + "2. Wipe (Eliminar/Wipear duplicados en archivo XLSX) - Elimina filas duplicadas según una columna.")
+        print(Fore.MAGENTA + "3. Merge + Wipe (Combinar sin duplicados) - Une varios archivos eliminando los duplicados en una sola pasada.")
+        print(Fore.MAGENTA + "4. Salir del programa")
+        print(Fore.YELLOW + "Puede presionar 'q' en cualquier momento para cerrar la aplicación.")
+        choice = input(Fore.WHITE + "Seleccione una opción (1, 2, 3, 4 o 'q'): ").strip()
+        if choice == '1':
+            merge_xlsx(options)
+        elif choice == '2':
+            wipe_xlsx(options)
+        elif choice == '3':
+            dedup_xlsx(options)
+        elif choice == '4':
+            print(Fore.YELLOW + "👋 ¡Hasta luego! Gracias por usar Merge-Wiper.")
+            break
+        elif choice.lower() == 'q':
+            print(Fore.YELLOW + "⏹ Cerrando la aplicación. ¡Hasta pronto!")
+            sys.exit(0)
+        else:
+            print(Fore.RED + "❌ Opción inválida. Por favor, seleccione una opción válida.")
+
+def add_job_options(parser, suppress=False):
+    """
+    Añade a un parser las opciones comunes de los trabajos.
+    En los subcomandos se usa suppress=True para no pisar los valores indicados antes del subcomando.
+    """
+    def default(value):
+        return argparse.SUPPRESS if suppress else value
+    parser.add_argument(
+        '--workers', type=int, default=default(JOB_DEFAULTS['workers']), metavar='N',
+        help="Número de procesos para parsear en paralelo los archivos del merge o las hojas (con --sheets) (por defecto 1)."
+    )
+    parser.add_argument(
+        '--prefetch', type=int, default=default(JOB_DEFAULTS['prefetch']), metavar='N',
+        help="Lectura anticipada para carpetas de red: copia a disco local los siguientes N archivos del merge "
+             "mientras se procesa el actual (por defecto 0, desactivada; sin efecto con --workers)."
+    )
+    parser.add_argument(
+        '--key-store', choices=KEY_STORE_BACKENDS, default=default(JOB_DEFAULTS['key_store']),
+        help="Almacén de claves del wipe: set (exacto), hash64/hash128 (digests compactos), disk (SQLite temporal) "
+             "o auto para elegirlo según las filas estimadas (por defecto auto)."
+    )
+    parser.add_argument(
+        '--verify-keys', action='store_true', default=default(JOB_DEFAULTS['verify_keys']),
+        help="Con los almacenes hash64/hash128, verifica las claves exactas en disco para descartar colisiones "
+             "(con --key-store auto, si elige hash64 se informa de la probabilidad de colisión)."
+    )
+    parser.add_argument(
+        '--incremental', action='store_true', default=default(JOB_DEFAULTS['incremental']),
+        help="Merge incremental: guarda un manifiesto y una caché de segmentos junto a la salida "
+             "y en las siguientes ejecuciones solo parsea los archivos nuevos o modificados."
+    )
+    parser.add_argument(
+        '--resume', action='store_true', default=default(JOB_DEFAULTS['resume']),
+        help="Merge reanudable: anota en un diario junto a la salida cada archivo terminado; si el merge se interrumpe, "
+             "al repetirlo con --resume continúa desde el último archivo anotado en lugar de empezar de nuevo."
+    )
+    parser.add_argument(
+        '--schema', choices=SCHEMA_MODES, default=default(JOB_DEFAULTS['schema']),
+        help="Merge con encabezados distintos: strict exige los mismos encabezados (por defecto); "
+             "union/intersection alinean las columnas por nombre con todas o solo las comunes."
+    )
+    parser.add_argument(
+        '--engine', choices=READ_ENGINES, default=default(JOB_DEFAULTS['engine']),
+        help="Motor de lectura de filas: openpyxl (por defecto) o fast, que lee el XML de la hoja "
+             "directamente sin crear objetos de celda (mismos valores, más rápido)."
+    )
+    parser.add_argument(
+        '--wipe-engine', choices=WIPE_ENGINES, default=default(JOB_DEFAULTS['wipe_engine']),
+        help="Motor del wipe: rows, fila a fila con el almacén de claves (por defecto), o arrow, columnar para entradas "
+             "Parquet/Arrow (agrupa las columnas de la clave con Arrow; requiere pyarrow y numpy). Si arrow no se puede "
+             "usar, se avisa y se purga fila a fila."
+    )
+    parser.add_argument(
+        '--compression', type=int, choices=range(10), default=default(JOB_DEFAULTS['compression']), metavar='0-9',
+        help="Nivel de compresión del archivo de salida: 0 sin comprimir (más rápido, más grande) "
+             f"a 9 máximo (más lento, más pequeño); por defecto {OUTPUT_COMPRESSION}."
+    )
+    parser.add_argument(
+        '--sheets', default=default(JOB_DEFAULTS['sheets']), metavar='HOJAS',
+        help="Hojas a procesar, por nombre o patrón y separadas por comas (p. ej. \"Ventas*,Stock\" o \"*\"). "
+             "El merge combina hoja a hoja y el wipe purga cada hoja; la salida tiene una hoja por cada una. "
+             "Sin esta opción se usa solo la hoja activa."
+    )
+    parser.add_argument(
+        '--metrics-out', default=default(JOB_DEFAULTS['metrics_out']), metavar='RUTA',
+        help="Exporta las métricas del trabajo (tiempos por fase, filas/s, pico de memoria, CPU) a RUTA: "
+             "texto de Prometheus si termina en .prom, JSON en otro caso. '{name}' se sustituye por el nombre del trabajo."
+    )
+    parser.add_argument(
+        '--no-report', dest='report', action='store_false', default=default(JOB_DEFAULTS['report']),
+        help="No mide recursos ni muestra el reporte detallado (solo el resumen de trabajos)."
+    )
+
+def job_options(args):
+    """
+    Extrae de los argumentos interpretados las opciones comunes de los trabajos.
+    """
+    return {name: getattr(args, name) for name in JOB_DEFAULTS}
+
+def parse_args(argv=None):
+    """
+    Interpreta los argumentos de línea de comandos del programa.
+    Sin subcomando se abre el menú interactivo; con 'merge', 'wipe', 'dedup' o 'run' se trabaja sin interacción
+    y con 'bench' se mide el rendimiento sobre archivos sintéticos.
+    """
+    parser = argparse.ArgumentParser(
+        description="Merge-Wiper: combina y elimina duplicados en archivos XLSX.",
+        epilog=f"Códigos de salida: {EXIT_OK} correcto, {EXIT_FAILURE} error, {EXIT_USAGE} uso inválido, "
+               f"{EXIT_PARTIAL} algunos trabajos fallaron."
+    )
+    add_job_options(parser)
+    subparsers = parser.add_subparsers(dest='command', metavar='{merge,wipe,dedup,run,bench}')
+    merge_parser = subparsers.add_parser('merge', help="Combina varios archivos XLSX sin interacción.")
+    merge_parser.add_argument('inputs', nargs='+', help="Archivos, carpetas o patrones glob (admite '**').")
+    merge_parser.add_argument('-o', '--output', required=True, help="Ruta del archivo XLSX de salida.")
+    add_job_options(merge_parser, suppress=True)
+    wipe_parser = subparsers.add_parser('wipe', help="Elimina duplicados de un archivo XLSX sin interacción.")
+    wipe_parser.add_argument('input', help="Archivo XLSX a purgar.")
+    wipe_parser.add_argument('-o', '--output', required=True, help="Ruta del archivo XLSX de salida.")
+    wipe_parser.add_argument(
+        '-k', '--key', required=True,
+        help="Columnas de la clave, p. ej. \"A, Cliente:strip+casefold\" (letras o encabezados, normalizaciones tras ':')."
+    )
+    add_job_options(wipe_parser, suppress=True)
+    dedup_parser = subparsers.add_parser('dedup', help="Combina varios archivos XLSX eliminando los duplicados en una sola pasada.")
+    dedup_parser.add_argument('inputs', nargs='+', help="Archivos, carpetas o patrones glob (admite '**').")
+    dedup_parser.add_argument('-o', '--output', required=True, help="Ruta del archivo XLSX de salida.")
+    dedup_parser.add_argument(
+        '-k', '--key', required=True,
+        help="Columnas de la clave, p. ej. \"A, Cliente:strip+casefold\" (letras o encabezados, normalizaciones tras ':')."
+    )
+    dedup_parser.add_argument(
+        '--keep', default='first',
+        help="Fila que se conserva entre las duplicadas: first (la primera, por defecto), last (la última) "
+             "o newest:COLUMNA (la de mayor valor en esa columna, p. ej. \"newest:Fecha:date\")."
+    )
+    add_job_options(dedup_parser, suppress=True)
+    run_parser = subparsers.add_parser('run', help="Ejecuta los trabajos descritos en un archivo JSON o YAML.")
+    run_parser.add_argument('jobfile', help="Archivo de trabajos (.json, .yml o .yaml).")
+    run_parser.add_argument('--fail-fast', action='store_true', help="Detiene la ejecución en el primer trabajo que falle.")
+    add_job_options(run_parser, suppress=True)
+    bench_parser = subparsers.add_parser('bench', help="Mide merge y wipe sobre archivos XLSX sintéticos.")
+    bench_parser.add_argument('--rows', default='10000', help="Filas por archivo, separadas por comas para varios tamaños (por defecto 10000).")
+    bench_parser.add_argument('--files', type=int, default=3, help="Archivos de entrada del merge (por defecto 3).")
+    bench_parser.add_argument('--columns', type=int, default=8, help="Columnas por archivo, incluida la columna ID (por defecto 8).")
+    bench_parser.add_argument('--types', default=','.join(BENCH_COLUMN_TYPES), help=f"Tipos de columna en ciclo ({', '.join(BENCH_COLUMN_TYPES)}).")
+    bench_parser.add_argument('--cardinality', type=int, default=1000, help="Valores de texto distintos por columna (por defecto 1000).")
+    bench_parser.add_argument('--dup-ratio', type=float, default=0.2, help="Proporción de filas duplicadas (por defecto 0.2).")
+    bench_parser.add_argument('--operations', default=','.join(BENCH_OPERATIONS), help="Operaciones a medir: merge, wipe.")
+    bench_parser.add_argument('--engines', default=','.join(READ_ENGINES), help=f"Motores de lectura a medir ({', '.join(READ_ENGINES)}).")
+    bench_parser.add_argument('--repeat', type=int, default=1, help="Repeticiones por caso; se conserva el mejor tiempo (por defecto 1).")
+    bench_parser.add_argument('--output', '-o', help="Archivo JSON donde guardar los resultados.")
+    bench_parser.add_argument('--baseline', help="Resultados JSON de una ejecución anterior con los que comparar.")
+    bench_parser.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE,
+                              help=f"Empeoramiento relativo admitido antes de marcar una regresión (por defecto {BENCH_TOLERANCE}).")
+    bench_parser.add_argument('--work-dir', help="Carpeta donde generar y conservar los archivos (por defecto, una temporal).")
+    add_job_options(bench_parser, suppress=True)
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers debe ser un número entero mayor o igual a 1")
+    if args.prefetch < 0:
+        parser.error("--prefetch debe ser un número entero mayor o igual a 0")
+    return args
+
+def main(argv=None):
+    """
+    Punto de entrada: abre el menú interactivo o ejecuta el subcomando indicado.
+    Devuelve el código de salida del programa.
+    """
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=LOG_LEVEL,
+        format='[%(levelname)s] %(message)s'
+    )
+    options = job_options(args)
+    if args.command is None:
+        main_menu(options)
+        return EXIT_OK
+    if args.command == 'bench':
+        try:
+            return bench_command(args)
+        except ValueError as e:
+            logging.error(f"❌ Benchmark: {e}")
+            return EXIT_USAGE
+        except (OSError, RuntimeError) as e:
+            logging.error(f"❌ Benchmark: {e}")
+            return EXIT_FAILURE
+    try:
+        if args.command == 'run':
+            # Las opciones de la línea de comandos se aplican a los trabajos que no las definen
+            jobs = load_job_file(args.jobfile, options)
+        elif args.command == 'merge':
+            jobs = [resolve_job_inputs(normalize_job({**options, 'type': 'merge', 'inputs': args.inputs, 'output': args.output}))]
+        elif args.command == 'dedup':
+            jobs = [resolve_job_inputs(normalize_job({**options, 'type': 'dedup', 'inputs': args.inputs, 'key': args.key,
+                                                      'keep': args.keep, 'output': args.output}))]
+        else:
+            jobs = [resolve_job_inputs(normalize_job({**options, 'type': 'wipe', 'input': args.input, 'key': args.key, 'output': args.output}))]
+    except (OSError, ValueError) as e:
+        logging.error(f"❌ {e}")
+        return EXIT_USAGE
+    return run_jobs(jobs, fail_fast=getattr(args, 'fail_fast', False))
 
 if __name__ == "__main__":
     # Punto de entrada principal del programa
     try:
-        main_menu()
+        sys.exit(main())
     except KeyboardInterrupt:
         print(Fore.YELLOW + "\n⏹ Operación cancelada por el usuario. Puede reiniciar el programa cuando lo desee.")
+        sys.exit(130)
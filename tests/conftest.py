@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Merge-Wiper.py')
+
+
+@pytest.fixture(scope='session')
+def mw():
+    """
+    Carga Merge-Wiper.py como módulo (su nombre no es importable directamente).
+    """
+    spec = importlib.util.spec_from_file_location('merge_wiper', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['merge_wiper'] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,71 @@
+import datetime
+import random
+
+import pytest
+
+
+def write_table(path, columns):
+    pa = pytest.importorskip('pyarrow')
+    table = pa.table(columns)
+    if str(path).endswith('.parquet'):
+        import pyarrow.parquet as pq
+        pq.write_table(table, str(path), row_group_size=700)
+    else:
+        with pa.ipc.new_file(str(path), table.schema) as writer:
+            writer.write_table(table, max_chunksize=700)
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+@pytest.mark.parametrize('key', ['id', 'name', 'flag', 'day', 'id, name', 'flag, day, id', 'name, name'])
+def test_arrow_engine_matches_keep_first(mw, monkeypatch, tmp_path, extension, key):
+    pytest.importorskip('numpy')
+    monkeypatch.setattr(mw, 'ARROW_BATCH_ROWS', 500)  # Varios lotes por archivo
+    rng = random.Random(7)
+    count = 3000
+    source = tmp_path / f'input{extension}'
+    write_table(source, {
+        'id': [rng.choice([None, rng.randrange(300)]) if rng.random() < 0.05 else rng.randrange(300) for _ in range(count)],
+        'name': [None if rng.random() < 0.05 else f'n{rng.randrange(400)}' for _ in range(count)],
+        'flag': [rng.choice([True, False, None]) for _ in range(count)],
+        'day': [datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randrange(200)) for _ in range(count)],
+        'value': [rng.random() for _ in range(count)],
+    })
+    expected = tmp_path / 'rows.csv'
+    actual = tmp_path / 'arrow.csv'
+    rows_stats = mw.wipe_file(str(source), str(expected), key, key_store='set')
+    arrow_stats = mw.wipe_file(str(source), str(actual), key, key_store='set', wipe_engine='arrow')
+    assert arrow_stats['wipe_engine'] == 'arrow'
+    assert (arrow_stats['lines_in'], arrow_stats['lines_out']) == (rows_stats['lines_in'], rows_stats['lines_out'])
+    assert actual.read_bytes() == expected.read_bytes()
+
+
+def test_arrow_engine_falls_back_with_warning(mw, tmp_path, caplog):
+    source = tmp_path / 'input.parquet'
+    write_table(source, {'id': [1, 1, 2], 'score': [0.5, 0.5, 1.0]})
+    for key in ('id:numeric', 'id, score', 'score'):
+        caplog.clear()
+        stats = mw.wipe_file(str(source), str(tmp_path / 'out.csv'), key, key_store='set', wipe_engine='arrow')
+        assert stats['wipe_engine'] == 'rows'
+        assert stats['lines_out'] == 2
+        assert 'Motor de wipe arrow no disponible' in caplog.text
+        assert any(record.levelname == 'WARNING' for record in caplog.records)
+
+
+def test_arrow_engine_warns_for_xlsx_input(mw, tmp_path, caplog):
+    source = tmp_path / 'input.xlsx'
+    with mw.open_writer(str(source)) as writer:
+        for row in [('id', 'v'), (1, 'a'), (1, 'b'), (2, 'c')]:
+            writer.append(row)
+    stats = mw.wipe_file(str(source), str(tmp_path / 'out.csv'), 'id', key_store='set', wipe_engine='arrow')
+    assert (stats['wipe_engine'], stats['lines_out']) == ('rows', 2)
+    assert 'solo admite entradas Parquet/Arrow' in caplog.text
+
+
+def test_wipe_engine_is_a_job_option(mw, tmp_path):
+    args = mw.parse_args(['wipe', 'a.parquet', '-o', 'b.parquet', '-k', 'id', '--wipe-engine', 'arrow'])
+    assert mw.job_options(args)['wipe_engine'] == 'arrow'
+    with pytest.raises(SystemExit):
+        mw.parse_args(['wipe', 'a.parquet', '-o', 'b.parquet', '-k', 'id', '--key-store', 'arrow'])
+    job = {'type': 'wipe', 'input': 'a.parquet', 'output': 'b.parquet', 'key': 'id', 'wipe_engine': 'columnar'}
+    with pytest.raises(ValueError, match='motor de wipe desconocido'):
+        mw.normalize_job(job, str(tmp_path))
@@ -0,0 +1,171 @@
+import datetime
+import zipfile
+
+import pytest
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+DOC_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# Estilo 0: general; estilo 1: fecha (numFmtId 14); estilo 2: duración personalizada
+STYLES_XML = (
+    f'<styleSheet xmlns="{MAIN_NS}">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="[hh]:mm:ss"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0"/><xf numFmtId="14" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def build_xlsx(path, sheet_data, dimension='A1:C4', shared=None, date1904=False):
+    """
+    Escribe a mano un XLSX mínimo con una hoja, para reproducir casos que openpyxl no genera
+    (cadenas en línea, fórmulas compartidas, dimensión ausente, guías fonéticas...).
+    """
+    dimension_xml = f'<dimension ref="{dimension}"/>' if dimension else ''
+    workbook_pr = '<workbookPr date1904="1"/>' if date1904 else ''
+    rels = (f'<Relationship Id="rId1" Type="{DOC_REL}/worksheet" Target="worksheets/sheet1.xml"/>'
+            f'<Relationship Id="rId2" Type="{DOC_REL}/styles" Target="styles.xml"/>')
+    if shared is not None:
+        rels += f'<Relationship Id="rId3" Type="{DOC_REL}/sharedStrings" Target="sharedStrings.xml"/>'
+    parts = {
+        '[Content_Types].xml': (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + ('<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+               if shared is not None else '')
+            + '</Types>'
+        ),
+        '_rels/.rels': (f'<Relationships xmlns="{REL_NS}"><Relationship Id="rId1" '
+                        f'Type="{DOC_REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>'),
+        'xl/workbook.xml': (f'<workbook xmlns="{MAIN_NS}" xmlns:r="{DOC_REL}">{workbook_pr}'
+                            '<sheets><sheet name="Hoja1" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+        'xl/_rels/workbook.xml.rels': f'<Relationships xmlns="{REL_NS}">{rels}</Relationships>',
+        'xl/styles.xml': STYLES_XML,
+        'xl/worksheets/sheet1.xml': f'<worksheet xmlns="{MAIN_NS}">{dimension_xml}<sheetData>{sheet_data}</sheetData></worksheet>',
+    }
+    if shared is not None:
+        parts['xl/sharedStrings.xml'] = f'<sst xmlns="{MAIN_NS}">{shared}</sst>'
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, content in parts.items():
+            zf.writestr(name, content)
+    return path
+
+
+def comparable(rows):
+    """
+    Las fórmulas matriciales de openpyxl no definen igualdad; se comparan por referencia y texto.
+    """
+    from openpyxl.worksheet.formula import ArrayFormula
+    return [tuple(('array', value.ref, value.text) if isinstance(value, ArrayFormula) else value for value in row)
+            for row in rows]
+
+
+def assert_parity(mw, path, min_row=1):
+    fast = list(mw.iter_rows_fast(str(path), min_row=min_row))
+    reference = list(mw.iter_openpyxl_rows(str(path), min_row=min_row))
+    assert comparable(fast) == comparable(reference)
+    return fast
+
+
+HEADER_ROW = '<row r="1"><c r="A1" t="inlineStr"><is><t>a</t></is></c><c r="B1" t="inlineStr"><is><t>b</t></is></c></row>'
+
+
+def test_dates_and_durations(mw, tmp_path):
+    rows = HEADER_ROW + (
+        '<row r="2"><c r="A2" s="1"><v>45000</v></c><c r="B2" s="2"><v>1.5</v></c><c r="C2"><v>7</v></c></row>'
+        '<row r="3"><c r="A3" s="1"><v>45000.25</v></c><c r="B3" s="2"><v>0.25</v></c><c r="C3"><v>2.5</v></c></row>'
+    )
+    fast = assert_parity(mw, build_xlsx(tmp_path / 'fechas.xlsx', rows, dimension='A1:C3'))
+    assert fast[1][0] == datetime.datetime(2023, 3, 15)
+    assert fast[1][1] == datetime.timedelta(days=1, hours=12)
+
+
+def test_1904_epoch(mw, tmp_path):
+    rows = HEADER_ROW + '<row r="2"><c r="A2" s="1"><v>1</v></c><c r="B2" s="1"><v>45000</v></c></row>'
+    fast = assert_parity(mw, build_xlsx(tmp_path / 'mac.xlsx', rows, dimension='A1:B2', date1904=True))
+    assert fast[1][0] == datetime.datetime(1904, 1, 2)
+
+
+def test_shared_and_array_formulas(mw, tmp_path):
+    rows = HEADER_ROW + (
+        '<row r="2"><c r="A2"><v>1</v></c><c r="B2"><f t="shared" ref="B2:B4" si="0">A2*2</f><v>2</v></c></row>'
+        '<row r="3"><c r="A3"><v>2</v></c><c r="B3"><f t="shared" si="0"/><v>4</v></c></row>'
+        '<row r="4"><c r="A4"><v>3</v></c><c r="B4"><f t="shared" si="0"/><v>6</v></c>'
+        '<c r="C4"><f t="array" ref="C4:C4">SUM(A2:A4*B2:B4)</f><v>28</v></c></row>'
+    )
+    fast = assert_parity(mw, build_xlsx(tmp_path / 'formulas.xlsx', rows))
+    assert fast[2][1] == '=A3*2'
+    assert fast[3][1] == '=A4*2'
+
+
+def test_inline_and_shared_strings(mw, tmp_path):
+    shared = '<si><t>compartida</t></si><si><t xml:space="preserve"> con espacios </t></si><si><t>x005F_x0041</t></si>'
+    rows = HEADER_ROW + (
+        '<row r="2"><c r="A2" t="s"><v>0</v></c><c r="B2" t="inlineStr"><is><t>en línea</t></is></c></row>'
+        '<row r="3"><c r="A3" t="s"><v>1</v></c><c r="B3" t="s"><v>2</v></c><c r="C3" t="b"><v>1</v></c></row>'
+        '<row r="4"><c r="A4" t="str"><v>texto de fórmula</v></c>'
+        '<c r="B4" t="inlineStr"><is><r><t>rico </t></r><r><t>en línea</t></r></is></c></row>'
+    )
+    fast = assert_parity(mw, build_xlsx(tmp_path / 'cadenas.xlsx', rows, shared=shared))
+    assert fast[1][:2] == ('compartida', 'en línea')
+    assert fast[3][1] == 'rico en línea'
+
+
+def test_rich_text_with_phonetic_runs(mw, tmp_path):
+    shared = ('<si><r><t>東京</t></r><r><t>都</t></r><rPh sb="0" eb="2"><t>トウキョウ</t></rPh>'
+              '<phoneticPr fontId="1"/></si>')
+    rows = HEADER_ROW + (
+        '<row r="2"><c r="A2" t="s"><v>0</v></c>'
+        '<c r="B2" t="inlineStr"><is><t>大阪</t><rPh sb="0" eb="2"><t>オオサカ</t></rPh></is></c></row>'
+    )
+    fast = assert_parity(mw, build_xlsx(tmp_path / 'fonetica.xlsx', rows, dimension='A1:B2', shared=shared))
+    assert fast[1] == ('東京都', '大阪')
+
+
+def test_missing_dimension(mw, tmp_path):
+    rows = HEADER_ROW + '<row r="2"><c r="A2"><v>1</v></c></row><row r="4"><c r="C4"><v>3</v></c></row>'
+    assert_parity(mw, build_xlsx(tmp_path / 'sin_dimension.xlsx', rows, dimension=None))
+
+
+@pytest.mark.parametrize('dimension', ['A1', 'A1:B2'])
+def test_short_dimension(mw, tmp_path, dimension):
+    rows = HEADER_ROW + (
+        '<row r="2"><c r="A2"><v>1</v></c><c r="C2"><v>3</v></c></row>'
+        '<row r="5"><c r="B5"><v>5</v></c></row>'
+    )
+    assert_parity(mw, build_xlsx(tmp_path / 'dimension_corta.xlsx', rows, dimension=dimension))
+
+
+def test_rows_without_references(mw, tmp_path):
+    rows = ('<row><c t="inlineStr"><is><t>a</t></is></c><c t="inlineStr"><is><t>b</t></is></c></row>'
+            '<row><c><v>1</v></c><c><v>2</v></c></row>')
+    assert_parity(mw, build_xlsx(tmp_path / 'sin_referencias.xlsx', rows, dimension='A1:B2'))
+
+
+def test_stream_writer_round_trip(mw, tmp_path):
+    from openpyxl.worksheet.formula import ArrayFormula
+    path = str(tmp_path / 'escrito.xlsx')
+    rows = [
+        ('texto', ' con espacios ', '', None, True),
+        (1, 2.5, 10 ** 15, -0.1, False),
+        (datetime.datetime(2024, 2, 29, 13, 45), datetime.date(1999, 12, 31), datetime.time(8, 30),
+         datetime.timedelta(hours=36), '#N/A'),
+        ('=SUM(A2:B2)', ArrayFormula(ref='B4', text='=A2*2'), 'a < b & c', None, 'x'),
+    ]
+    with mw.XlsxStreamWriter(path) as writer:
+        for row in rows:
+            writer.append(row)
+    fast = assert_parity(mw, path)
+    # Como en openpyxl, las fechas se leen de vuelta como datetime
+    assert fast[2][:4] == (rows[2][0], datetime.datetime(1999, 12, 31), *rows[2][2:4])
+    assert fast[0][:3] == ('texto', ' con espacios ', None)
@@ -0,0 +1,54 @@
+import pytest
+
+
+def write_rows(mw, path, rows):
+    with mw.open_writer(str(path)) as writer:
+        for row in rows:
+            writer.append(row)
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_arrow_writer_widens_int_column_to_float(mw, monkeypatch, tmp_path, extension):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setattr(mw, 'ARROW_BATCH_ROWS', 3)
+    path = tmp_path / f'out{extension}'
+    write_rows(mw, path, [('n',), (10,), (20,), (30,), (40.5,)])
+    assert list(mw.iter_arrow_rows(str(path))) == [(10.0,), (20.0,), (30.0,), (40.5,)]
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_arrow_writer_falls_back_to_text_across_batches(mw, monkeypatch, tmp_path, extension):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setattr(mw, 'ARROW_BATCH_ROWS', 2)
+    path = tmp_path / f'out{extension}'
+    big = 2**53 + 1  # No cabe exacto en un decimal: la columna tiene que pasar a texto
+    write_rows(mw, path, [('n', 'm'), (big, 1), (2, None), (3, 'N/A'), (None, 4.5), (5, 6)])
+    assert list(mw.iter_arrow_rows(str(path))) == [
+        (big, '1'), (2, None), (3, 'N/A'), (None, '4.5'), (5, '6')
+    ]
+    write_rows(mw, path, [('n',), (big,), (2,), (0.5,)])
+    assert list(mw.iter_arrow_rows(str(path))) == [(str(big),), ('2',), ('0.5',)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f'out{extension}']
+
+
+def test_csv_reads_spanish_excel_export(mw, tmp_path):
+    path = tmp_path / 'excel.csv'
+    path.write_bytes('Código;Descripción;Importe\r\nA-1;Señal añadida;1,5\r\nA-2;€ y ü;\r\n'.encode('cp1252'))
+    assert mw.read_table_headers(str(path)) == ['Código', 'Descripción', 'Importe']
+    assert list(mw.iter_data_rows(str(path))) == [('A-1', 'Señal añadida', '1,5'), ('A-2', '€ y ü', None)]
+
+
+def test_csv_keeps_utf8_when_sample_cuts_a_character(mw, monkeypatch, tmp_path):
+    path = tmp_path / 'utf8.csv'
+    path.write_bytes('﻿a,b\nñ,ü\n'.encode('utf-8'))
+    monkeypatch.setattr(mw, 'CSV_SNIFF_CHARS', 8)  # El bloque termina a mitad de 'ñ'
+    assert list(mw.iter_data_rows(str(path))) == [('ñ', 'ü')]
+
+
+@pytest.mark.parametrize('padding', [1, 20000])  # Bytes no válidos dentro del bloque analizado o muy después
+def test_csv_mixed_encodings_raise_clear_error(mw, monkeypatch, tmp_path, padding):
+    path = tmp_path / 'mezcla.csv'
+    path.write_bytes(('a,b\n' + '1,2\n' * padding).encode('utf-8') + 'ñ,3\n'.encode('cp1252'))
+    monkeypatch.setattr(mw, 'CSV_SNIFF_CHARS', 8)
+    with pytest.raises(ValueError, match='UTF-8'):
+        list(mw.iter_data_rows(str(path)))
@@ -0,0 +1,125 @@
+import pytest
+
+
+def test_key_extractor_pads_short_rows(mw):
+    extract = mw.compile_key_extractor(mw.parse_key_spec('A, C', ['a', 'b', 'c']))
+    assert extract((1, 'x', 3)) == (1, 3)
+    assert extract((2, 'y')) == (2, None)
+    extract = mw.compile_key_extractor(mw.parse_key_spec('C:strip', ['a', 'b', 'c']))
+    assert extract((1, 'x', ' z ')) == 'z'
+    assert extract((1,)) is None
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'fast'])
+def test_wipe_with_empty_trailing_key_cells(mw, tmp_path, engine):
+    # El escritor propio no guarda <dimension> ni las celdas vacías del final de cada fila
+    source = tmp_path / 'merge.xlsx'
+    with mw.open_writer(str(source)) as writer:
+        for row in [('a', 'b', 'c'), (1, 'x', 'k'), (2, 'y', None), (3, 'z', None), (4, 'w', 'k')]:
+            writer.append(row)
+    output = tmp_path / 'wipe.csv'
+    result = mw.wipe_file(str(source), str(output), 'C', key_store='set', engine=engine)
+    assert (result['lines_in'], result['lines_out']) == (4, 2)
+    assert list(mw.iter_data_rows(str(output))) == [('1', 'x', 'k'), ('2', 'y')]
+
+
+def write_xlsx(mw, path, rows):
+    with mw.open_writer(str(path)) as writer:
+        for row in rows:
+            writer.append(row)
+
+
+@pytest.mark.parametrize('keep', ['first', 'last', 'newest:t'])
+def test_dedup_with_empty_trailing_key_and_rank_cells(mw, tmp_path, keep):
+    first = tmp_path / 'd1.xlsx'
+    second = tmp_path / 'd2.xlsx'
+    write_xlsx(mw, first, [('v', 'k', 't'), ('a', 1, 5), ('b', 2), ('c',)])
+    write_xlsx(mw, second, [('v', 'k', 't'), ('d', 1, 7), ('e', 2, 1), ('f',)])
+    output = tmp_path / 'out.csv'
+    stats = mw.dedup_files([str(first), str(second)], str(output), 'k', keep, key_store='set')
+    rows = list(mw.iter_data_rows(str(output)))
+    expected = {
+        'first': [('a', '1', '5'), ('b', '2'), ('c',)],
+        'last': [('d', '1', '7'), ('e', '2', '1'), ('f',)],
+        # Las celdas vacías de la columna de 'newest' son las más antiguas; el empate (None) lo gana la última
+        'newest:t': [('d', '1', '7'), ('e', '2', '1'), ('f',)],
+    }[keep]
+    assert rows == expected
+    assert stats['lines_out'] == 3
+
+
+def test_normalize_numeric_keeps_long_ids_and_thousands_apart(mw):
+    normalize = mw.normalize_numeric
+    assert normalize('12345678901234567890') != normalize('12345678901234567891')
+    assert normalize('12345678901234567890') == 12345678901234567890
+    assert normalize('4111111111111111') != normalize('4111111111111112')
+    assert normalize('1,000') != normalize('1')
+    assert normalize(' 123 ') == normalize(123.0) == normalize('123.0') == normalize('1.23e2') == 123
+    assert normalize('1.5') == normalize(1.5) == 1.5
+    assert normalize('0.1') == normalize(0.1) == 0.1
+    assert normalize('19.99') == normalize(19.99) == 19.99
+    assert normalize('19.990') == normalize(19.99)
+    assert normalize('0.1000000000000000001') != normalize('0.1')
+    assert normalize('abc') == 'abc'
+    assert normalize(True) is True
+    assert normalize(None) is None
+
+
+def test_numeric_key_matches_csv_text_and_xlsx_number(mw, tmp_path):
+    # El mismo precio llega como texto desde un CSV y como número desde un XLSX
+    csv_path = tmp_path / 'precios.csv'
+    csv_path.write_text('producto,precio\na,0.1\nb,19.99\nc,3\n', encoding='utf-8')
+    xlsx_path = tmp_path / 'precios.xlsx'
+    write_xlsx(mw, xlsx_path, [('producto', 'precio'), ('d', 0.1), ('e', 19.99), ('f', 3.0), ('g', 4.5)])
+    output = tmp_path / 'out.csv'
+    stats = mw.dedup_files([str(csv_path), str(xlsx_path)], str(output), 'precio:numeric', 'first', key_store='set')
+    assert list(mw.iter_data_rows(str(output))) == [('a', '0.1'), ('b', '19.99'), ('c', '3'), ('g', '4.5')]
+    assert stats['lines_out'] == 4
+
+
+@pytest.mark.parametrize('backend', ['set', 'hash64', 'hash128', 'disk'])
+def test_key_stores_agree_on_equal_keys(mw, tmp_path, backend):
+    import decimal
+    store = mw.create_key_store(backend, spill_dir=str(tmp_path))
+    try:
+        keys = [1, 1.0, True, decimal.Decimal('1'), 1.5, decimal.Decimal('1.5'), '1', (1, 'a'), (1.0, 'a'), 0, False, -0.0]
+        assert store.filter(keys) == [True, False, False, False, True, False, True, True, False, True, False, False]
+    finally:
+        store.close()
+
+
+def test_auto_key_store_mid_tier_is_smaller_than_disk(mw, monkeypatch, tmp_path, caplog):
+    import logging
+    monkeypatch.setattr(mw, 'KEY_STORE_SET_MAX_ROWS', 100_000)  # Fuerza el tramo intermedio con pocas claves
+    keys = [f'pedido-{i}' for i in range(300_000)]
+    with caplog.at_level(logging.INFO):
+        auto = mw.create_key_store('auto', len(keys), spill_dir=str(tmp_path))
+    disk = mw.create_key_store('disk', spill_dir=str(tmp_path))
+    try:
+        assert auto.name == 'hash64'
+        assert auto._exact is None
+        assert 'probabilidad de colisión' in caplog.text
+        assert all(auto.filter(keys)) and all(disk.filter(keys))
+        assert auto.memory_bytes() < disk.memory_bytes()
+    finally:
+        auto.close()
+        disk.close()
+
+
+def test_auto_key_store_keeps_explicit_verification(mw, tmp_path):
+    store = mw.create_key_store('auto', mw.KEY_STORE_SET_MAX_ROWS + 1, verify=True, spill_dir=str(tmp_path))
+    try:
+        assert store.name == 'hash64'
+        assert store._exact is not None
+    finally:
+        store.close()
+
+
+def test_estimate_rows_without_dimension(mw, monkeypatch, tmp_path):
+    monkeypatch.setattr(mw, 'ESTIMATE_SAMPLE_BYTES', 4096)  # Fuerza la extrapolación desde una muestra
+    path = tmp_path / 'merge.xlsx'
+    with mw.open_writer(str(path)) as writer:
+        writer.append(('id', 'name'))
+        for i in range(20000):
+            writer.append((i, f'name{i % 97}'))
+    assert 0.8 * 20000 <= mw.estimate_rows(str(path)) <= 1.25 * 20000
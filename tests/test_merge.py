@@ -0,0 +1,64 @@
+import pytest
+
+from test_fast_reader import build_xlsx
+
+
+def inline(ref, text):
+    return f'<c r="{ref}" t="inlineStr"><is><t>{text}</t></is></c>'
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'fast'])
+@pytest.mark.parametrize('schema, headers, expected', [
+    ('union', ['id', 'a', 'b'],
+     [('1', 'x', None), ('2', 'y', None), ('10', '1', '5'), (None, None, None), ('11', None, None)]),
+    ('intersection', ['id', 'a'],
+     [('1', 'x'), ('2', 'y'), ('10', '1'), (None, None), ('11', None)]),
+])
+def test_merge_schema_with_row_gap_in_sheet_without_dimension(mw, tmp_path, engine, schema, headers, expected):
+    first = tmp_path / 'a.xlsx'
+    with mw.open_writer(str(first)) as writer:
+        for row in [('id', 'a'), (1, 'x'), (2, 'y')]:
+            writer.append(row)
+    # Sin <dimension> y sin la fila 3: los lectores devuelven una lista vacía para ella
+    second = build_xlsx(tmp_path / 'b.xlsx', (
+        '<row r="1">' + inline('A1', 'a') + inline('B1', 'id') + inline('C1', 'b') + '</row>'
+        '<row r="2"><c r="A2"><v>1</v></c><c r="B2"><v>10</v></c><c r="C2"><v>5</v></c></row>'
+        '<row r="4"><c r="B4"><v>11</v></c></row>'
+    ), dimension=None)
+    output = tmp_path / 'out.csv'
+    stats = mw.merge_files([str(first), str(second)], str(output), schema=schema, engine=engine)
+    assert stats['lines_out'] == len(expected)
+    assert mw.read_table_headers(str(output)) == headers
+    assert list(mw.iter_data_rows(str(output))) == expected
+
+
+class ListSink:
+    def __init__(self):
+        self.rows = []
+
+    def append(self, row):
+        self.rows.append(row)
+
+
+def test_timed_append_counts_rows_across_batches(mw):
+    metrics = mw.PhaseMetrics()
+    sink = ListSink()
+    rows = [(i, f'v{i}') for i in range(2500)]
+    assert mw.append_rows(sink, iter(rows), lambda row: (row[1], row[0]), metrics) == 2500
+    assert sink.rows == [(v, i) for i, v in rows]
+    assert metrics.rows == {'read': 2500, 'transform': 2500, 'write': 2500}
+
+
+def test_merge_without_report_skips_row_timing(mw, monkeypatch, tmp_path):
+    source = tmp_path / 'a.xlsx'
+    with mw.open_writer(str(source)) as writer:
+        for row in [('id', 'a'), (1, 'x'), (2, 'y')]:
+            writer.append(row)
+
+    def fail(*args):
+        raise AssertionError("la copia de filas no debe medirse sin reporte")
+
+    monkeypatch.setattr(mw, '_append_rows_timed', fail)
+    job = mw.normalize_job({'type': 'merge', 'inputs': [str(source)], 'output': str(tmp_path / 'out.csv'),
+                            'report': False}, str(tmp_path))
+    assert mw.run_merge(job)['lines_out'] == 2
@@ -0,0 +1,22 @@
+import subprocess
+import sys
+
+from conftest import SCRIPT
+
+# Módulos pesados u opcionales que el arranque sin interfaz gráfica nunca debe importar
+HEAVY_MODULES = ('tkinter', 'openpyxl', 'psutil', 'pyarrow')
+
+
+def test_help_leaves_heavy_modules_out_of_sys_modules():
+    code = (
+        "import runpy, sys\n"
+        f"sys.argv = [{SCRIPT!r}, '--help']\n"
+        "try:\n"
+        f"    runpy.run_path({SCRIPT!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(sorted(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=False)
+    assert 'Merge-Wiper' in result.stdout  # La ayuda se imprimió: el script llegó a interpretar --help
+    assert result.stdout.strip().splitlines()[-1] == '[]'